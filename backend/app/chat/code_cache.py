@@ -0,0 +1,135 @@
+"""
+Code Explanation Cache - Reuse CodeExplainer output for the same snippet
+Snippets are keyed by a normalized form of the code (Python by AST, other languages by
+tokens with comments dropped), so re-highlighting with different whitespace or comments
+still hits; entries expire by TTL and LRU size
+"""
+
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+import ast
+import hashlib
+import re
+import textwrap
+import time
+import logging
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# String literals come first so comment markers inside them are kept; "#" is a comment
+# (shell, YAML, CMake) except for C/C++ preprocessor directives; "//" after ":" is a URL
+_TOKEN_RE = re.compile(r"""
+    (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | (?P<comment>/\*.*?\*/|<!--.*?-->|(?<!:)//[^\n]*|\#(?!include|define|undef|if|else|elif|endif|pragma)[^\n]*)
+  | (?P<word>\w+)
+  | (?P<symbol>\S)
+""", re.VERBOSE | re.DOTALL)
+
+
+def _strip_docstrings(tree: ast.AST) -> ast.AST:
+    for node in ast.walk(tree):
+        body = getattr(node, "body", None)
+        if (isinstance(body, list) and body and isinstance(body[0], ast.Expr)
+                and isinstance(body[0].value, ast.Constant) and isinstance(body[0].value.value, str)):
+            node.body = body[1:]
+    return tree
+
+
+def normalize_code(code: str) -> Tuple[str, str]:
+    """(kind, normalized code) - "python" if the snippet parses, else "tokens" """
+    try:
+        tree = ast.parse(textwrap.dedent(code).strip())
+        return "python", ast.dump(_strip_docstrings(tree), annotate_fields=False)
+    except (SyntaxError, ValueError):
+        tokens = [m.group() for m in _TOKEN_RE.finditer(code) if m.lastgroup != "comment"]
+        return "tokens", " ".join(tokens)
+
+
+# Exact re-highlights of a snippet skip parsing
+@lru_cache(maxsize=4096)
+def explanation_key(code: str, context: Optional[str], model: str) -> str:
+    """Hash of the normalized code, context and model"""
+    kind, normalized = normalize_code(code)
+    context = " ".join((context or "").split())
+    return hashlib.sha256(f"{model}\0{kind}\0{context}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedExplanation:
+    """A stored explanation"""
+    explanation: str
+    tokens_used: int
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class CodeExplanationCache:
+    """In-memory LRU of explanations by normalized snippet"""
+
+    def __init__(self, max_entries: int, ttl_s: float):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, CachedExplanation]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.saved_tokens = 0
+        self._lookup_us: deque = deque(maxlen=1000)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, code: str, context: Optional[str], model: str) -> Optional[str]:
+        """Cached explanation of the snippet, or None"""
+        started = time.perf_counter()
+        key = explanation_key(code, context, model)
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry.created_at > self.ttl_s:
+            del self._entries[key]
+            self.expired += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+        else:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_tokens += entry.tokens_used
+        self._lookup_us.append((time.perf_counter() - started) * 1e6)
+        return entry.explanation if entry else None
+
+    def store(self, code: str, context: Optional[str], model: str, explanation: str, tokens_used: int):
+        """Cache an explanation, evicting the least recently used entries beyond max_entries"""
+        if self.max_entries <= 0:
+            return
+        key = explanation_key(code, context, model)
+        self._entries[key] = CachedExplanation(explanation=explanation, tokens_used=tokens_used or 0)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Hit rate, saved tokens and lookup latency"""
+        lookups = self.hits + self.misses
+        latencies = sorted(self._lookup_us)
+        return {
+            "enabled": settings.CODE_EXPLAIN_CACHE_ENABLED,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_tokens": self.saved_tokens,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "avg_lookup_us": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "p95_lookup_us": round(latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else 0.0
+        }
@@ -0,0 +1,186 @@
+"""
+Content Cache - Persistent store for subagent output (translations, personalized variants)
+Keyed by a hash of the source content, the variant (target language, profile bucket) and
+model; bounded in size with least-recently-used eviction, so repeated chapter paragraphs
+are generated once
+"""
+
+from typing import Dict, Optional, Tuple
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+# PRAGMA user_version of the cache file - 0 is the translation-only layout
+# (language/translation columns), 1 the generic variant/output one
+SCHEMA_VERSION = 1
+
+
+def content_key(content: str, variant: str, model: str) -> str:
+    """Hash of everything that determines the output"""
+    text = unicodedata.normalize("NFC", content).strip()
+    return hashlib.sha256(f"{model}\0{variant}\0{text}".encode("utf-8")).hexdigest()
+
+
+class ContentCache:
+    """
+    SQLite-backed LRU of generated content, one table per subagent
+    ("" or ":memory:" keeps it in-process only, as does a file that cannot be opened)
+    Every hit refreshes last_used_at; inserts beyond max_entries evict the stalest rows
+    """
+
+    def __init__(self, db_path: str, max_entries: int, table: str):
+        if not re.fullmatch(r"[a-z_]+", table):
+            raise ValueError(f"Invalid cache table name: {table}")
+        self.db_path = db_path or ":memory:"
+        self.max_entries = max(1, max_entries)
+        self.table = table
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._entries = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evicted = 0
+        self.saved_tokens = 0
+
+    def _open(self) -> sqlite3.Connection:
+        if self._conn is None:
+            try:
+                self._conn = self._connect(self.db_path)
+            except (sqlite3.Error, OSError) as e:
+                if self.db_path == ":memory:":
+                    raise
+                # Read-only or ephemeral filesystem - keep caching in-process instead of failing every call
+                logger.warning(f"{self.table} file {self.db_path} unusable, caching in memory only: {str(e)}")
+                self.db_path = ":memory:"
+                self._conn = self._connect(self.db_path)
+        return self._conn
+
+    def _connect(self, db_path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._migrate(conn)
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    variant TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    output TEXT NOT NULL,
+                    tokens_used INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.table}_last_used ON {self.table}(last_used_at)"
+            )
+            conn.commit()
+            self._entries = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """Bring files written by older versions up to SCHEMA_VERSION, keeping their entries"""
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")}
+        if "language" in columns:
+            conn.execute(f"ALTER TABLE {self.table} RENAME COLUMN language TO variant")
+            conn.execute(f"ALTER TABLE {self.table} RENAME COLUMN translation TO output")
+            conn.execute("DROP INDEX IF EXISTS idx_translation_last_used")  # Recreated under the table's name
+            logger.info(f"Migrated {self.table} in {self.db_path} to schema version {SCHEMA_VERSION}")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+
+    def _get(self, key: str) -> Optional[Tuple[str, int]]:
+        with self._lock:
+            conn = self._open()
+            row = conn.execute(
+                f"SELECT output, tokens_used FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(f"UPDATE {self.table} SET last_used_at = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+            return row
+
+    def _put(self, key: str, variant: str, model: str, output: str, tokens_used: int) -> int:
+        with self._lock:
+            conn = self._open()
+            now = time.time()
+            inserted = conn.execute(f"""
+                INSERT OR IGNORE INTO {self.table}
+                    (key, variant, model, output, tokens_used, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (key, variant, model, output, tokens_used, now, now)).rowcount
+            self._entries += inserted
+            evicted = 0
+            if self._entries > self.max_entries:
+                evicted = conn.execute(f"""
+                    DELETE FROM {self.table} WHERE key IN (
+                        SELECT key FROM {self.table} ORDER BY last_used_at LIMIT ?
+                    )
+                """, (self._entries - self.max_entries,)).rowcount
+                self._entries -= evicted
+            conn.commit()
+            return evicted
+
+    async def get(self, content: str, variant: str, model: str) -> Optional[str]:
+        """Cached output, if any"""
+        row = await asyncio.to_thread(self._get, content_key(content, variant, model))
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_tokens += row[1]
+        return row[0]
+
+    async def contains(self, content: str, variant: str, model: str) -> bool:
+        """Whether an output is cached (no counters, no LRU refresh)"""
+        key = content_key(content, variant, model)
+
+        def lookup() -> bool:
+            with self._lock:
+                return self._open().execute(
+                    f"SELECT 1 FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone() is not None
+
+        return await asyncio.to_thread(lookup)
+
+    async def put(self, content: str, variant: str, model: str, output: str, tokens_used: int):
+        """Store an output, evicting least recently used entries beyond max_entries"""
+        key = content_key(content, variant, model)
+        evicted = await asyncio.to_thread(self._put, key, variant, model, output, tokens_used or 0)
+        self.evicted += evicted
+        self.stores += 1
+
+    def get_stats(self) -> Dict:
+        """Hit rate, saved tokens and size"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "persistent": self.db_path != ":memory:",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_tokens": self.saved_tokens,
+            "stores": self.stores,
+            "evicted": self.evicted
+        }
+
+    def close(self):
+        """Close the persistent store"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,125 @@
+"""
+Conversation Summary - Rolling summaries of turns older than the history window
+Once turns age out of the last-N window they are folded into a per-session summary in
+the background, so long sessions keep their context at a roughly constant prompt size
+"""
+
+from typing import Dict, List, Optional, Set
+import asyncio
+import time
+import logging
+
+from app.config import settings
+from app.db_selector import get_db_module
+from app.chat.conversation_writer import conversation_writer
+from app.chat.token_budget import truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """You maintain a running summary of a tutoring conversation about Physical AI and Humanoid Robotics.
+Merge the new turns into the existing summary. Keep the student's goals, background, questions asked,
+key explanations given and anything the tutor promised to follow up on. Drop greetings and repetition.
+Write plain prose, at most a few short paragraphs."""
+
+# Long answers are clipped before summarizing - the gist is in the first part
+MAX_TURN_TOKENS = 600
+
+
+class ConversationSummarizer:
+    """
+    Folds aged-out turns into a session summary stored next to conversation_history
+    One update runs per session at a time; turns arriving meanwhile trigger one more pass
+    """
+
+    def __init__(self, gateway, keep_turns: int):
+        self.gateway = gateway
+        self.keep_turns = keep_turns
+        self._running: Dict[str, asyncio.Task] = {}
+        self._dirty: Set[str] = set()
+        self.updates = 0
+        self.failed = 0
+        self.turns_summarized = 0
+        self.total_update_ms = 0.0
+
+    def schedule(self, session_id: str):
+        """Update the session's summary in the background once its pending turns are saved"""
+        if not settings.CONVERSATION_SUMMARY_ENABLED:
+            return
+        if session_id in self._running:
+            self._dirty.add(session_id)
+            return
+        task = asyncio.create_task(self._run(session_id))
+        self._running[session_id] = task
+        task.add_done_callback(lambda _: self._running.pop(session_id, None))
+
+    async def _run(self, session_id: str):
+        while True:
+            self._dirty.discard(session_id)
+            try:
+                await conversation_writer.wait_for_session(session_id)
+                await self.update(session_id)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Conversation summary update failed (session {session_id}): {str(e)}")
+                return
+            if session_id not in self._dirty:
+                return
+
+    async def update(self, session_id: str) -> bool:
+        """Fold turns that left the history window into the summary - True if it changed"""
+        db = get_db_module()
+        total = await db.count_conversation_turns(session_id)
+        aged_out = total - self.keep_turns
+        current = await db.get_conversation_summary(session_id)
+        summarized = current["turns_summarized"] if current else 0
+        if aged_out - summarized < settings.CONVERSATION_SUMMARY_MIN_TURNS:
+            return False
+
+        started = time.perf_counter()
+        turns = await db.get_conversation_turns(session_id, offset=summarized, limit=aged_out - summarized)
+        summary = await self._summarize(current["summary"] if current else None, turns)
+        await db.save_conversation_summary(session_id, summary, summarized + len(turns))
+
+        self.updates += 1
+        self.turns_summarized += len(turns)
+        self.total_update_ms += (time.perf_counter() - started) * 1000
+        return True
+
+    async def _summarize(self, summary: Optional[str], turns: List[Dict]) -> str:
+        transcript = "\n\n".join(
+            f"{'Student' if turn['role'] == 'user' else 'Tutor'}: {truncate_to_tokens(turn['content'], MAX_TURN_TOKENS)}"
+            for turn in turns
+        )
+        response = await self.gateway.chat(
+            model=settings.CONVERSATION_SUMMARY_MODEL or settings.OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": f"Current summary:\n{summary or '(none yet)'}\n\nNew turns:\n{transcript}"}
+            ],
+            temperature=0.2,
+            max_tokens=settings.CONVERSATION_SUMMARY_MAX_TOKENS
+        )
+        return response.choices[0].message.content.strip()
+
+    async def get_summary(self, session_id: str) -> Optional[str]:
+        """Current summary text of a session, if any"""
+        if not settings.CONVERSATION_SUMMARY_ENABLED:
+            return None
+        row = await get_db_module().get_conversation_summary(session_id)
+        return row["summary"] if row else None
+
+    async def close(self):
+        """Let running updates finish (they need the database)"""
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    def get_stats(self) -> Dict:
+        """Update counters and latency"""
+        return {
+            "enabled": settings.CONVERSATION_SUMMARY_ENABLED,
+            "updates": self.updates,
+            "failed": self.failed,
+            "turns_summarized": self.turns_summarized,
+            "running": len(self._running),
+            "avg_update_ms": round(self.total_update_ms / self.updates, 1) if self.updates else 0.0
+        }
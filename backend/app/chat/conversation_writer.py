@@ -0,0 +1,126 @@
+"""
+Conversation Writer - Saves chat turns in the background
+Moves the save_conversation round-trips off the response's critical path; turns are
+written in order by one worker and flushed on shutdown
+"""
+
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import time
+import logging
+
+from app.db_selector import get_db_module
+
+logger = logging.getLogger(__name__)
+
+Turn = Tuple[int, str, str, str]  # user_id, session_id, role, content
+
+
+class ConversationWriter:
+    """
+    Single background worker draining a queue of conversation turns
+    A full queue makes submit() wait (backpressure) instead of dropping turns
+    """
+
+    def __init__(self, max_queue_size: int = 1000):
+        self.max_queue_size = max_queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Unwritten turns per session, so history reads can wait for them
+        self._pending: Dict[str, int] = {}
+        self._session_idle: Dict[str, asyncio.Event] = {}
+        self.written = 0
+        self.failed = 0
+        self.total_write_ms = 0.0
+        self.max_write_ms = 0.0
+
+    def _ensure_worker(self):
+        """Start the worker on the running loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # The queue is bound to its loop
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            # Same loop: keep the queue, turns already waiting are written by the new worker
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, user_id: int, session_id: str, turns: List[Tuple[str, str]]):
+        """Queue (role, content) turns of a session for saving"""
+        self._ensure_worker()
+        for role, content in turns:
+            self._pending[session_id] = self._pending.get(session_id, 0) + 1
+            self._session_idle.setdefault(session_id, asyncio.Event()).clear()
+            await self._queue.put((user_id, session_id, role, content))
+
+    async def wait_for_session(self, session_id: str):
+        """Wait until every queued turn of the session is written (read-your-writes for history)"""
+        event = self._session_idle.get(session_id)
+        if event is not None and self._pending.get(session_id):
+            await event.wait()
+
+    async def _run(self):
+        while True:
+            user_id, session_id, role, content = await self._queue.get()
+            started = time.perf_counter()
+            try:
+                await get_db_module().save_conversation(user_id, session_id, role, content)
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Failed to save conversation turn (session {session_id}): {str(e)}")
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.total_write_ms += elapsed_ms
+                self.max_write_ms = max(self.max_write_ms, elapsed_ms)
+                self._turn_done(session_id)
+                self._queue.task_done()
+
+    def _turn_done(self, session_id: str):
+        remaining = self._pending.get(session_id, 1) - 1
+        if remaining > 0:
+            self._pending[session_id] = remaining
+            return
+        self._pending.pop(session_id, None)
+        event = self._session_idle.pop(session_id, None)
+        if event is not None:
+            event.set()
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def flush(self):
+        """Wait until everything queued so far is written"""
+        if self._queue is not None:
+            self._ensure_worker()
+            await self._queue.join()
+
+    async def close(self):
+        """Flush pending turns and stop the worker"""
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        logger.info(f"Conversation writer flushed ({self.written} turns written, {self.failed} failed)")
+
+    def get_stats(self) -> Dict:
+        """Write counters and latency"""
+        attempts = self.written + self.failed
+        return {
+            "written": self.written,
+            "failed": self.failed,
+            "queue_depth": self.queue_depth(),
+            "pending_sessions": len(self._pending),
+            "avg_write_ms": round(self.total_write_ms / attempts, 3) if attempts else 0.0,
+            "max_write_ms": round(self.max_write_ms, 3)
+        }
+
+
+# Global conversation writer
+conversation_writer = ConversationWriter()
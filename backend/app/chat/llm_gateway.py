@@ -0,0 +1,193 @@
+"""
+LLM Gateway - Admission control for chat completions
+Caps concurrent completions globally and per user, queues a bounded number of callers
+for a bounded time, retries 429/5xx with jittered backoff and rejects fast when full
+"""
+
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional
+import asyncio
+import random
+import time
+import logging
+
+import openai
+from openai import AsyncOpenAI
+
+from app.config import settings
+from app.openai_client import get_openai_client
+
+logger = logging.getLogger(__name__)
+
+_RETRYABLE_ERRORS = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+
+class LLMOverloadedError(Exception):
+    """Raised when the LLM wait queue is full or a call waited too long for a slot"""
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Server-suggested delay (Retry-After header) if there is one"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    """
+    Admission control in front of chat completions
+    A call holds a per-user slot and a global slot while it runs (including retries, so
+    backoff also slows the caller down); at most max_queue_size calls wait for slots and
+    none waits longer than max_queue_wait_s - beyond that LLMOverloadedError (503)
+    """
+
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        max_concurrency: int,
+        max_concurrency_per_user: int,
+        max_queue_size: int,
+        max_queue_wait_s: float,
+        max_retries: int,
+        retry_base_delay: float,
+        retry_max_delay: float
+    ):
+        # Retries happen here, with slots held - not hidden inside the SDK
+        self.client = client.with_options(max_retries=0)
+        self.max_concurrency = max_concurrency
+        self.max_concurrency_per_user = max_concurrency_per_user
+        self.max_queue_size = max_queue_size
+        self.max_queue_wait_s = max_queue_wait_s
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._slots = asyncio.Semaphore(max_concurrency)
+        # user -> [semaphore, callers holding or waiting for it]
+        self._user_slots: Dict[Hashable, List] = {}
+        self.waiting = 0
+        self.running = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.retries = 0
+        self.failed = 0
+        self._wait_ms: deque = deque(maxlen=1000)
+
+    def overloaded(self) -> bool:
+        """True if a new call would be rejected right away"""
+        return self.waiting >= self.max_queue_size
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[Hashable] = None) -> AsyncIterator[None]:
+        """Hold a concurrency slot (and the user's, if given) for the duration of the block"""
+        if self.overloaded():
+            self.rejected += 1
+            raise LLMOverloadedError(f"LLM queue full ({self.waiting} calls waiting) - try again shortly")
+
+        user_slot = None
+        if user_id is not None:
+            user_slot = self._user_slots.setdefault(
+                user_id, [asyncio.Semaphore(self.max_concurrency_per_user), 0]
+            )
+            user_slot[1] += 1
+
+        acquired = []
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            try:
+                async with asyncio.timeout(self.max_queue_wait_s):
+                    for semaphore in ([user_slot[0]] if user_slot else []) + [self._slots]:
+                        await semaphore.acquire()
+                        acquired.append(semaphore)
+            except TimeoutError:
+                self.timed_out += 1
+                raise LLMOverloadedError(
+                    f"No LLM capacity within {self.max_queue_wait_s:.0f}s - try again shortly"
+                ) from None
+            finally:
+                self.waiting -= 1
+                self._wait_ms.append((time.perf_counter() - started) * 1000)
+
+            self.admitted += 1
+            self.running += 1
+            try:
+                yield
+            finally:
+                self.running -= 1
+        finally:
+            for semaphore in reversed(acquired):
+                semaphore.release()
+            if user_slot is not None:
+                user_slot[1] -= 1
+                if not user_slot[1]:
+                    self._user_slots.pop(user_id, None)
+
+    async def _create(self, **kwargs) -> Any:
+        """chat.completions.create with retries on connection errors, 429 and 5xx"""
+        attempt = 0
+        while True:
+            try:
+                return await self.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                if not isinstance(e, _RETRYABLE_ERRORS) or attempt >= self.max_retries:
+                    self.failed += 1
+                    raise
+                delay = _retry_after(e) or self.retry_base_delay * 2 ** attempt
+                delay = min(self.retry_max_delay, delay) * random.uniform(0.8, 1.2)
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"LLM call failed ({type(e).__name__}: {str(e)}), "
+                               f"retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def chat(self, user_id: Optional[Hashable] = None, **kwargs) -> Any:
+        """Chat completion (non-streaming) through the gateway"""
+        async with self.slot(user_id):
+            return await self._create(**kwargs)
+
+    @asynccontextmanager
+    async def stream(self, user_id: Optional[Hashable] = None, **kwargs) -> AsyncIterator[Any]:
+        """Streaming chat completion; the slot is held until the stream is consumed or abandoned"""
+        async with self.slot(user_id):
+            stream = await self._create(stream=True, **kwargs)
+            try:
+                yield stream
+            finally:
+                await stream.response.aclose()
+
+    def get_stats(self) -> Dict:
+        """Queue depth, admissions and wait times"""
+        waits = sorted(self._wait_ms)
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_concurrency_per_user": self.max_concurrency_per_user,
+            "running": self.running,
+            "queue_depth": self.waiting,
+            "max_queue_size": self.max_queue_size,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "retries": self.retries,
+            "failed": self.failed,
+            "avg_wait_ms": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "p95_wait_ms": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0,
+            "max_wait_ms": round(waits[-1], 3) if waits else 0.0
+        }
+
+
+# Global LLM gateway
+llm_gateway = LLMGateway(
+    get_openai_client(),
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    max_concurrency_per_user=settings.LLM_MAX_CONCURRENCY_PER_USER,
+    max_queue_size=settings.LLM_QUEUE_SIZE,
+    max_queue_wait_s=settings.LLM_QUEUE_TIMEOUT_S,
+    max_retries=settings.LLM_MAX_RETRIES,
+    retry_base_delay=settings.LLM_RETRY_BASE_DELAY,
+    retry_max_delay=settings.LLM_RETRY_MAX_DELAY
+)
@@ -0,0 +1,145 @@
+"""
+Markdown Segments - Split content for parallel translation
+Splits markdown at heading and paragraph boundaries into segments of bounded size; fenced
+code blocks are kept verbatim, and inline code, URLs and technical terms are swapped for
+placeholders so they never reach the model
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import re
+
+from app.chat.token_budget import count_tokens
+
+PLACEHOLDER = "⟦{}⟧"
+_FENCE_RE = re.compile(r"^\s*(```+|~~~+)")
+_HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s")
+_PROTECTED_RE = re.compile(r"`[^`\n]+`|\]\([^)\s]*\)|https?://[^\s)>\]]+")
+_LETTER_RE = re.compile(r"[^\W\d_]")
+
+
+@dataclass
+class Segment:
+    """Consecutive lines of the content, translated or passed through as they are"""
+    text: str
+    translate: bool
+
+
+def _blocks(content: str) -> List[Tuple[str, List[str]]]:
+    """(kind, lines) runs: "code" (fenced), "blank", "heading" or "text" (one paragraph)"""
+    blocks: List[Tuple[str, List[str]]] = []
+    fence: Optional[str] = None
+    for line in content.split("\n"):
+        if fence is not None:
+            blocks[-1][1].append(line)
+            if line.strip().startswith(fence):
+                fence = None
+            continue
+        match = _FENCE_RE.match(line)
+        if match:
+            fence = match.group(1)
+            blocks.append(("code", [line]))
+        elif not line.strip():
+            if blocks and blocks[-1][0] == "blank":
+                blocks[-1][1].append(line)
+            else:
+                blocks.append(("blank", [line]))
+        elif _HEADING_RE.match(line):
+            blocks.append(("heading", [line]))
+        elif blocks and blocks[-1][0] == "text":
+            blocks[-1][1].append(line)
+        else:
+            blocks.append(("text", [line]))
+    return blocks
+
+
+def split_markdown(content: str, max_tokens: int) -> List[Segment]:
+    """
+    Segments whose texts joined with "\\n" give back the content
+    Paragraphs are grouped up to max_tokens, cutting at a heading once a segment is half
+    full (a paragraph longer than max_tokens is split at line breaks)
+    """
+    segments: List[Segment] = []
+    lines: List[str] = []
+    trailing_blank: List[str] = []
+    tokens = 0
+
+    def flush():
+        nonlocal lines, tokens
+        if lines:
+            segments.append(Segment("\n".join(lines), translate=True))
+        lines, tokens = [], 0
+
+    def passthrough(block_lines: List[str]):
+        flush()
+        segments.append(Segment("\n".join(block_lines), translate=False))
+
+    for kind, block_lines in _blocks(content):
+        if kind == "blank":
+            trailing_blank = block_lines
+            continue
+        if kind == "code":
+            blank, trailing_blank = trailing_blank, []
+            if blank:
+                passthrough(blank)
+            passthrough(block_lines)
+            continue
+
+        block_tokens = count_tokens("\n".join(block_lines))
+        # Headings are the preferred cut once a segment is half full
+        starts_section = kind == "heading" and tokens >= max_tokens // 2
+        if starts_section or not lines or tokens + block_tokens > max_tokens:
+            blank, trailing_blank = trailing_blank, []
+            flush()
+            if blank:
+                passthrough(blank)
+        elif trailing_blank:
+            # Paragraph break inside a segment - the model keeps it
+            lines.extend(trailing_blank)
+            trailing_blank = []
+
+        if block_tokens <= max_tokens:
+            lines.extend(block_lines)
+            tokens += block_tokens
+            continue
+        for line in block_lines:
+            line_tokens = count_tokens(line)
+            if lines and tokens + line_tokens > max_tokens:
+                flush()
+            lines.append(line)
+            tokens += line_tokens
+
+    blank = trailing_blank
+    flush()
+    if blank:
+        segments.append(Segment("\n".join(blank), translate=False))
+    return segments
+
+
+def protect(text: str, terms: List[str]) -> Tuple[str, Dict[str, str]]:
+    """Replace inline code, link targets, URLs and terms with placeholders"""
+    patterns = [_PROTECTED_RE.pattern]
+    if terms:
+        patterns.append(r"\b(?:" + "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)) + r")\b")
+    placeholders: Dict[str, str] = {}
+
+    def replace(match: re.Match) -> str:
+        placeholder = PLACEHOLDER.format(len(placeholders))
+        placeholders[placeholder] = match.group()
+        return placeholder
+
+    return re.sub("|".join(patterns), replace, text), placeholders
+
+
+def restore(text: str, placeholders: Dict[str, str]) -> Optional[str]:
+    """Put protected spans back - None if the model dropped any placeholder"""
+    for placeholder, original in placeholders.items():
+        if placeholder not in text:
+            return None
+        text = text.replace(placeholder, original)
+    return text
+
+
+def needs_translation(protected_text: str) -> bool:
+    """Whether anything but placeholders, numbers and punctuation is left"""
+    return bool(_LETTER_RE.search(re.sub(r"⟦\d+⟧", "", protected_text)))
@@ -0,0 +1,107 @@
+"""
+Request Planner - The minimal stage graph for a chat request and its action
+explain_code skips retrieval and generation (the answer would be discarded) and only runs
+the code explainer; personalize and translate are fused into the RAG prompt instead of a
+second LLM call over the answer (so the subagents' content caches and segmented translation
+only serve /chat/personalize and /chat/translate)
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import logging
+
+from app.chat.rag_engine import rag_engine
+from app.chat.stages import StageTimings
+from app.chat.subagents import code_explainer, profile_bucket
+
+logger = logging.getLogger(__name__)
+
+RAG_STAGES = ["retrieval", "context", "budget", "cache_lookup", "llm", "persist"]
+EXPLAIN_STAGES = ["code_explain", "persist"]
+
+LEVEL_GUIDANCE = {
+    "beginner": "add foundational explanations and analogies",
+    "intermediate": "add practical examples and best practices",
+    "advanced": "add deeper technical details and optimization tips"
+}
+
+
+@dataclass
+class RequestPlan:
+    """Stages a request will run, plus what its action adds to the prompt"""
+    action: Optional[str]  # Effective action (None if the requested one doesn't apply)
+    stages: List[str]
+    skipped: List[str] = field(default_factory=list)
+    instructions: Optional[str] = None  # Appended to the RAG system prompt
+    max_tokens: int = 1000
+
+    def as_dict(self) -> Dict:
+        return {"action": self.action, "stages": self.stages, "skipped": self.skipped, "fused": bool(self.instructions)}
+
+
+def _personalize_instructions(user_profile: Dict) -> str:
+    software, hardware = profile_bucket(user_profile)
+    return (
+        "Personalization: tailor the answer to the student's experience level - "
+        f"for software ({software}) {LEVEL_GUIDANCE[software]}; "
+        f"for hardware ({hardware}) {LEVEL_GUIDANCE[hardware]}."
+    )
+
+
+def _translate_instructions(language: str) -> str:
+    return (
+        f"Language: write the entire answer in {language}. Keep technical terms in English "
+        "(e.g., ROS 2, NVIDIA Isaac, Gazebo), keep code snippets unchanged and preserve markdown formatting."
+    )
+
+
+def plan_request(action: Optional[str], selected_text: Optional[str], user_profile: Dict) -> RequestPlan:
+    """Minimal plan for the action - unknown or inapplicable actions get a plain RAG answer"""
+    if action == "explain_code" and selected_text:
+        return RequestPlan(action=action, stages=list(EXPLAIN_STAGES), skipped=RAG_STAGES[:-1])
+    if action == "personalize" and user_profile.get("software_background"):
+        return RequestPlan(
+            action=action, stages=list(RAG_STAGES), instructions=_personalize_instructions(user_profile)
+        )
+    if action == "translate":
+        # Urdu output takes more tokens than the English answer (same cap as TranslationAgent)
+        return RequestPlan(
+            action=action, stages=list(RAG_STAGES), instructions=_translate_instructions("Urdu"), max_tokens=1500
+        )
+    return RequestPlan(action=None, stages=list(RAG_STAGES))
+
+
+async def run_plan(
+    plan: RequestPlan,
+    user_id: int,
+    session_id: str,
+    query: str,
+    selected_text: Optional[str],
+    user_profile: Dict,
+    timings: StageTimings
+) -> Dict:
+    """Execute the plan - same result shape as rag_engine.generate_response"""
+    if plan.action == "explain_code":
+        with timings.stage("code_explain"):
+            explanation, tokens_used, cached = await code_explainer.explain_with_usage(
+                selected_text, context=query, user_id=user_id
+            )
+        with timings.stage("persist"):
+            await rag_engine.save_turns(user_id, session_id, query, explanation)
+        return {"response": explanation, "sources": [], "tokens_used": tokens_used, "cached": cached}
+
+    result = await rag_engine.generate_response(
+        user_id=user_id,
+        session_id=session_id,
+        query=query,
+        selected_text=selected_text,
+        user_profile=user_profile,
+        action=plan.action,
+        timings=timings,
+        instructions=plan.instructions,
+        max_tokens=plan.max_tokens
+    )
+    if plan.instructions and result.get("finish_reason") == "length":
+        # Fused answers share one max_tokens budget (no segmenting, unlike TranslationAgent)
+        logger.warning(f"{plan.action} answer truncated at max_tokens={plan.max_tokens}")
+    return result
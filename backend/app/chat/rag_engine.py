@@ -3,39 +3,68 @@ RAG Engine - Hybrid Embeddings (Local/OpenAI) with MCP Context7
 Multi-context retrieval-augmented generation
 """
 
-from openai import AsyncOpenAI
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union, Tuple, AsyncIterator
+import asyncio
+import time
 import logging
 
 from app.config import settings
-from app.database.qdrant import search_similar
-from app.database.postgres import get_conversation_history, save_conversation
+from app.db_selector import get_db_module, get_vector_store_module
+from app.database import lexical_index
+from app.embeddings.service import EmbeddingService
+from app.chat.semantic_cache import semantic_cache, response_scope, CachedResponse
+from app.chat.conversation_writer import conversation_writer
+from app.chat.conversation_summary import ConversationSummarizer
+from app.chat.stages import StageTimings
+from app.chat.llm_gateway import llm_gateway
+from app.openai_client import get_openai_client
+from app.chat.single_flight import SingleFlight, normalize_query
+from app.chat.token_budget import PromptBudget, assemble_prompt
 
 logger = logging.getLogger(__name__)
 
-# OpenAI client
-openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-
-# Local embedding model (lazy load)
-_local_embedding_model = None
-
-def get_local_embedding_model():
-    """Lazy load local embedding model"""
-    global _local_embedding_model
-    if _local_embedding_model is None:
-        from sentence_transformers import SentenceTransformer
-        logger.info(f"Loading local embedding model: {settings.LOCAL_EMBEDDING_MODEL}")
-        _local_embedding_model = SentenceTransformer(settings.LOCAL_EMBEDDING_MODEL)
-    return _local_embedding_model
 
 class MCPContext7Manager:
     """
     MCP Context7 - Multi-Context Protocol for 7-turn conversation memory
-    Maintains context across multiple turns and contexts (selected text, history, user profile)
+    Maintains context across multiple turns and contexts (selected text, history, user profile);
+    turns older than the last 7 live on as a rolling summary
     """
 
     def __init__(self):
         self.max_history = 7
+        # Older turns are kept as a rolling summary instead of being dropped
+        self.summarizer = ConversationSummarizer(llm_gateway, keep_turns=self.max_history)
+
+    async def load_history(self, session_id: str) -> Tuple[List[Dict], Optional[str]]:
+        """Last turns of the session (including turns still being saved) and the summary of older ones"""
+        await conversation_writer.wait_for_session(session_id)
+        return await asyncio.gather(
+            get_db_module().get_conversation_history(session_id, limit=self.max_history),
+            self.summarizer.get_summary(session_id)
+        )
+
+    def assemble(
+        self,
+        current_query: str,
+        history: List[Dict],
+        retrieved_docs: Optional[List[Dict]] = None,
+        selected_text: Optional[str] = None,
+        user_profile: Optional[Dict] = None,
+        summary: Optional[str] = None,
+        instructions: Optional[str] = None
+    ) -> Tuple[List[Dict[str, str]], PromptBudget]:
+        """Build the messages within PROMPT_TOKEN_BUDGET - (messages, token breakdown)"""
+        return assemble_prompt(
+            system_prompt=self._build_system_prompt(user_profile, selected_text, instructions),
+            query=current_query,
+            selected_text=selected_text,
+            retrieved_docs=retrieved_docs or [],
+            history=history,
+            budget=settings.PROMPT_TOKEN_BUDGET,
+            min_chunk_tokens=settings.PROMPT_MIN_CHUNK_TOKENS,
+            summary=summary
+        )
 
     async def build_context(
         self,
@@ -45,35 +74,18 @@ class MCPContext7Manager:
         user_profile: Optional[Dict] = None
     ) -> List[Dict[str, str]]:
         """Build multi-context conversation history"""
-
-        # Get conversation history (last 7 turns)
-        history = await get_conversation_history(session_id, limit=self.max_history)
-
-        # Build messages array
-        messages = []
-
-        # System message with user profile context
-        system_content = self._build_system_prompt(user_profile, selected_text)
-        messages.append({"role": "system", "content": system_content})
-
-        # Add conversation history
-        for turn in history:
-            messages.append({
-                "role": turn["role"],
-                "content": turn["content"]
-            })
-
-        # Add current query
-        if selected_text:
-            query_content = f"Selected Text: {selected_text}\n\nQuestion: {current_query}"
-        else:
-            query_content = current_query
-
-        messages.append({"role": "user", "content": query_content})
-
+        history, summary = await self.load_history(session_id)
+        messages, _ = self.assemble(
+            current_query, history, selected_text=selected_text, user_profile=user_profile, summary=summary
+        )
         return messages
 
-    def _build_system_prompt(self, user_profile: Optional[Dict], selected_text: Optional[str]) -> str:
+    def _build_system_prompt(
+        self,
+        user_profile: Optional[Dict],
+        selected_text: Optional[str],
+        instructions: Optional[str] = None
+    ) -> str:
         """Build system prompt with context"""
 
         base_prompt = """You are an expert AI tutor for Physical AI and Humanoid Robotics (Chapter 1).
@@ -97,6 +109,10 @@ Your role:
         if selected_text:
             base_prompt += "\n\nContext Mode: The student has selected specific text from the chapter. Focus your answer on explaining or expanding the selected content."
 
+        # Action-specific output instructions (personalization, translation) fused into this prompt
+        if instructions:
+            base_prompt += f"\n\n{instructions}"
+
         return base_prompt
 
 
@@ -105,24 +121,13 @@ class RAGEngine:
 
     def __init__(self):
         self.context_manager = MCPContext7Manager()
+        self.embedding_service = EmbeddingService(get_openai_client())
+        self.single_flight = SingleFlight()
 
     async def generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for text - Hybrid mode (local or OpenAI)"""
+        """Generate embedding for text - Hybrid mode (local or OpenAI), micro-batched"""
         try:
-            if settings.EMBEDDING_PROVIDER == "local":
-                # Use local sentence-transformers (FREE & FAST)
-                model = get_local_embedding_model()
-                embedding = model.encode(text, convert_to_tensor=False)
-                logger.info(f"Generated LOCAL embedding (dim: {len(embedding)})")
-                return embedding.tolist()
-            else:
-                # Use OpenAI embeddings (CLOUD & COSTS MONEY)
-                response = await openai_client.embeddings.create(
-                    model=settings.OPENAI_EMBEDDING_MODEL,
-                    input=text
-                )
-                logger.info(f"Generated OPENAI embedding (dim: {len(response.data[0].embedding)})")
-                return response.data[0].embedding
+            return await self.embedding_service.embed(text)
         except Exception as e:
             logger.error(f"Embedding generation failed: {str(e)}")
             raise
@@ -144,70 +149,278 @@ class RAGEngine:
                 "metadata": {"source": "user_selection"}
             }]
 
+        use_lexical = settings.HYBRID_SEARCH_ENABLED and lexical_index.lexical_index is not None
+
+        # Fast path: short keyword queries go straight to BM25, no embedding
+        # (raw BM25 is unbounded - rescaled to the same 0-1 range as the hybrid path)
+        if use_lexical and lexical_index.is_keyword_query(query):
+            results = lexical_index.search_lexical(query, limit=limit)
+            if results:
+                return lexical_index.max_scaled_scores(results)
+
         # Generate query embedding
         query_embedding = await self.generate_embedding(query)
 
-        # Search in Qdrant
-        results = search_similar(query_embedding, limit=limit)
+        # Search in Qdrant (or the local fallback index)
+        if not use_lexical:
+            return await get_vector_store_module().search_similar(query_embedding, limit=limit)
 
-        return results
+        # Hybrid: fuse vector and BM25 rankings over a wider candidate pool
+        vector_results = await get_vector_store_module().search_similar(query_embedding, limit=limit * 2)
+        lexical_results = lexical_index.search_lexical(query, limit=limit * 2)
+        return lexical_index.reciprocal_rank_fusion(
+            [vector_results, lexical_results], k=settings.RRF_K, limit=limit
+        )
 
-    async def generate_response(
+    async def retrieve_many(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        filters: Optional[Union[Dict, List[Optional[Dict]]]] = None
+    ) -> List[List[Dict]]:
+        """Retrieve for several queries - one embedding batch, one batched search"""
+        if not queries:
+            return []
+
+        # Concurrent embeds are coalesced into one encode call by the batcher
+        query_embeddings = await asyncio.gather(*[self.generate_embedding(q) for q in queries])
+
+        return await get_vector_store_module().search_similar_batch(
+            list(query_embeddings), limit=limit, filters=filters
+        )
+
+    async def prepare_messages(
         self,
-        user_id: int,
         session_id: str,
         query: str,
         selected_text: Optional[str] = None,
-        user_profile: Optional[Dict] = None
-    ) -> Dict:
-        """Generate RAG response"""
+        user_profile: Optional[Dict] = None,
+        timings: Optional[StageTimings] = None,
+        instructions: Optional[str] = None
+    ) -> Tuple[List[Dict], List[Dict[str, str]], PromptBudget]:
+        """Retrieve content and build the chat messages - (retrieved_docs, messages, token breakdown)"""
+        timings = timings or StageTimings()
+
+        async def retrieve():
+            with timings.stage("retrieval"):
+                if not settings.SINGLE_FLIGHT_ENABLED:
+                    return await self.retrieve_relevant_content(query, selected_text, limit=3)
+                # Retrieval doesn't depend on the session - identical queries in flight share it
+                docs, _ = await self.single_flight.do(
+                    "retrieval", (normalize_query(query), selected_text),
+                    lambda: self.retrieve_relevant_content(query, selected_text, limit=3)
+                )
+                return docs
 
-        try:
-            # Step 1: Retrieve relevant content
-            retrieved_docs = await self.retrieve_relevant_content(query, selected_text, limit=3)
+        async def context():
+            with timings.stage("context"):
+                return await self.context_manager.load_history(session_id)
 
-            # Step 2: Build context with MCP Context7
-            messages = await self.context_manager.build_context(
-                session_id, query, selected_text, user_profile
+        # Steps 1 + 2: retrieval (embedding + vector search) and history (DB) are independent
+        retrieved_docs, (history, summary) = await asyncio.gather(retrieve(), context())
+
+        # Step 3: Fit system prompt, query, selection, retrieved chunks and history into the token budget
+        with timings.stage("budget"):
+            messages, budget = self.context_manager.assemble(
+                query, history, retrieved_docs, selected_text, user_profile, summary, instructions
             )
+        if budget.chunks_dropped or budget.chunks_truncated or budget.history_turns_dropped:
+            logger.debug(f"Prompt over budget, trimmed: {budget.as_dict()}")
+
+        return retrieved_docs, messages, budget
+
+    @staticmethod
+    def is_shareable(budget: PromptBudget) -> bool:
+        """Only first questions of a session are shared - follow-ups depend on the conversation"""
+        return budget.history_available == 0
+
+    @classmethod
+    def is_cacheable(cls, budget: PromptBudget) -> bool:
+        return settings.SEMANTIC_CACHE_ENABLED and cls.is_shareable(budget)
 
-            # Step 3: Add retrieved content as context
-            if retrieved_docs:
-                context_content = "\n\n---\n\n".join([
-                    f"[{doc['section']}] (Relevance: {doc['score']:.2f})\n{doc['content']}"
-                    for doc in retrieved_docs
-                ])
-
-                # Insert before user query
-                messages.insert(-1, {
-                    "role": "system",
-                    "content": f"Retrieved Context:\n\n{context_content}"
-                })
-
-            # Step 4: Generate response with OpenAI
-            response = await openai_client.chat.completions.create(
+    async def find_cached_response(self, query: str, scope: str) -> Optional[CachedResponse]:
+        """Cached answer to a semantically equivalent question, if any"""
+        try:
+            return semantic_cache.lookup(await self.generate_embedding(query), scope)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {str(e)}")
+            return None
+
+    async def cache_response(self, query: str, scope: str, response: str, sources: List[Dict], tokens_used: int):
+        """Store an answer in the semantic cache"""
+        try:
+            semantic_cache.store(await self.generate_embedding(query), scope, query, response, sources, tokens_used)
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed: {str(e)}")
+
+    async def save_turns(self, user_id: int, session_id: str, query: str, answer: str):
+        """Queue the question and answer for saving - off the response's critical path"""
+        await conversation_writer.submit(user_id, session_id, [("user", query), ("assistant", answer)])
+        self.context_manager.summarizer.schedule(session_id)
+
+    async def _answer(
+        self,
+        user_id: int,
+        query: str,
+        messages: List[Dict[str, str]],
+        retrieved_docs: List[Dict],
+        scope: str,
+        cacheable: bool,
+        timings: StageTimings,
+        max_tokens: int = 1000
+    ) -> Dict:
+        """Semantic cache hit or LLM completion (cached for next time) for prepared messages"""
+        # Repeated question - answer from the semantic cache without calling the LLM
+        if cacheable:
+            with timings.stage("cache_lookup"):
+                cached = await self.find_cached_response(query, scope)
+            if cached:
+                return {
+                    "response": cached.response, "sources": cached.sources, "tokens_used": 0,
+                    "cached": True, "finish_reason": "stop"
+                }
+
+        # Generate response with OpenAI
+        with timings.stage("llm"):
+            response = await llm_gateway.chat(
+                user_id=user_id,
                 model=settings.OPENAI_MODEL,
                 messages=messages,
                 temperature=0.7,
-                max_tokens=1000
+                max_tokens=max_tokens
             )
 
-            assistant_message = response.choices[0].message.content
+        assistant_message = response.choices[0].message.content
+        if cacheable and response.choices[0].finish_reason == "stop":
+            with timings.stage("cache_store"):
+                await self.cache_response(query, scope, assistant_message, retrieved_docs, response.usage.total_tokens)
 
-            # Step 5: Save conversation to database
-            await save_conversation(user_id, session_id, "user", query)
-            await save_conversation(user_id, session_id, "assistant", assistant_message)
+        return {
+            "response": assistant_message,
+            "sources": retrieved_docs,
+            "tokens_used": response.usage.total_tokens,
+            "cached": False,
+            "finish_reason": response.choices[0].finish_reason
+        }
 
-            return {
-                "response": assistant_message,
-                "sources": retrieved_docs,
-                "tokens_used": response.usage.total_tokens
-            }
+    async def generate_response(
+        self,
+        user_id: int,
+        session_id: str,
+        query: str,
+        selected_text: Optional[str] = None,
+        user_profile: Optional[Dict] = None,
+        action: Optional[str] = None,
+        timings: Optional[StageTimings] = None,
+        instructions: Optional[str] = None,
+        max_tokens: int = 1000
+    ) -> Dict:
+        """Generate RAG response (instructions are appended to the system prompt)"""
+        timings = timings or StageTimings()
+
+        try:
+            retrieved_docs, messages, budget = await self.prepare_messages(
+                session_id, query, selected_text, user_profile, timings, instructions
+            )
+
+            # Step 3: Answer - identical first questions in flight share one cache lookup + LLM call
+            scope = response_scope(user_profile, selected_text, action)
+            shareable = self.is_shareable(budget)
+
+            async def answer():
+                return await self._answer(
+                    user_id, query, messages, retrieved_docs, scope, self.is_cacheable(budget), timings, max_tokens
+                )
+
+            if shareable and settings.SINGLE_FLIGHT_ENABLED:
+                started = time.perf_counter()
+                result, shared = await self.single_flight.do("answer", (scope, normalize_query(query)), answer)
+                if shared:
+                    timings.stages["coalesced"] = (time.perf_counter() - started) * 1000
+                    # Only the request that made the LLM call is charged for it
+                    result = {**result, "tokens_used": 0}
+            else:
+                result = await answer()
+
+            # Step 4: Save this request's conversation (background)
+            with timings.stage("persist"):
+                await self.save_turns(user_id, session_id, query, result["response"])
+
+            return {**result, "prompt_budget": budget.as_dict()}
 
         except Exception as e:
             logger.error(f"RAG generation failed: {str(e)}")
             raise
 
+    async def stream_response(
+        self,
+        user_id: int,
+        session_id: str,
+        query: str,
+        messages: List[Dict[str, str]],
+        sources: Optional[List[Dict]] = None,
+        cache_scope: Optional[str] = None,
+        timings: Optional[StageTimings] = None,
+        budget: Optional[PromptBudget] = None
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Stream the completion for prepared messages as ("token", {...}) events,
+        then ("done", {...}) with usage - the conversation is saved once the stream completes
+        (and the answer cached under cache_scope, if given)
+        """
+        timings = timings or StageTimings()
+        llm_started = time.perf_counter()
+        parts: List[str] = []
+        usage = None
+        finish_reason = None
+        try:
+            async with llm_gateway.stream(
+                user_id=user_id,
+                model=settings.OPENAI_MODEL,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=1000,
+                # Final chunk carries token usage (sent as a raw field for older SDK versions)
+                extra_body={"stream_options": {"include_usage": True}}
+            ) as stream:
+                async for chunk in stream:
+                    # Typed on newer SDKs, an extra (dict) field on older ones
+                    chunk_usage = getattr(chunk, "usage", None)
+                    if chunk_usage:
+                        usage = chunk_usage if isinstance(chunk_usage, dict) else chunk_usage.model_dump()
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    if choice.finish_reason:
+                        finish_reason = choice.finish_reason
+                    if choice.delta and choice.delta.content:
+                        if not parts:
+                            timings.stages["first_token"] = (time.perf_counter() - llm_started) * 1000
+                        parts.append(choice.delta.content)
+                        yield "token", {"content": choice.delta.content}
+        finally:
+            timings.stages["llm"] = (time.perf_counter() - llm_started) * 1000
+
+        assistant_message = "".join(parts)
+        with timings.stage("persist"):
+            await self.save_turns(user_id, session_id, query, assistant_message)
+            if cache_scope is not None and finish_reason == "stop":
+                tokens_used = (usage or {}).get("total_tokens") or len(parts)
+                await self.cache_response(query, cache_scope, assistant_message, sources or [], tokens_used)
+
+        yield "done", {
+            "session_id": session_id,
+            "finish_reason": finish_reason,
+            "prompt_tokens": usage.get("prompt_tokens") if usage else None,
+            # Without usage from the server, one streamed chunk is roughly one token
+            "completion_tokens": usage.get("completion_tokens") if usage else len(parts),
+            "tokens_used": usage.get("total_tokens") if usage else None,
+            "usage_estimated": usage is None,
+            "cached": False,
+            "prompt_budget": budget.as_dict() if budget else None,
+            "timings_ms": timings.as_dict()
+        }
+
 
 # Global RAG engine instance
 rag_engine = RAGEngine()
@@ -2,17 +2,25 @@
 Chat Routes - RAG Chatbot Endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Dict
+import asyncio
+import json
 import uuid
 import logging
 
 from app.auth.routes import verify_token
 from app.db_selector import get_db_module
 from app.chat.rag_engine import rag_engine
+from app.chat.semantic_cache import response_scope
+from app.chat.stages import StageTimings, stage_stats
 from app.chat.subagents import personalizer, code_explainer, translator
+from app.chat.planner import plan_request, run_plan
+from app.chat.llm_gateway import llm_gateway, LLMOverloadedError
+from app.embeddings.service import EmbeddingOverloadedError
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -33,6 +41,11 @@ class ChatResponse(BaseModel):
     session_id: str
     sources: list
     tokens_used: int
+    cached: bool = False
+    finish_reason: Optional[str] = None  # "length" - the answer hit the plan's max_tokens and is cut off
+    prompt_budget: Optional[Dict] = None  # Prompt token breakdown (system, query, retrieved, history, ...)
+    plan: Optional[Dict] = None  # Stages planned for the action (see app.chat.planner)
+    timings_ms: Optional[Dict] = None  # Stages that ran and their durations
 
 
 class ProfileUpdateRequest(BaseModel):
@@ -56,10 +69,11 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
 
 
 @router.post("/message", response_model=ChatResponse)
-async def chat_message(request: ChatRequest, user: dict = Depends(get_current_user)):
+async def chat_message(request: ChatRequest, response: Response, user: dict = Depends(get_current_user)):
     """
     Main chat endpoint - RAG-powered conversation
     """
+    timings = StageTimings()
     try:
         # Generate or use existing session ID
         session_id = request.session_id or str(uuid.uuid4())
@@ -70,41 +84,125 @@ async def chat_message(request: ChatRequest, user: dict = Depends(get_current_us
             "hardware_background": user.get("hardware_background")
         }
 
-        # Generate RAG response
-        result = await rag_engine.generate_response(
+        # Only the stages the action needs - personalize/translate are fused into the RAG prompt,
+        # explain_code skips retrieval and generation
+        plan = plan_request(request.action, request.selected_text, user_profile)
+        result = await run_plan(
+            plan,
             user_id=user["id"],
             session_id=session_id,
             query=request.message,
             selected_text=request.selected_text,
-            user_profile=user_profile
+            user_profile=user_profile,
+            timings=timings
         )
 
-        # Apply action if specified
-        if request.action == "personalize" and user_profile.get("software_background"):
-            result["response"] = await personalizer.personalize(
-                result["response"],
-                user_profile
-            )
-        elif request.action == "translate":
-            result["response"] = await translator.translate(result["response"], "Urdu")
-        elif request.action == "explain_code" and request.selected_text:
-            result["response"] = await code_explainer.explain(
-                request.selected_text,
-                context=request.message
-            )
+        stage_stats.record(timings)
+        response.headers["Server-Timing"] = timings.server_timing()
 
         return ChatResponse(
             response=result["response"],
             session_id=session_id,
             sources=result["sources"],
-            tokens_used=result["tokens_used"]
+            tokens_used=result["tokens_used"],
+            cached=result.get("cached", False),
+            finish_reason=result.get("finish_reason"),
+            prompt_budget=result.get("prompt_budget"),
+            plan=plan.as_dict(),
+            timings_ms=timings.as_dict()
         )
 
+    except (EmbeddingOverloadedError, LLMOverloadedError) as e:
+        logger.warning(f"Chat overloaded: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Chat error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _sse_event(event: str, data: Dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest, user: dict = Depends(get_current_user)):
+    """
+    Streaming chat endpoint - Server-Sent Events
+    Events: sources (retrieved documents), token (response text deltas), done (usage), error
+    """
+    if request.action:
+        raise HTTPException(status_code=400, detail="Actions are not supported when streaming - use /chat/message")
+
+    session_id = request.session_id or str(uuid.uuid4())
+    user_profile = {
+        "software_background": user.get("software_background"),
+        "hardware_background": user.get("hardware_background")
+    }
+
+    # Retrieval runs before the response starts, so its errors still map to status codes
+    timings = StageTimings()
+    try:
+        # The completion starts after the 200 - reject up front if the LLM queue is already full
+        if llm_gateway.overloaded():
+            raise LLMOverloadedError("LLM queue full - try again shortly")
+        retrieved_docs, messages, budget = await rag_engine.prepare_messages(
+            session_id, request.message, request.selected_text, user_profile, timings
+        )
+        scope = response_scope(user_profile, request.selected_text) if rag_engine.is_cacheable(budget) else None
+        cached = None
+        if scope:
+            with timings.stage("cache_lookup"):
+                cached = await rag_engine.find_cached_response(request.message, scope)
+    except (EmbeddingOverloadedError, LLMOverloadedError) as e:
+        logger.warning(f"Chat overloaded: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Chat stream error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def cached_events():
+        # Repeated question: the whole answer as a single token event, no LLM call
+        yield _sse_event("sources", {"session_id": session_id, "sources": cached.sources})
+        yield _sse_event("token", {"content": cached.response})
+        await rag_engine.save_turns(user["id"], session_id, request.message, cached.response)
+        stage_stats.record(timings)
+        yield _sse_event("done", {
+            "session_id": session_id,
+            "finish_reason": "stop",
+            "tokens_used": 0,
+            "cached": True,
+            "prompt_budget": budget.as_dict(),
+            "timings_ms": timings.as_dict()
+        })
+
+    async def events():
+        yield _sse_event("sources", {"session_id": session_id, "sources": retrieved_docs})
+        try:
+            async for event, data in rag_engine.stream_response(
+                user["id"], session_id, request.message, messages,
+                sources=retrieved_docs, cache_scope=scope, timings=timings, budget=budget
+            ):
+                if event == "done":
+                    stage_stats.record(timings)
+                yield _sse_event(event, data)
+        except asyncio.CancelledError:
+            logger.info(f"Chat stream cancelled by client (session {session_id})")
+            raise
+        except Exception as e:
+            logger.error(f"Chat stream error: {str(e)}")
+            yield _sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        cached_events() if cached else events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Don't let proxies buffer the stream
+        }
+    )
+
+
 @router.post("/personalize")
 async def personalize_content(request: ChatRequest, user: dict = Depends(get_current_user)):
     """
@@ -116,10 +214,13 @@ async def personalize_content(request: ChatRequest, user: dict = Depends(get_cur
             "hardware_background": user.get("hardware_background", "beginner")
         }
 
-        personalized = await personalizer.personalize(request.message, user_profile)
+        personalized = await personalizer.personalize(request.message, user_profile, user_id=user["id"])
 
         return {"personalized_content": personalized}
 
+    except LLMOverloadedError as e:
+        logger.warning(f"Personalization overloaded: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Personalization error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -131,9 +232,12 @@ async def translate_content(request: ChatRequest, user: dict = Depends(get_curre
     Translate content to Urdu
     """
     try:
-        translated = await translator.translate(request.message, "Urdu")
+        translated = await translator.translate(request.message, "Urdu", user_id=user["id"])
         return {"translated_content": translated}
 
+    except LLMOverloadedError as e:
+        logger.warning(f"Translation overloaded: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Translation error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -150,11 +254,17 @@ async def explain_code(request: ChatRequest, user: dict = Depends(get_current_us
 
         explanation = await code_explainer.explain(
             request.selected_text,
-            context=request.message
+            context=request.message,
+            user_id=user["id"]
         )
 
         return {"explanation": explanation}
 
+    except HTTPException:
+        raise
+    except LLMOverloadedError as e:
+        logger.warning(f"Code explanation overloaded: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Code explanation error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,196 @@
+"""
+Semantic Response Cache - Reuse answers to near-identical questions
+Lookups match the query embedding against cached questions (cosine >= threshold)
+within a scope of the inputs that change the answer; entries expire by TTL and LRU size
+"""
+
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+import hashlib
+import itertools
+import time
+import logging
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def response_scope(
+    user_profile: Optional[Dict] = None,
+    selected_text: Optional[str] = None,
+    action: Optional[str] = None
+) -> str:
+    """Cache scope - answers are only shared between requests with the same profile, selection and action"""
+    profile = user_profile or {}
+    # The selection is part of the prompt, so its content (not just its presence) scopes the answer
+    selection = hashlib.sha256(selected_text.encode("utf-8")).hexdigest()[:16] if selected_text else "-"
+    return "|".join([
+        str(profile.get("software_background") or "-"),
+        str(profile.get("hardware_background") or "-"),
+        selection,
+        action or "-"
+    ])
+
+
+@dataclass
+class CachedResponse:
+    """A stored answer"""
+    key: int
+    scope: str
+    question: str
+    vector: np.ndarray
+    response: str
+    sources: List[Dict[str, Any]]
+    tokens_used: int
+    created_at: float = field(default_factory=time.monotonic)
+    hits: int = 0
+
+
+class SemanticCache:
+    """
+    In-memory semantic cache, one normalized vector matrix per scope
+    Lookup is a single matrix-vector product over the scope's entries
+    """
+
+    def __init__(self, max_entries: int, ttl_s: float, threshold: float):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.threshold = threshold
+        self._entries: "OrderedDict[int, CachedResponse]" = OrderedDict()
+        self._scopes: Dict[str, List[int]] = {}
+        self._matrices: Dict[str, np.ndarray] = {}
+        self._ids = itertools.count()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.saved_tokens = 0
+        self._lookup_ms: deque = deque(maxlen=1000)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        return v / max(float(np.linalg.norm(v)), 1e-12)
+
+    def _remove(self, key: int):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._scopes[entry.scope]
+        keys.remove(key)
+        if not keys:
+            del self._scopes[entry.scope]
+        self._matrices.pop(entry.scope, None)
+
+    def _matrix(self, scope: str) -> np.ndarray:
+        """Stacked vectors of a scope, rebuilt only after the scope changed"""
+        matrix = self._matrices.get(scope)
+        if matrix is None:
+            matrix = np.stack([self._entries[key].vector for key in self._scopes[scope]])
+            self._matrices[scope] = matrix
+        return matrix
+
+    def lookup(self, query_embedding: List[float], scope: str) -> Optional[CachedResponse]:
+        """Best cached answer in scope with similarity >= threshold, or None"""
+        started = time.perf_counter()
+        try:
+            if scope not in self._scopes:
+                self.misses += 1
+                return None
+
+            scores = self._matrix(scope) @ self._normalize(query_embedding)
+            for i in np.argsort(-scores):
+                if scores[i] < self.threshold:
+                    break
+                entry = self._entries[self._scopes[scope][i]]
+                if time.monotonic() - entry.created_at > self.ttl_s:
+                    continue
+                entry.hits += 1
+                self._entries.move_to_end(entry.key)
+                self.hits += 1
+                self.saved_tokens += entry.tokens_used
+                return entry
+
+            self.misses += 1
+            return None
+        finally:
+            self._evict_expired(scope)
+            self._lookup_ms.append((time.perf_counter() - started) * 1000)
+
+    def _evict_expired(self, scope: str):
+        now = time.monotonic()
+        stale = [key for key in self._scopes.get(scope, []) if now - self._entries[key].created_at > self.ttl_s]
+        for key in stale:
+            self._remove(key)
+        self.expired += len(stale)
+
+    def store(
+        self,
+        query_embedding: List[float],
+        scope: str,
+        question: str,
+        response: str,
+        sources: List[Dict[str, Any]],
+        tokens_used: int
+    ):
+        """Cache an answer, evicting the least recently used entries beyond max_entries"""
+        if self.max_entries <= 0:
+            return
+        key = next(self._ids)
+        self._entries[key] = CachedResponse(
+            key=key,
+            scope=scope,
+            question=question,
+            vector=self._normalize(query_embedding),
+            response=response,
+            sources=sources,
+            tokens_used=tokens_used or 0
+        )
+        self._scopes.setdefault(scope, []).append(key)
+        self._matrices.pop(scope, None)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evicted += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._scopes.clear()
+        self._matrices.clear()
+
+    def get_stats(self) -> Dict:
+        """Hit rate, saved tokens and lookup latency"""
+        lookups = self.hits + self.misses
+        latencies = sorted(self._lookup_ms)
+        return {
+            "enabled": settings.SEMANTIC_CACHE_ENABLED,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "scopes": len(self._scopes),
+            "threshold": self.threshold,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_tokens": self.saved_tokens,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "avg_lookup_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p95_lookup_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 3) if latencies else 0.0,
+            "max_lookup_ms": round(latencies[-1], 3) if latencies else 0.0
+        }
+
+
+# Global semantic cache
+semantic_cache = SemanticCache(
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl_s=settings.SEMANTIC_CACHE_TTL_S,
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD
+)
@@ -0,0 +1,59 @@
+"""
+Single Flight - Coalesce identical in-flight work
+Concurrent callers with the same key share one running computation instead of each
+starting their own (e.g. a class asking the same question within the same second)
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+import asyncio
+import re
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+
+def normalize_query(query: str) -> str:
+    """Case, whitespace and trailing punctuation don't change a question"""
+    return _TRAILING_PUNCTUATION.sub("", " ".join(query.lower().split()))
+
+
+class SingleFlight:
+    """
+    Runs one computation per key at a time; callers arriving while it runs await its result
+    The computation runs in its own task, so a leader whose request is cancelled
+    (client disconnect) does not cancel it for the callers sharing it
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.calls: Dict[str, int] = {}
+        self.coalesced: Dict[str, int] = {}
+
+    async def do(self, kind: str, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Result of fn() for (kind, key) and whether it was shared with an earlier caller"""
+        call_key = (kind, key)
+        task = self._calls.get(call_key)
+        shared = task is not None
+        if shared:
+            self.coalesced[kind] = self.coalesced.get(kind, 0) + 1
+        else:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+            task = asyncio.ensure_future(fn())
+            self._calls[call_key] = task
+            task.add_done_callback(lambda done: self._forget(call_key, done))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, call_key: Tuple[str, Hashable], task: asyncio.Task):
+        if self._calls.get(call_key) is task:
+            del self._calls[call_key]
+        # Every caller may have gone away - don't leave "exception never retrieved" warnings
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict:
+        """Computations started and callers coalesced onto them, per kind"""
+        return {
+            "in_flight": len(self._calls),
+            "calls": dict(self.calls),
+            "coalesced": dict(self.coalesced),
+            "coalesced_total": sum(self.coalesced.values())
+        }
@@ -0,0 +1,73 @@
+"""
+Request Stages - Per-request stage timings and their running statistics
+Each chat request records how long every pipeline stage took (retrieval, context,
+cache lookup, llm, ...); the aggregate is exported on /metrics
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator
+import time
+
+
+class StageTimings:
+    """Stage durations of one request, in milliseconds"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block as stage `name`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        """Stage durations plus the request total"""
+        result = {name: round(ms, 2) for name, ms in self.stages.items()}
+        result["total"] = round(self.total_ms(), 2)
+        return result
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (shown in browser dev tools)"""
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in self.as_dict().items())
+
+
+class StageStats:
+    """Running per-stage latency statistics over the last `window` requests"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.requests = 0
+        self._samples: Dict[str, deque] = {}
+
+    def record(self, timings: StageTimings):
+        """Add one request's timings"""
+        self.requests += 1
+        for name, ms in timings.as_dict().items():
+            self._samples.setdefault(name, deque(maxlen=self.window)).append(ms)
+
+    def snapshot(self) -> Dict:
+        """Return statistics as a dict"""
+        stages = {}
+        for name, samples in self._samples.items():
+            ordered = sorted(samples)
+            stages[name] = {
+                "count": len(ordered),
+                "avg_ms": round(sum(ordered) / len(ordered), 2),
+                "p50_ms": round(ordered[int(0.5 * (len(ordered) - 1))], 2),
+                "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))], 2),
+                "max_ms": round(ordered[-1], 2)
+            }
+        return {"requests": self.requests, "stages": stages}
+
+
+# Global stage statistics
+stage_stats = StageStats()
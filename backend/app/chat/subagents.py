@@ -2,14 +2,44 @@
 Reusable Subagents - Personalization and Code Explanation
 """
 
-from openai import AsyncOpenAI
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+import asyncio
 import logging
 
 from app.config import settings
+from app.chat.llm_gateway import llm_gateway, LLMOverloadedError
+from app.chat.content_cache import ContentCache
+from app.chat.code_cache import CodeExplanationCache
+from app.chat.markdown_segments import Segment, split_markdown, protect, restore, needs_translation
 
 logger = logging.getLogger(__name__)
-openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+
+# Levels offered at signup - anything else (or nothing) is treated as beginner
+BACKGROUND_LEVELS = ("beginner", "intermediate", "advanced")
+
+
+def profile_bucket(user_profile: Dict) -> Tuple[str, str]:
+    """Normalized (software, hardware) background pair"""
+    def level(value: Optional[str]) -> str:
+        value = (value or "").strip().lower()
+        return value if value in BACKGROUND_LEVELS else "beginner"
+
+    return level(user_profile.get("software_background")), level(user_profile.get("hardware_background"))
+
+
+async def _cache_get(cache: ContentCache, content: str, variant: str, model: str) -> Optional[str]:
+    try:
+        return await cache.get(content, variant, model)
+    except Exception as e:
+        logger.warning(f"{cache.table} lookup failed: {str(e)}")
+        return None
+
+
+async def _cache_put(cache: ContentCache, content: str, variant: str, model: str, output: str, tokens_used: int):
+    try:
+        await cache.put(content, variant, model, output, tokens_used)
+    except Exception as e:
+        logger.warning(f"{cache.table} store failed: {str(e)}")
 
 
 class ITBackgroundPersonalizer:
@@ -18,11 +48,21 @@ class ITBackgroundPersonalizer:
     Personalizes responses based on user's software/hardware background
     """
 
-    async def personalize(self, content: str, user_profile: Dict) -> str:
-        """Personalize content based on user background"""
+    def __init__(self):
+        self.cache = ContentCache(
+            settings.PERSONALIZATION_CACHE_PATH, settings.PERSONALIZATION_CACHE_MAX_ENTRIES, "personalization_cache"
+        )
+
+    async def personalize(self, content: str, user_profile: Dict, user_id: Optional[int] = None) -> str:
+        """Personalize content based on user background (cached by content, profile bucket and model)"""
 
-        software_bg = user_profile.get("software_background", "beginner")
-        hardware_bg = user_profile.get("hardware_background", "beginner")
+        software_bg, hardware_bg = profile_bucket(user_profile)
+        bucket = f"{software_bg}/{hardware_bg}"
+        model = settings.OPENAI_MODEL
+        if settings.PERSONALIZATION_CACHE_ENABLED:
+            cached = await _cache_get(self.cache, content, bucket, model)
+            if cached is not None:
+                return cached
 
         prompt = f"""You are a personalization expert. Adapt the following content based on the user's background:
 
@@ -41,15 +81,24 @@ Task: Rewrite this content to match the user's experience level.
 Keep the same core information but adjust the depth and style."""
 
         try:
-            response = await openai_client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
+            response = await llm_gateway.chat(
+                user_id=user_id,
+                model=model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.7,
                 max_tokens=800
             )
 
-            return response.choices[0].message.content
+            personalized = response.choices[0].message.content
 
+            # Truncated rewrites are not worth keeping
+            if settings.PERSONALIZATION_CACHE_ENABLED and response.choices[0].finish_reason == "stop":
+                await _cache_put(self.cache, content, bucket, model, personalized, response.usage.total_tokens)
+
+            return personalized
+
+        except LLMOverloadedError:
+            raise  # Callers answer 503, not the unpersonalized content
         except Exception as e:
             logger.error(f"Personalization failed: {str(e)}")
             return content  # Return original if personalization fails
@@ -61,8 +110,26 @@ class CodeExplainer:
     Explains code snippets and robotics logic
     """
 
-    async def explain(self, code: str, context: Optional[str] = None) -> str:
+    def __init__(self):
+        self.cache = CodeExplanationCache(settings.CODE_EXPLAIN_CACHE_MAX_ENTRIES, settings.CODE_EXPLAIN_CACHE_TTL_S)
+
+    async def explain(self, code: str, context: Optional[str] = None, user_id: Optional[int] = None) -> str:
         """Explain code snippet"""
+        explanation, _, _ = await self.explain_with_usage(code, context, user_id)
+        return explanation
+
+    async def explain_with_usage(
+        self,
+        code: str,
+        context: Optional[str] = None,
+        user_id: Optional[int] = None
+    ) -> Tuple[str, int, bool]:
+        """(explanation, tokens used, cached) - cached by normalized code, context and model"""
+        model = settings.OPENAI_MODEL
+        if settings.CODE_EXPLAIN_CACHE_ENABLED:
+            cached = self.cache.lookup(code, context, model)
+            if cached is not None:
+                return cached, 0, True
 
         prompt = f"""You are a robotics code expert. Explain this code clearly and concisely.
 
@@ -82,18 +149,25 @@ Provide:
 Keep explanations clear and practical."""
 
         try:
-            response = await openai_client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
+            response = await llm_gateway.chat(
+                user_id=user_id,
+                model=model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.6,
                 max_tokens=1000
             )
+            explanation = response.choices[0].message.content
 
-            return response.choices[0].message.content
+            if settings.CODE_EXPLAIN_CACHE_ENABLED and response.choices[0].finish_reason == "stop":
+                self.cache.store(code, context, model, explanation, response.usage.total_tokens)
 
+            return explanation, response.usage.total_tokens, False
+
+        except LLMOverloadedError:
+            raise  # Callers answer 503, not a placeholder explanation
         except Exception as e:
             logger.error(f"Code explanation failed: {str(e)}")
-            return "Unable to explain code at this time."
+            return "Unable to explain code at this time.", 0, False
 
 
 class TranslationAgent:
@@ -102,33 +176,99 @@ class TranslationAgent:
     Translates content to Urdu or other languages
     """
 
-    async def translate(self, content: str, target_language: str = "Urdu") -> str:
-        """Translate content to target language"""
+    def __init__(self):
+        self.cache = ContentCache(
+            settings.TRANSLATION_CACHE_PATH, settings.TRANSLATION_CACHE_MAX_ENTRIES, "translation_cache"
+        )
+
+    async def translate(self, content: str, target_language: str = "Urdu", user_id: Optional[int] = None) -> str:
+        """
+        Translate content to target language (cached by content, language and model)
+        Long content is split at heading/paragraph boundaries and its segments are
+        translated concurrently, so latency follows the slowest segment, not the sum
+        """
+        model = settings.OPENAI_MODEL
+        if settings.TRANSLATION_CACHE_ENABLED:
+            cached = await _cache_get(self.cache, content, target_language, model)
+            if cached is not None:
+                return cached
+
+        segments = split_markdown(content, settings.TRANSLATION_SEGMENT_TOKENS)
+        translatable = [segment for segment in segments if segment.translate]
+        # A single paragraph has the same cache key as the content - already looked up
+        segmented = not (len(translatable) == 1 and translatable[0].text.strip() == content.strip())
+        semaphore = asyncio.Semaphore(settings.TRANSLATION_SEGMENT_CONCURRENCY)
+        results = await asyncio.gather(*[
+            self._translate_segment(segment, target_language, model, semaphore, check_cache=segmented, user_id=user_id)
+            for segment in segments
+        ])
+        translated = "\n".join(text for text, _, _ in results)
+
+        # Segments are cached on their own; the whole content only once every segment came through complete
+        if settings.TRANSLATION_CACHE_ENABLED and segmented and all(complete for _, complete, _ in results):
+            await _cache_put(
+                self.cache, content, target_language, model, translated, sum(tokens for _, _, tokens in results)
+            )
+        return translated
+
+    async def _translate_segment(
+        self,
+        segment: Segment,
+        target_language: str,
+        model: str,
+        semaphore: asyncio.Semaphore,
+        check_cache: bool,
+        user_id: Optional[int] = None
+    ) -> Tuple[str, bool, int]:
+        """(text, complete, tokens used) - the original text if translation fails"""
+        if not segment.translate:
+            return segment.text, True, 0
+        protected, placeholders = protect(segment.text, settings.TRANSLATION_KEEP_TERMS)
+        if not needs_translation(protected):
+            return segment.text, True, 0
+        if settings.TRANSLATION_CACHE_ENABLED and check_cache:
+            cached = await _cache_get(self.cache, segment.text, target_language, model)
+            if cached is not None:
+                return cached, True, 0
 
         prompt = f"""Translate the following technical content to {target_language}.
 
 Important:
 - Maintain technical terms in English (e.g., ROS 2, NVIDIA Isaac, Gazebo)
-- Keep code snippets unchanged
+- Keep placeholders such as ⟦0⟧ exactly as they are
 - Preserve markdown formatting
 - Ensure technical accuracy
+- Reply with the translation only
 
 Content:
-{content}"""
+{protected}"""
 
         try:
-            response = await openai_client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=1500
-            )
-
-            return response.choices[0].message.content
-
+            async with semaphore:
+                response = await llm_gateway.chat(
+                    user_id=user_id,
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.3,
+                    max_tokens=1500
+                )
+        except LLMOverloadedError:
+            raise  # Callers answer 503, not the untranslated content
         except Exception as e:
             logger.error(f"Translation failed: {str(e)}")
-            return content  # Return original if translation fails
+            return segment.text, False, 0  # Return original if translation fails
+
+        tokens_used = response.usage.total_tokens
+        translated = restore(response.choices[0].message.content.strip(), placeholders)
+        if translated is None:
+            logger.warning("Translation dropped protected spans - keeping the original segment")
+            return segment.text, False, tokens_used
+
+        # Truncated translations are not worth keeping
+        complete = response.choices[0].finish_reason == "stop"
+        if settings.TRANSLATION_CACHE_ENABLED and complete:
+            await _cache_put(self.cache, segment.text, target_language, model, translated, tokens_used)
+        return translated, complete, tokens_used
 
 
 # Global subagent instances
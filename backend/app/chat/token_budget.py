@@ -0,0 +1,246 @@
+"""
+Token Budget - Prompt assembly within a fixed token budget
+Counts tokens with the chat model's tokenizer (tiktoken) and fills the budget in priority
+order: system prompt, query, selected text, retrieved chunks, conversation summary, recent history
+"""
+
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Chat format overhead per message and for the reply primer (OpenAI cookbook)
+TOKENS_PER_MESSAGE = 3
+REPLY_PRIMER_TOKENS = 3
+TRUNCATION_MARKER = " […]"
+
+_encoder = None
+_tokenizer_name: Optional[str] = None
+
+
+def get_encoder():
+    """tiktoken encoding for OPENAI_MODEL (None if tiktoken or its encoding files are unavailable)"""
+    global _encoder, _tokenizer_name
+    if _tokenizer_name is not None:
+        return _encoder
+    try:
+        import tiktoken
+        try:
+            _encoder = tiktoken.encoding_for_model(settings.OPENAI_MODEL)
+        except KeyError:
+            _encoder = tiktoken.get_encoding("o200k_base")
+        _tokenizer_name = _encoder.name
+    except Exception as e:
+        # No network for the encoding download and no TIKTOKEN_CACHE_DIR - estimate instead
+        logger.warning(f"tiktoken unavailable ({str(e)}), estimating tokens as characters / 4")
+        _encoder = None
+        _tokenizer_name = "estimate"
+    return _encoder
+
+
+def tokenizer_name() -> str:
+    get_encoder()
+    return _tokenizer_name
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in text"""
+    if not text:
+        return 0
+    encoder = get_encoder()
+    if encoder is None:
+        return (len(text) + 3) // 4
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the first max_tokens tokens of text (marker included)"""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    keep = max(0, max_tokens - count_tokens(TRUNCATION_MARKER))
+    encoder = get_encoder()
+    if encoder is None:
+        head = text[:keep * 4]
+    else:
+        head = encoder.decode(encoder.encode(text, disallowed_special=())[:keep])
+    return head.rstrip() + TRUNCATION_MARKER
+
+
+def message_tokens(content: str) -> int:
+    """Tokens a chat message with this content costs"""
+    return TOKENS_PER_MESSAGE + count_tokens(content)
+
+
+@dataclass
+class PromptBudget:
+    """Token accounting of one assembled prompt"""
+    budget: int
+    tokenizer: str
+    system: int = 0
+    query: int = 0
+    selected_text: int = 0
+    retrieved: int = 0
+    summary: int = 0
+    history: int = 0
+    chunks_used: int = 0
+    chunks_truncated: int = 0
+    chunks_dropped: int = 0
+    history_turns_used: int = 0
+    history_turns_dropped: int = 0
+    history_available: int = 0
+    query_truncated: bool = False
+    selected_text_truncated: bool = False
+    summary_truncated: bool = False
+
+    @property
+    def total(self) -> int:
+        return self.system + self.query + self.selected_text + self.retrieved + self.summary + self.history + REPLY_PRIMER_TOKENS
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Token breakdown for responses and logs"""
+        return {
+            "budget": self.budget,
+            "total": self.total,
+            "tokenizer": self.tokenizer,
+            "system": self.system,
+            "query": self.query,
+            "selected_text": self.selected_text,
+            "retrieved": self.retrieved,
+            "summary": self.summary,
+            "history": self.history,
+            "chunks_used": self.chunks_used,
+            "chunks_truncated": self.chunks_truncated,
+            "chunks_dropped": self.chunks_dropped,
+            "history_turns_used": self.history_turns_used,
+            "history_turns_dropped": self.history_turns_dropped,
+            "query_truncated": self.query_truncated,
+            "selected_text_truncated": self.selected_text_truncated,
+            "summary_truncated": self.summary_truncated
+        }
+
+
+def format_chunk(doc: Dict) -> str:
+    return f"[{doc['section']}] (Relevance: {doc['score']:.2f})\n{doc['content']}"
+
+
+CHUNK_SEPARATOR = "\n\n---\n\n"
+RETRIEVED_HEADER = "Retrieved Context:\n\n"
+SUMMARY_HEADER = "Summary of the earlier conversation:\n"
+
+
+def assemble_prompt(
+    system_prompt: str,
+    query: str,
+    selected_text: Optional[str],
+    retrieved_docs: List[Dict],
+    history: List[Dict],
+    budget: int,
+    min_chunk_tokens: int,
+    summary: Optional[str] = None
+) -> Tuple[List[Dict[str, str]], PromptBudget]:
+    """
+    Build the chat messages within budget tokens
+    Fill order: system prompt (always whole), query, selected text, retrieved chunks
+    (best first; the first chunk that does not fit is truncated if at least
+    min_chunk_tokens remain, the rest are dropped), the summary of older turns (truncated
+    to fit), then history (newest first, stopping at the first turn that does not fit).
+    Same inputs always give the same prompt.
+    """
+    usage = PromptBudget(budget=budget, tokenizer=tokenizer_name(), history_available=len(history))
+    remaining = budget - REPLY_PRIMER_TOKENS
+
+    # 1. System prompt
+    usage.system = message_tokens(system_prompt)
+    remaining -= usage.system
+
+    # 2. Query (and the user message it lives in)
+    query_prefix = "\n\nQuestion: " if selected_text else ""
+    query_tokens = message_tokens(query_prefix + query)
+    if query_tokens > remaining:
+        query = truncate_to_tokens(query, max(min_chunk_tokens, remaining - message_tokens(query_prefix)))
+        usage.query_truncated = True
+        query_tokens = message_tokens(query_prefix + query)
+    usage.query = query_tokens
+    remaining -= usage.query
+
+    # 3. Selected text
+    selection_content = ""
+    if selected_text:
+        selection_prefix = "Selected Text: "
+        selection_tokens = count_tokens(selection_prefix + selected_text)
+        if selection_tokens > remaining:
+            selected_text = truncate_to_tokens(selected_text, remaining - count_tokens(selection_prefix))
+            usage.selected_text_truncated = True
+        if selected_text:
+            selection_content = selection_prefix + selected_text
+            usage.selected_text = count_tokens(selection_content)
+            remaining -= usage.selected_text
+
+    if selection_content:
+        query_content = f"{selection_content}{query_prefix}{query}"
+    else:
+        query_content = query
+
+    # 4. Retrieved chunks, best first (the user's selection is already in the query message)
+    chunks: List[str] = []
+    docs = [doc for doc in retrieved_docs if doc.get("metadata", {}).get("source") != "user_selection"]
+    overhead = message_tokens(RETRIEVED_HEADER)
+    for doc in docs:
+        text = format_chunk(doc)
+        cost = count_tokens(text) + (count_tokens(CHUNK_SEPARATOR) if chunks else 0)
+        available = remaining - (0 if chunks else overhead)
+        if cost <= available:
+            chunks.append(text)
+            remaining -= cost + (0 if len(chunks) > 1 else overhead)
+            continue
+        room = available - (count_tokens(CHUNK_SEPARATOR) if chunks else 0)
+        if room >= min_chunk_tokens:
+            text = truncate_to_tokens(text, room)
+            remaining -= count_tokens(text) + (count_tokens(CHUNK_SEPARATOR) if chunks else overhead)
+            chunks.append(text)
+            usage.chunks_truncated += 1
+        break
+    usage.chunks_used = len(chunks)
+    usage.chunks_dropped = len(docs) - len(chunks)
+
+    retrieved_content = RETRIEVED_HEADER + CHUNK_SEPARATOR.join(chunks) if chunks else ""
+    usage.retrieved = message_tokens(retrieved_content) if chunks else 0
+
+    # 5. Rolling summary of turns older than the history window
+    summary_content = ""
+    if summary:
+        room = remaining - message_tokens(SUMMARY_HEADER)
+        if count_tokens(summary) > room:
+            summary = truncate_to_tokens(summary, room) if room >= min_chunk_tokens else ""
+            usage.summary_truncated = True
+        if summary:
+            summary_content = SUMMARY_HEADER + summary
+            usage.summary = message_tokens(summary_content)
+            remaining -= usage.summary
+
+    # 6. History, most recent first, kept in chronological order
+    kept: List[Dict] = []
+    for turn in reversed(history):
+        cost = message_tokens(turn["content"])
+        if cost > remaining:
+            break
+        kept.append(turn)
+        remaining -= cost
+        usage.history += cost
+    kept.reverse()
+    usage.history_turns_used = len(kept)
+    usage.history_turns_dropped = len(history) - len(kept)
+
+    messages = [{"role": "system", "content": system_prompt}]
+    if summary_content:
+        messages.append({"role": "system", "content": summary_content})
+    messages.extend({"role": turn["role"], "content": turn["content"]} for turn in kept)
+    if retrieved_content:
+        messages.append({"role": "system", "content": retrieved_content})
+    messages.append({"role": "user", "content": query_content})
+    return messages, usage
@@ -43,24 +43,143 @@ class Settings(BaseSettings):
     QDRANT_URL: str = os.getenv("QDRANT_URL", "https://your-cluster.qdrant.io")
     QDRANT_API_KEY: str = os.getenv("QDRANT_API_KEY", "")
     QDRANT_COLLECTION_NAME: str = "chapter_1_physical_ai"
+    QDRANT_PREFER_GRPC: bool = False  # gRPC transport (port QDRANT_GRPC_PORT) instead of REST
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_TIMEOUT: int = 30  # Client default, seconds
+    QDRANT_SEARCH_TIMEOUT: float = 5.0  # Per search call, seconds
+    QDRANT_UPSERT_TIMEOUT: float = 60.0  # Per upsert call, seconds
+
+    # Local vector store - NumPy fallback used when Qdrant is unavailable
+    LOCAL_VECTOR_STORE_PATH: str = os.getenv("LOCAL_VECTOR_STORE_PATH", "local_vectors.npz")
+
+    # Incremental indexing - manifest of chunks already in the vector store
+    INDEX_MANIFEST_PATH: str = os.getenv("INDEX_MANIFEST_PATH", "index_manifest.json")
+
+    # Ingestion pipeline - markdown reader -> chunker -> batched embedder -> upserter
+    BOOK_DOCS_PATH: str = os.getenv("BOOK_DOCS_PATH", "")  # Markdown directory; empty = built-in Chapter 1 content
+    INGEST_CHUNK_TOKENS: int = 200  # Embedding model tokens - below the 256-token window of the local models
+    INGEST_CHUNK_OVERLAP: int = 40
+    INGEST_BATCH_SIZE: int = 64
+    INGEST_UPSERT_CONCURRENCY: int = 4
+    INGEST_CHECKPOINT_PATH: str = os.getenv("INGEST_CHECKPOINT_PATH", "index_checkpoint.json")
+    INGEST_CHECKPOINT_INTERVAL_S: float = 10.0
+    INGEST_MAX_RETRIES: int = 5  # Per batch, for timeouts / rate limits / 5xx
+    INGEST_RETRY_BASE_DELAY: float = 1.0  # Seconds, doubled per attempt
+    INGEST_RETRY_MAX_DELAY: float = 30.0
+
+    # Hybrid retrieval - BM25 lexical index fused with vector results (reciprocal-rank fusion)
+    HYBRID_SEARCH_ENABLED: bool = True
+    LEXICAL_INDEX_PATH: str = os.getenv("LEXICAL_INDEX_PATH", "lexical_index.npz")
+    RRF_K: int = 60
+    LEXICAL_FAST_PATH_MAX_TERMS: int = 2  # Keyword queries this short skip embedding
 
     @property
     def VECTOR_DIMENSION(self) -> int:
         """Dynamic vector dimension based on embedding provider"""
-        if self.EMBEDDING_PROVIDER == "local":
+        if self.EMBEDDING_PROVIDER in ("local", "onnx"):
             return 384  # all-MiniLM-L6-v2
         else:
             return 1536  # OpenAI text-embedding-3-small
 
     # OpenAI
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")  # Empty = api.openai.com (set for proxies / fake servers)
     OPENAI_MODEL: str = "gpt-4o"
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
 
-    # Hybrid Embeddings - Choose provider: "openai" or "local"
+    # OpenAI HTTP connection pool - shared by every OpenAI call in the process
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 32  # Idle connections kept for reuse - about LLM_MAX_CONCURRENCY plus embeddings
+    OPENAI_KEEPALIVE_EXPIRY_S: float = 60.0  # httpx default is 5s - pauses between questions would drop every connection
+    OPENAI_HTTP2: bool = False  # Multiplex requests over few connections (needs the h2 package)
+    OPENAI_TIMEOUT_S: float = 120.0
+    OPENAI_CONNECT_TIMEOUT_S: float = 5.0
+
+    # LLM gateway - admission control for chat completions (beyond the queue limits: 503)
+    LLM_MAX_CONCURRENCY: int = 16  # Completions running at once, all users
+    LLM_MAX_CONCURRENCY_PER_USER: int = 2
+    LLM_QUEUE_SIZE: int = 64  # Calls waiting for a slot before rejecting
+    LLM_QUEUE_TIMEOUT_S: float = 10.0  # Longest wait for a slot
+    LLM_MAX_RETRIES: int = 3  # On connection errors, 429 and 5xx
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 8.0
+
+    # Prompt token budget - system prompt, query, selection, retrieved chunks, then recent history
+    PROMPT_TOKEN_BUDGET: int = 6000  # Prompt tokens per chat request (completion max_tokens is separate)
+    PROMPT_MIN_CHUNK_TOKENS: int = 64  # A chunk that does not fit is truncated only if this much room is left
+
+    # Rolling conversation summary - turns older than the history window are folded into it in the background
+    CONVERSATION_SUMMARY_ENABLED: bool = True
+    CONVERSATION_SUMMARY_MODEL: str = "gpt-4o-mini"  # Empty = OPENAI_MODEL
+    CONVERSATION_SUMMARY_MAX_TOKENS: int = 300
+    CONVERSATION_SUMMARY_MIN_TURNS: int = 2  # Aged-out turns folded per update (2 = one question and answer)
+
+    # Semantic response cache - reuse answers to near-identical questions (same profile/selection/action)
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92  # Cosine similarity between questions
+    SEMANTIC_CACHE_TTL_S: float = 86400.0
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 1000
+
+    # Translation cache - TranslationAgent output by content hash, language and model
+    TRANSLATION_CACHE_ENABLED: bool = True
+    TRANSLATION_CACHE_PATH: str = os.getenv("TRANSLATION_CACHE_PATH", "translation_cache.db")  # Empty = in-memory only
+    TRANSLATION_CACHE_MAX_ENTRIES: int = 20000
+
+    # Segmented translation - long content is translated in parallel paragraph/heading segments
+    TRANSLATION_SEGMENT_TOKENS: int = 400  # Source tokens per segment (output stays well under max_tokens)
+    TRANSLATION_SEGMENT_CONCURRENCY: int = 4  # Segments of one request in flight at once
+    # Kept in English without being sent to the model - comma-separated string or list
+    TRANSLATION_KEEP_TERMS: Union[str, List[str]] = "ROS 2,ROS,NVIDIA Isaac,Isaac Sim,Isaac ROS,Gazebo,Unity,URDF,rclpy,Nav2,MoveIt,Jetson"
+
+    @field_validator('TRANSLATION_KEEP_TERMS', mode='before')
+    @classmethod
+    def parse_keep_terms(cls, v):
+        if isinstance(v, str):
+            return [term.strip() for term in v.split(',') if term.strip()]
+        return v
+
+    # Personalization cache - ITBackgroundPersonalizer output by content hash, background bucket and model
+    PERSONALIZATION_CACHE_ENABLED: bool = True
+    PERSONALIZATION_CACHE_PATH: str = os.getenv("PERSONALIZATION_CACHE_PATH", "personalization_cache.db")  # Empty = in-memory only
+    PERSONALIZATION_CACHE_MAX_ENTRIES: int = 50000  # 9 buckets per chunk when pre-warmed
+
+    # Code explanation cache - CodeExplainer output by normalized snippet (AST for Python) and context
+    CODE_EXPLAIN_CACHE_ENABLED: bool = True
+    CODE_EXPLAIN_CACHE_TTL_S: float = 604800.0  # One week
+    CODE_EXPLAIN_CACHE_MAX_ENTRIES: int = 2000
+
+    # Identical first questions in flight at the same time share one retrieval and LLM call
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Hybrid Embeddings - Choose provider: "openai", "local" or "onnx"
     EMBEDDING_PROVIDER: str = os.getenv("EMBEDDING_PROVIDER", "local")
     LOCAL_EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"  # Fast & efficient 384-dim model
 
+    # ONNX provider - torch-free all-MiniLM-L6-v2 (export with scripts/export_onnx_model.py)
+    ONNX_MODEL_DIR: str = os.getenv("ONNX_MODEL_DIR", "models/all-MiniLM-L6-v2-onnx")
+    ONNX_QUANTIZED: bool = False  # Use the int8 dynamically-quantized model
+    ONNX_NUM_THREADS: int = 0  # 0 = onnxruntime default
+
+    # Embedding micro-batching - concurrent requests share one encode call
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+
+    # Local inference executor - keeps model.encode off the event loop
+    EMBEDDING_EXECUTOR: str = "thread"  # "thread" or "process"
+    EMBEDDING_EXECUTOR_WORKERS: int = 2
+    EMBEDDING_MAX_IN_FLIGHT: int = 2  # Concurrent encode batches
+    EMBEDDING_QUEUE_SIZE: int = 256  # Waiting requests before rejecting with 503
+
+    # Embedding cache - in-memory LRU plus persistent SQLite file (shared with scripts)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_SIZE: int = 10000
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db")  # Empty disables disk tier
+
+    # Startup preloading - load and warm up the embedding model in lifespan.
+    # Off by default on Vercel (VERCEL is set there) so serverless keeps lazy loading
+    EMBEDDING_PRELOAD: bool = not os.getenv("VERCEL")
+    EMBEDDING_WARMUP_ITERATIONS: int = 3
+
     # Frontend URL
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
@@ -0,0 +1,269 @@
+"""
+Lexical Index - In-memory BM25 inverted index over the indexed chapter documents
+Complements dense retrieval for exact technical terms (rclpy, sensor_msgs/PointCloud2, ...)
+"""
+
+from array import array
+from typing import List, Dict, Any, Optional, Tuple
+from pathlib import Path
+import json
+import math
+import os
+import re
+import logging
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Identifiers keep their inner _ / . - so "isaac_ros_nvblox" and "sensor_msgs/PointCloud2" survive whole
+_TOKEN_RE = re.compile(r"[a-z0-9](?:[a-z0-9_./-]*[a-z0-9])?")
+_SPLIT_RE = re.compile(r"[_./-]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how in into is it its of on or that the
+their them these this to was what when where which who why will with you your
+""".split())
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms; compound identifiers also emit their parts"""
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+        if _SPLIT_RE.search(token):
+            for part in _SPLIT_RE.split(token):
+                if part and part not in STOPWORDS:
+                    terms.append(part)
+            # sensor_msgs/pointcloud2 -> sensor_msgs, pointcloud2
+            for part in re.split(r"[./-]+", token):
+                if "_" in part and part != token:
+                    terms.append(part)
+    return terms
+
+
+def _document_text(payload: Dict[str, Any]) -> str:
+    """Text indexed for a document payload"""
+    return " ".join(str(payload.get(field, "")) for field in ("section", "topic", "content"))
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index with compact CSR postings
+    Term t's postings are doc_ids[offsets[t]:offsets[t+1]] with matching term frequencies
+    """
+
+    def __init__(self):
+        self.terms: Dict[str, int] = {}
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.tfs = np.zeros(0, dtype=np.int32)
+        self.doc_lens = np.zeros(0, dtype=np.int32)
+        self.ids: List[str] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self.avg_doc_len = 0.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids: List[str], payloads: List[Dict[str, Any]]) -> "LexicalIndex":
+        """Build the index from point ids and their payloads"""
+        builder = LexicalIndexBuilder()
+        for point_id, payload in zip(ids, payloads):
+            builder.add(point_id, payload)
+        return builder.build()
+
+    def has_terms(self, query: str) -> bool:
+        """True if every query term appears in the index"""
+        terms = tokenize(query)
+        return bool(terms) and all(term in self.terms for term in terms)
+
+    def search(self, query: str, limit: int) -> List[Tuple[int, float]]:
+        """Top-k (doc, BM25 score) pairs, best first"""
+        n_docs = len(self.ids)
+        if n_docs == 0 or limit <= 0:
+            return []
+
+        scores = np.zeros(n_docs, dtype=np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lens / max(self.avg_doc_len, 1e-9))
+        for term in set(tokenize(query)):
+            t = self.terms.get(term)
+            if t is None:
+                continue
+            start, end = self.offsets[t], self.offsets[t + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.tfs[start:end]
+            df = end - start
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if matched.size == 0:
+            return []
+        k = min(limit, matched.size)
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(int(doc), float(scores[doc])) for doc in top]
+
+    def save(self, path: str):
+        """Persist to an .npz file (written atomically)"""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                terms=np.array(sorted(self.terms, key=self.terms.get), dtype=str),
+                offsets=self.offsets,
+                doc_ids=self.doc_ids,
+                tfs=self.tfs,
+                doc_lens=self.doc_lens,
+                ids=np.array(self.ids, dtype=str),
+                payloads=np.array(json.dumps(self.payloads))
+            )
+        os.replace(tmp, target)
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        """Load an index saved with save()"""
+        index = cls()
+        with np.load(path, allow_pickle=False) as data:
+            index.terms = {str(term): i for i, term in enumerate(data["terms"])}
+            index.offsets = data["offsets"]
+            index.doc_ids = data["doc_ids"]
+            index.tfs = data["tfs"]
+            index.doc_lens = data["doc_lens"]
+            index.ids = [str(point_id) for point_id in data["ids"]]
+            index.payloads = json.loads(str(data["payloads"]))
+        index.avg_doc_len = float(index.doc_lens.mean()) if len(index.doc_lens) else 0.0
+        return index
+
+
+class LexicalIndexBuilder:
+    """
+    Accumulates postings one document at a time (e.g. per ingestion batch), so the
+    corpus never has to be collected into lists or read a second time
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.doc_lens = array("i")
+        self.ids: List[str] = []
+        self.payloads: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, point_id: str, payload: Dict[str, Any]):
+        """Index one document"""
+        doc = len(self.ids)
+        counts: Dict[str, int] = {}
+        terms = tokenize(_document_text(payload))
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            docs, freqs = self.postings.setdefault(term, (array("i"), array("i")))
+            docs.append(doc)
+            freqs.append(tf)
+        self.doc_lens.append(len(terms))
+        self.ids.append(str(point_id))
+        self.payloads.append(payload)
+
+    def build(self) -> LexicalIndex:
+        """Pack the postings into CSR arrays"""
+        index = LexicalIndex()
+        postings = self.postings
+        index.terms = {term: i for i, term in enumerate(sorted(postings))}
+        lengths = [len(postings[term][0]) for term in index.terms]
+        index.offsets = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]).astype(np.int64)
+        index.doc_ids = np.array([d for term in index.terms for d in postings[term][0]], dtype=np.int32)
+        index.tfs = np.array([f for term in index.terms for f in postings[term][1]], dtype=np.int32)
+        index.doc_lens = np.frombuffer(self.doc_lens, dtype=np.int32).copy() if self.doc_lens else np.zeros(0, dtype=np.int32)
+        index.ids = self.ids
+        index.payloads = self.payloads
+        index.avg_doc_len = float(index.doc_lens.mean()) if len(index.doc_lens) else 0.0
+        return index
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], k: int, limit: int) -> List[Dict]:
+    """Fuse ranked result lists by id; score is RRF scaled so rank 1 in every list = 1.0"""
+    fused: Dict[str, float] = {}
+    docs: Dict[str, Dict] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = str(doc["id"])
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+
+    best = len(result_lists) / (k + 1)
+    ranked = sorted(fused, key=fused.get, reverse=True)[:limit]
+    return [{**docs[key], "score": fused[key] / best} for key in ranked]
+
+
+def max_scaled_scores(results: List[Dict]) -> List[Dict]:
+    """Divide scores by the best one (best = 1.0) so BM25 results read like fused ones"""
+    high = max((doc["score"] for doc in results), default=0.0)
+    if high <= 0:
+        return results
+    return [{**doc, "score": doc["score"] / high} for doc in results]
+
+
+# Lexical index (loaded from LEXICAL_INDEX_PATH)
+lexical_index: Optional[LexicalIndex] = None
+
+
+def load_lexical_index():
+    """Load the persisted lexical index written by the indexing script"""
+    global lexical_index
+    path = settings.LEXICAL_INDEX_PATH
+    if not os.path.exists(path):
+        logger.info("No lexical index found - hybrid retrieval will use vectors only")
+        lexical_index = None
+        return
+    try:
+        lexical_index = LexicalIndex.load(path)
+        logger.info(f"Lexical index loaded ({len(lexical_index)} documents, {len(lexical_index.terms)} terms)")
+    except Exception as e:
+        logger.warning(f"Failed to load lexical index {path}: {str(e)}")
+        lexical_index = None
+
+
+def save_lexical_index(index: LexicalIndex):
+    """Persist the lexical index built for the indexed documents and make it current"""
+    global lexical_index
+    lexical_index = index
+    lexical_index.save(settings.LEXICAL_INDEX_PATH)
+
+
+def search_lexical(query: str, limit: int = 5) -> List[Dict]:
+    """BM25 search in the same dict format as search_similar"""
+    if lexical_index is None:
+        return []
+    documents = []
+    for doc, score in lexical_index.search(query, limit):
+        payload = lexical_index.payloads[doc]
+        documents.append({
+            "id": lexical_index.ids[doc],
+            "score": score,
+            "content": payload.get("content", ""),
+            "metadata": payload.get("metadata", {}),
+            "section": payload.get("section", ""),
+            "week": payload.get("week", "")
+        })
+    return documents
+
+
+def is_keyword_query(query: str) -> bool:
+    """Short keyword queries whose terms are all indexed can skip embedding"""
+    if lexical_index is None:
+        return False
+    words = query.split()
+    return 0 < len(words) <= settings.LEXICAL_FAST_PATH_MAX_TERMS and lexical_index.has_terms(query)
@@ -0,0 +1,326 @@
+"""
+Local Vector Store - In-process NumPy fallback when Qdrant is unavailable
+Same (async) interface as app.database.qdrant, persisted to a single .npz file
+"""
+
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple, Union
+from pathlib import Path
+import json
+import os
+import logging
+
+import numpy as np
+
+from app.config import settings
+from app.indexing.manifest import document_point_id
+
+logger = logging.getLogger(__name__)
+
+
+class LocalVectorIndex:
+    """
+    Contiguous float32 matrix of L2-normalized vectors with parallel id/payload lists
+    Top-k cosine search is one matmul plus argpartition
+    """
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self._matrix = np.zeros((0, dimension), dtype=np.float32)
+        self._size = 0
+        self.ids: List[str] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the populated rows"""
+        return self._matrix[:self._size]
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _reserve(self, rows: int):
+        """Grow capacity geometrically so upserts stay amortized O(1)"""
+        if rows <= self._matrix.shape[0]:
+            return
+        capacity = max(rows, 2 * self._matrix.shape[0], 64)
+        matrix = np.zeros((capacity, self.dimension), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        self._matrix = matrix
+
+    def upsert(self, ids: List[str], vectors: List[List[float]], payloads: List[Dict[str, Any]]):
+        """Insert new points or replace existing ones by id"""
+        if not ids:
+            return
+        normalized = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dimension))
+        self._reserve(self._size + len(ids))
+
+        for point_id, vector, payload in zip(ids, normalized, payloads):
+            row = self._rows.get(point_id)
+            if row is None:
+                row = self._size
+                self._size += 1
+                self._rows[point_id] = row
+                self.ids.append(point_id)
+                self.payloads.append(payload)
+            else:
+                self.payloads[row] = payload
+            self._matrix[row] = vector
+
+    def delete(self, ids: List[str]) -> int:
+        """Remove points by id, keeping the matrix contiguous"""
+        drop = {self._rows[point_id] for point_id in ids if point_id in self._rows}
+        if not drop:
+            return 0
+        keep = np.array([row for row in range(self._size) if row not in drop], dtype=np.int64)
+        self._matrix = np.ascontiguousarray(self._matrix[keep])
+        self._size = len(keep)
+        self.ids = [self.ids[row] for row in keep]
+        self.payloads = [self.payloads[row] for row in keep]
+        self._rows = {point_id: row for row, point_id in enumerate(self.ids)}
+        return len(drop)
+
+    def _filter_mask(self, filter_dict: Optional[Dict]) -> Optional[np.ndarray]:
+        """Boolean row mask for Qdrant-style exact-match payload filters"""
+        if not filter_dict:
+            return None
+        return np.fromiter(
+            (all(_matches(payload, key, value) for key, value in filter_dict.items())
+             for payload in self.payloads),
+            dtype=bool,
+            count=self._size
+        )
+
+    def search(self, query: List[float], limit: int, filter_dict: Optional[Dict] = None) -> List[Tuple[int, float]]:
+        """Top-k (row, cosine score) pairs, best first"""
+        if self._size == 0 or limit <= 0:
+            return []
+
+        q = self._normalize(np.asarray(query, dtype=np.float32))
+        mask = self._filter_mask(filter_dict)
+        if mask is None:
+            candidates = None
+            scores = self.vectors @ q
+        else:
+            candidates = np.flatnonzero(mask)
+            if candidates.size == 0:
+                return []
+            scores = self.vectors[candidates] @ q
+
+        k = min(limit, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = top if candidates is None else candidates[top]
+        return [(int(row), float(scores[i])) for row, i in zip(rows, top)]
+
+    def search_batch(
+        self,
+        queries: List[List[float]],
+        limit: int,
+        filters: List[Optional[Dict]]
+    ) -> List[List[Tuple[int, float]]]:
+        """Top-k for several queries with a single (queries x points) matmul"""
+        if not queries:
+            return []
+        if self._size == 0 or limit <= 0:
+            return [[] for _ in queries]
+
+        q = self._normalize(np.asarray(queries, dtype=np.float32).reshape(len(queries), self.dimension))
+        scores = q @ self.vectors.T
+
+        # Filtered-out points can never be selected
+        masks: Dict[str, np.ndarray] = {}
+        for i, filter_dict in enumerate(filters):
+            if filter_dict:
+                key = json.dumps(filter_dict, sort_keys=True)
+                if key not in masks:
+                    masks[key] = self._filter_mask(filter_dict)
+                scores[i, ~masks[key]] = -np.inf
+
+        k = min(limit, self._size)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for i, row_top in enumerate(top):
+            row_scores = scores[i, row_top]
+            order = np.argsort(-row_scores)
+            results.append([
+                (int(row), float(score))
+                for row, score in zip(row_top[order], row_scores[order])
+                if score != -np.inf
+            ])
+        return results
+
+    def save(self, path: str):
+        """Persist to an .npz file (written atomically)"""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                vectors=self.vectors,
+                ids=np.array(self.ids, dtype=str),
+                payloads=np.array(json.dumps(self.payloads))
+            )
+        os.replace(tmp, target)
+
+    @classmethod
+    def load(cls, path: str) -> "LocalVectorIndex":
+        """Load an index saved with save()"""
+        with np.load(path, allow_pickle=False) as data:
+            vectors = data["vectors"]
+            index = cls(vectors.shape[1])
+            index._matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+            index._size = vectors.shape[0]
+            index.ids = [str(point_id) for point_id in data["ids"]]
+            index.payloads = json.loads(str(data["payloads"]))
+        index._rows = {point_id: row for row, point_id in enumerate(index.ids)}
+        return index
+
+
+def _matches(payload: Dict[str, Any], key: str, value: Any) -> bool:
+    """Qdrant MatchValue semantics - dotted keys reach nested fields, lists match any element"""
+    current: Any = payload
+    for part in key.split("."):
+        if not isinstance(current, dict) or part not in current:
+            return False
+        current = current[part]
+    if isinstance(current, list):
+        return value in current
+    return current == value
+
+
+# Local vector index
+store: Optional[LocalVectorIndex] = None
+
+# Save after every write; bulk ingestion turns this off and calls flush() instead
+autosave: bool = True
+
+
+async def init_local_vectors():
+    """Load the persisted local vector index (or start an empty one)"""
+    global store
+    path = settings.LOCAL_VECTOR_STORE_PATH
+    store = None
+    if os.path.exists(path):
+        try:
+            store = LocalVectorIndex.load(path)
+            if store.dimension != settings.VECTOR_DIMENSION:
+                logger.warning(
+                    f"Local vector store has dimension {store.dimension}, expected "
+                    f"{settings.VECTOR_DIMENSION} - starting empty, re-run the indexing script"
+                )
+                store = None
+        except Exception as e:
+            logger.warning(f"Failed to load local vector store {path}: {str(e)}")
+            store = None
+    if store is None:
+        store = LocalVectorIndex(settings.VECTOR_DIMENSION)
+    logger.info(f"Local vector store ready ({len(store)} points)")
+
+
+async def close_local_vectors():
+    """Release the local vector index"""
+    global store
+    store = None
+    logger.info("Local vector store closed")
+
+
+async def flush():
+    """Persist the local index"""
+    store.save(settings.LOCAL_VECTOR_STORE_PATH)
+
+
+async def reset_collection():
+    """Empty the local index"""
+    global store
+    store = LocalVectorIndex(settings.VECTOR_DIMENSION)
+    store.save(settings.LOCAL_VECTOR_STORE_PATH)
+
+
+async def upsert_documents(
+    documents: List[Dict[str, Any]],
+    embeddings: List[List[float]],
+    ids: Optional[List[str]] = None
+) -> List[str]:
+    """Insert or update documents in the local index and persist it, returning their point ids"""
+    if ids is None:
+        ids = [document_point_id(doc) for doc in documents]
+    store.upsert(ids, embeddings, documents)
+    if autosave:
+        store.save(settings.LOCAL_VECTOR_STORE_PATH)
+    logger.info(f"Upserted {len(ids)} documents to local vector store")
+    return ids
+
+
+async def delete_documents(ids: List[str]):
+    """Delete points by id and persist"""
+    deleted = store.delete(ids)
+    if deleted:
+        if autosave:
+            store.save(settings.LOCAL_VECTOR_STORE_PATH)
+        logger.info(f"Deleted {deleted} documents from local vector store")
+
+
+def _to_documents(hits: List[Tuple[int, float]]) -> List[Dict]:
+    """Convert (row, score) hits to the dict format search_similar returns"""
+    documents = []
+    for row, score in hits:
+        payload = store.payloads[row]
+        documents.append({
+            "id": store.ids[row],
+            "score": score,
+            "content": payload.get("content", ""),
+            "metadata": payload.get("metadata", {}),
+            "section": payload.get("section", ""),
+            "week": payload.get("week", "")
+        })
+    return documents
+
+
+async def search_similar(query_embedding: List[float], limit: int = 5, filter_dict: Optional[Dict] = None) -> List[Dict]:
+    """Search for similar documents"""
+    return _to_documents(store.search(query_embedding, limit, filter_dict))
+
+
+async def search_similar_batch(
+    query_embeddings: List[List[float]],
+    limit: int = 5,
+    filters: Optional[Union[Dict, List[Optional[Dict]]]] = None
+) -> List[List[Dict]]:
+    """Search for several queries with one vectorized matmul - filters is one dict for all queries or one per query"""
+    if not isinstance(filters, list):
+        filters = [filters] * len(query_embeddings)
+    return [_to_documents(hits) for hits in store.search_batch(query_embeddings, limit, filters)]
+
+
+async def scroll_documents(batch_size: int = 256) -> AsyncIterator[List[Dict]]:
+    """Every stored document, in batches"""
+    for start in range(0, len(store), batch_size):
+        yield [
+            {
+                "id": point_id,
+                "content": payload.get("content", ""),
+                "metadata": payload.get("metadata", {}),
+                "section": payload.get("section", ""),
+                "week": payload.get("week", "")
+            }
+            for point_id, payload in zip(store.ids[start:start + batch_size], store.payloads[start:start + batch_size])
+        ]
+
+
+async def get_collection_info() -> Dict:
+    """Get collection information"""
+    if store is None:
+        return {}
+    return {
+        "name": settings.QDRANT_COLLECTION_NAME,
+        "vectors_count": len(store),
+        "points_count": len(store),
+        "status": "local"
+    }
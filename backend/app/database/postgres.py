@@ -70,6 +70,13 @@ async def create_tables():
                 created_at TIMESTAMP DEFAULT NOW()
             );
 
+            CREATE TABLE IF NOT EXISTS conversation_summaries (
+                session_id VARCHAR(255) PRIMARY KEY,
+                summary TEXT NOT NULL,
+                turns_summarized INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT NOW()
+            );
+
             CREATE INDEX IF NOT EXISTS idx_user_email ON users(email);
             CREATE INDEX IF NOT EXISTS idx_conversation_session ON conversation_history(session_id);
             CREATE INDEX IF NOT EXISTS idx_conversation_user ON conversation_history(user_id);
@@ -155,3 +162,48 @@ async def get_conversation_history(session_id: str, limit: int = 10) -> list:
             LIMIT $2
         """, session_id, limit)
         return [dict(row) for row in reversed(rows)]
+
+
+async def count_conversation_turns(session_id: str) -> int:
+    """Number of saved turns in a session"""
+    async with pool.acquire() as conn:
+        return await conn.fetchval(
+            "SELECT COUNT(*) FROM conversation_history WHERE session_id = $1", session_id
+        )
+
+
+async def get_conversation_turns(session_id: str, offset: int, limit: int) -> list:
+    """Turns of a session in chronological order, skipping the first `offset`"""
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT role, content, created_at
+            FROM conversation_history
+            WHERE session_id = $1
+            ORDER BY created_at, id
+            LIMIT $2 OFFSET $3
+        """, session_id, limit, offset)
+        return [dict(row) for row in rows]
+
+
+async def get_conversation_summary(session_id: str) -> Optional[Dict[str, Any]]:
+    """Rolling summary of a session's older turns"""
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow("""
+            SELECT summary, turns_summarized, updated_at
+            FROM conversation_summaries
+            WHERE session_id = $1
+        """, session_id)
+        return dict(row) if row else None
+
+
+async def save_conversation_summary(session_id: str, summary: str, turns_summarized: int):
+    """Store (or replace) the rolling summary of a session"""
+    async with pool.acquire() as conn:
+        await conn.execute("""
+            INSERT INTO conversation_summaries (session_id, summary, turns_summarized, updated_at)
+            VALUES ($1, $2, $3, NOW())
+            ON CONFLICT (session_id) DO UPDATE SET
+                summary = EXCLUDED.summary,
+                turns_summarized = EXCLUDED.turns_summarized,
+                updated_at = NOW()
+        """, session_id, summary, turns_summarized)
@@ -1,19 +1,47 @@
 """
 Qdrant Vector Store - Chapter 1 Content Embeddings
+Async client end to end (REST or gRPC), one shared connection per process
 """
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
-from typing import List, Dict, Any, Optional
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, PointIdsList, Filter, FieldCondition, MatchValue, SearchRequest
+)
+from typing import AsyncIterator, List, Dict, Any, Optional, Union
+import asyncio
 import logging
-import uuid
 
 from app.config import settings
+from app.indexing.manifest import document_point_id
 
 logger = logging.getLogger(__name__)
 
-# Qdrant client
-qdrant_client: Optional[QdrantClient] = None
+# Qdrant client (shared - reuses its HTTP/gRPC connections across calls)
+qdrant_client: Optional[AsyncQdrantClient] = None
+
+
+def _create_client() -> AsyncQdrantClient:
+    """Build the async client from settings (":memory:" runs an in-process Qdrant)"""
+    if settings.QDRANT_URL == ":memory:":
+        return AsyncQdrantClient(location=":memory:")
+    return AsyncQdrantClient(
+        url=settings.QDRANT_URL,
+        api_key=settings.QDRANT_API_KEY or None,
+        prefer_grpc=settings.QDRANT_PREFER_GRPC,
+        grpc_port=settings.QDRANT_GRPC_PORT,
+        timeout=settings.QDRANT_TIMEOUT
+    )
+
+
+async def _create_collection():
+    await qdrant_client.create_collection(
+        collection_name=settings.QDRANT_COLLECTION_NAME,
+        vectors_config=VectorParams(
+            size=settings.VECTOR_DIMENSION,
+            distance=Distance.COSINE
+        )
+    )
+    logger.info(f"✅ Created Qdrant collection: {settings.QDRANT_COLLECTION_NAME}")
 
 
 async def init_qdrant():
@@ -21,33 +49,26 @@ async def init_qdrant():
     global qdrant_client
 
     try:
-        qdrant_client = QdrantClient(
-            url=settings.QDRANT_URL,
-            api_key=settings.QDRANT_API_KEY,
-            timeout=30
-        )
+        if qdrant_client is None:
+            qdrant_client = _create_client()
 
         # Check if collection exists
-        collections = qdrant_client.get_collections().collections
+        collections = (await qdrant_client.get_collections()).collections
         collection_names = [col.name for col in collections]
 
         if settings.QDRANT_COLLECTION_NAME not in collection_names:
-            # Create collection
-            qdrant_client.create_collection(
-                collection_name=settings.QDRANT_COLLECTION_NAME,
-                vectors_config=VectorParams(
-                    size=settings.VECTOR_DIMENSION,
-                    distance=Distance.COSINE
-                )
-            )
-            logger.info(f"✅ Created Qdrant collection: {settings.QDRANT_COLLECTION_NAME}")
+            await _create_collection()
         else:
             logger.info(f"✅ Qdrant collection exists: {settings.QDRANT_COLLECTION_NAME}")
 
-        logger.info("✅ Qdrant client initialized")
+        transport = "gRPC" if settings.QDRANT_PREFER_GRPC else "REST"
+        logger.info(f"✅ Qdrant async client initialized ({transport})")
 
     except Exception as e:
         logger.error(f"❌ Failed to initialize Qdrant: {str(e)}")
+        if qdrant_client is not None:
+            await qdrant_client.close()
+            qdrant_client = None
         raise
 
 
@@ -55,51 +76,81 @@ async def close_qdrant():
     """Close Qdrant client"""
     global qdrant_client
     if qdrant_client:
-        qdrant_client.close()
+        await qdrant_client.close()
+        qdrant_client = None
         logger.info("✅ Qdrant client closed")
 
 
-def upsert_documents(documents: List[Dict[str, Any]], embeddings: List[List[float]]):
-    """Insert or update documents in Qdrant"""
+async def reset_collection():
+    """Drop and recreate the collection"""
+    await qdrant_client.delete_collection(settings.QDRANT_COLLECTION_NAME)
+    await _create_collection()
+
+
+async def upsert_documents(
+    documents: List[Dict[str, Any]],
+    embeddings: List[List[float]],
+    ids: Optional[List[str]] = None
+) -> List[str]:
+    """Insert or update documents in Qdrant (ids default to a payload hash), returning their point ids"""
+    if ids is None:
+        ids = [document_point_id(doc) for doc in documents]
     points = []
 
-    for idx, (doc, embedding) in enumerate(zip(documents, embeddings)):
+    for point_id, doc, embedding in zip(ids, documents, embeddings):
         point = PointStruct(
-            id=str(uuid.uuid4()),
+            id=point_id,
             vector=embedding,
             payload=doc
         )
         points.append(point)
 
-    qdrant_client.upsert(
-        collection_name=settings.QDRANT_COLLECTION_NAME,
-        points=points
+    await asyncio.wait_for(
+        qdrant_client.upsert(
+            collection_name=settings.QDRANT_COLLECTION_NAME,
+            points=points
+        ),
+        timeout=settings.QDRANT_UPSERT_TIMEOUT
     )
 
     logger.info(f"✅ Upserted {len(points)} documents to Qdrant")
+    return [point.id for point in points]
 
 
-def search_similar(query_embedding: List[float], limit: int = 5, filter_dict: Optional[Dict] = None) -> List[Dict]:
-    """Search for similar documents"""
-    search_params = {
-        "collection_name": settings.QDRANT_COLLECTION_NAME,
-        "query_vector": query_embedding,
-        "limit": limit
-    }
+async def delete_documents(ids: List[str]):
+    """Delete points by id"""
+    if not ids:
+        return
+    await asyncio.wait_for(
+        qdrant_client.delete(
+            collection_name=settings.QDRANT_COLLECTION_NAME,
+            points_selector=PointIdsList(points=list(ids))
+        ),
+        timeout=settings.QDRANT_UPSERT_TIMEOUT
+    )
+    logger.info(f"✅ Deleted {len(ids)} documents from Qdrant")
 
-    if filter_dict:
-        search_params["query_filter"] = Filter(
-            must=[
-                FieldCondition(
-                    key=key,
-                    match=MatchValue(value=value)
-                ) for key, value in filter_dict.items()
-            ]
-        )
 
-    results = qdrant_client.search(**search_params)
+async def flush():
+    """Nothing to do - upserts are acknowledged by the server once applied"""
+
+
+def _build_filter(filter_dict: Optional[Dict]) -> Optional[Filter]:
+    """Exact-match payload filter"""
+    if not filter_dict:
+        return None
+    return Filter(
+        must=[
+            FieldCondition(
+                key=key,
+                match=MatchValue(value=value)
+            ) for key, value in filter_dict.items()
+        ]
+    )
+
 
-    # Convert to dict format
+def _to_documents(results) -> List[Dict]:
+    """Convert scored points to dict format"""
     documents = []
     for result in results:
         doc = {
@@ -111,16 +162,96 @@ def search_similar(query_embedding: List[float], limit: int = 5, filter_dict: Op
             "week": result.payload.get("week", "")
         }
         documents.append(doc)
-
     return documents
 
 
-def get_collection_info() -> Dict:
+async def search_similar(query_embedding: List[float], limit: int = 5, filter_dict: Optional[Dict] = None) -> List[Dict]:
+    """Search for similar documents"""
+    search_params = {
+        "collection_name": settings.QDRANT_COLLECTION_NAME,
+        "query_vector": query_embedding,
+        "limit": limit,
+        "timeout": max(1, int(settings.QDRANT_SEARCH_TIMEOUT))
+    }
+
+    query_filter = _build_filter(filter_dict)
+    if query_filter:
+        search_params["query_filter"] = query_filter
+
+    # Server-side timeout above, client-side deadline here
+    results = await asyncio.wait_for(
+        qdrant_client.search(**search_params),
+        timeout=settings.QDRANT_SEARCH_TIMEOUT
+    )
+
+    return _to_documents(results)
+
+
+async def search_similar_batch(
+    query_embeddings: List[List[float]],
+    limit: int = 5,
+    filters: Optional[Union[Dict, List[Optional[Dict]]]] = None
+) -> List[List[Dict]]:
+    """Search for several queries in one batched request - filters is one dict for all queries or one per query"""
+    if not query_embeddings:
+        return []
+    if not isinstance(filters, list):
+        filters = [filters] * len(query_embeddings)
+
+    requests = [
+        SearchRequest(
+            vector=embedding,
+            filter=_build_filter(filter_dict),
+            limit=limit,
+            with_payload=True
+        )
+        for embedding, filter_dict in zip(query_embeddings, filters)
+    ]
+
+    batch_results = await asyncio.wait_for(
+        qdrant_client.search_batch(
+            collection_name=settings.QDRANT_COLLECTION_NAME,
+            requests=requests,
+            timeout=max(1, int(settings.QDRANT_SEARCH_TIMEOUT))
+        ),
+        timeout=settings.QDRANT_SEARCH_TIMEOUT
+    )
+
+    return [_to_documents(results) for results in batch_results]
+
+
+async def scroll_documents(batch_size: int = 256) -> AsyncIterator[List[Dict]]:
+    """Every stored document, in batches (payloads only, no vectors)"""
+    offset = None
+    while True:
+        points, offset = await qdrant_client.scroll(
+            collection_name=settings.QDRANT_COLLECTION_NAME,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False
+        )
+        if points:
+            yield [
+                {
+                    "id": point.id,
+                    "content": point.payload.get("content", ""),
+                    "metadata": point.payload.get("metadata", {}),
+                    "section": point.payload.get("section", ""),
+                    "week": point.payload.get("week", "")
+                }
+                for point in points
+            ]
+        if offset is None:
+            return
+
+
+async def get_collection_info() -> Dict:
     """Get collection information"""
     try:
-        info = qdrant_client.get_collection(settings.QDRANT_COLLECTION_NAME)
+        info = await qdrant_client.get_collection(settings.QDRANT_COLLECTION_NAME)
         return {
-            "name": info.name,
+            "name": settings.QDRANT_COLLECTION_NAME,
             "vectors_count": info.vectors_count,
             "points_count": info.points_count,
             "status": info.status
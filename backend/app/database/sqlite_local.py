@@ -52,6 +52,15 @@ async def init_local_db():
                 FOREIGN KEY (user_id) REFERENCES users(id)
             )
         """)
+
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS conversation_summaries (
+                session_id TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                turns_summarized INTEGER NOT NULL,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
         
         await db.commit()
         logger.info("Local SQLite database initialized")
@@ -182,8 +191,65 @@ async def get_conversation_history(session_id: str, limit: int = 10) -> list:
         SELECT role, content, context_metadata, created_at
         FROM conversation_history
         WHERE session_id = ?
-        ORDER BY created_at DESC
+        ORDER BY created_at DESC, id DESC
         LIMIT ?
     """, (session_id, limit)) as cursor:
         rows = await cursor.fetchall()
         return [dict(row) for row in reversed(rows)]
+
+
+async def count_conversation_turns(session_id: str) -> int:
+    """Number of saved turns in a session"""
+    if not db:
+        return 0
+
+    async with db.execute(
+        "SELECT COUNT(*) FROM conversation_history WHERE session_id = ?", (session_id,)
+    ) as cursor:
+        row = await cursor.fetchone()
+        return row[0]
+
+
+async def get_conversation_turns(session_id: str, offset: int, limit: int) -> list:
+    """Turns of a session in chronological order, skipping the first `offset`"""
+    if not db:
+        return []
+
+    async with db.execute("""
+        SELECT role, content, created_at
+        FROM conversation_history
+        WHERE session_id = ?
+        ORDER BY created_at, id
+        LIMIT ? OFFSET ?
+    """, (session_id, limit, offset)) as cursor:
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+
+async def get_conversation_summary(session_id: str) -> Optional[Dict[str, Any]]:
+    """Rolling summary of a session's older turns"""
+    if not db:
+        return None
+
+    async with db.execute(
+        "SELECT summary, turns_summarized, updated_at FROM conversation_summaries WHERE session_id = ?",
+        (session_id,)
+    ) as cursor:
+        row = await cursor.fetchone()
+        return dict(row) if row else None
+
+
+async def save_conversation_summary(session_id: str, summary: str, turns_summarized: int):
+    """Store (or replace) the rolling summary of a session"""
+    if not db:
+        return
+
+    await db.execute("""
+        INSERT INTO conversation_summaries (session_id, summary, turns_summarized, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(session_id) DO UPDATE SET
+            summary = excluded.summary,
+            turns_summarized = excluded.turns_summarized,
+            updated_at = excluded.updated_at
+    """, (session_id, summary, turns_summarized, datetime.utcnow().isoformat()))
+    await db.commit()
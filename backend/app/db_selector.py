@@ -16,3 +16,13 @@ def get_db_module():
     else:
         from app.database import postgres
         return postgres
+
+
+def get_vector_store_module():
+    """Get the appropriate vector store module"""
+    if use_local_qdrant:
+        from app.database import local_vectors
+        return local_vectors
+    else:
+        from app.database import qdrant
+        return qdrant
@@ -0,0 +1 @@
+"""Embeddings module - batched, cached embedding generation"""
@@ -0,0 +1,188 @@
+"""
+Embedding Cache - In-memory LRU plus persistent SQLite store
+Keyed by provider, model name and a hash of the normalized text
+"""
+
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+import logging
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before hashing and encoding"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def current_namespace() -> str:
+    """Provider and model the cached vectors belong to"""
+    if settings.EMBEDDING_PROVIDER == "openai":
+        model = settings.OPENAI_EMBEDDING_MODEL
+    elif settings.EMBEDDING_PROVIDER == "onnx":
+        model = f"{settings.LOCAL_EMBEDDING_MODEL}{'-int8' if settings.ONNX_QUANTIZED else ''}"
+    else:
+        model = settings.LOCAL_EMBEDDING_MODEL
+    return f"{settings.EMBEDDING_PROVIDER}:{model}"
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache
+    Tier one is a bounded in-process LRU, tier two a SQLite file that survives
+    restarts and is shared with the indexing scripts
+    """
+
+    def __init__(self, max_entries: int, db_path: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self.db_path = db_path
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._namespace: Optional[str] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._disk_ready = False
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _check_namespace(self) -> str:
+        """Drop in-memory entries when the provider or model changes"""
+        namespace = current_namespace()
+        if namespace != self._namespace:
+            if self._namespace is not None:
+                logger.info(f"Embedding provider changed to {namespace}, invalidating cache")
+            self._memory.clear()
+            self._namespace = namespace
+            self._disk_ready = False
+        return namespace
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _open_disk(self, namespace: str) -> Optional[sqlite3.Connection]:
+        """Open the persistent store and purge entries of other providers/models"""
+        if not self.db_path:
+            return None
+        if self._conn is None:
+            try:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS embedding_cache (
+                        namespace TEXT NOT NULL,
+                        text_hash TEXT NOT NULL,
+                        vector BLOB NOT NULL,
+                        created_at REAL NOT NULL,
+                        PRIMARY KEY (namespace, text_hash)
+                    )
+                """)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache disk tier disabled: {str(e)}")
+                self.db_path = None
+                self._conn = None
+                return None
+        if not self._disk_ready:
+            deleted = self._conn.execute(
+                "DELETE FROM embedding_cache WHERE namespace != ?", (namespace,)
+            ).rowcount
+            self._conn.commit()
+            if deleted:
+                logger.info(f"Purged {deleted} stale cached embeddings")
+            self._disk_ready = True
+        return self._conn
+
+    def _disk_get(self, namespace: str, key: str) -> Optional[List[float]]:
+        with self._lock:
+            conn = self._open_disk(namespace)
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT vector FROM embedding_cache WHERE namespace = ? AND text_hash = ?",
+                (namespace, key)
+            ).fetchone()
+        if row is None:
+            return None
+        return array("f", row[0]).tolist()
+
+    def _disk_put_many(self, namespace: str, items: Dict[str, List[float]]):
+        with self._lock:
+            conn = self._open_disk(namespace)
+            if conn is None:
+                return
+            now = time.time()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (namespace, text_hash, vector, created_at) VALUES (?, ?, ?, ?)",
+                [(namespace, key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+            )
+            conn.commit()
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, text: str) -> Optional[List[float]]:
+        """Look up a normalized text, memory first then disk"""
+        namespace = self._check_namespace()
+        key = self._hash(text)
+
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return vector
+
+        vector = await asyncio.to_thread(self._disk_get, namespace, key)
+        if vector is not None:
+            self._remember(key, vector)
+            self.disk_hits += 1
+            return vector
+
+        self.misses += 1
+        return None
+
+    async def put_many(self, items: Dict[str, List[float]]):
+        """Store vectors for normalized texts in both tiers"""
+        namespace = self._check_namespace()
+        hashed = {self._hash(text): vector for text, vector in items.items()}
+        for key, vector in hashed.items():
+            self._remember(key, vector)
+        await asyncio.to_thread(self._disk_put_many, namespace, hashed)
+
+    async def put(self, text: str, vector: List[float]):
+        """Store one vector"""
+        await self.put_many({text: vector})
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "namespace": self._namespace or current_namespace(),
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "persistent": bool(self.db_path),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
+
+    def close(self):
+        """Close the persistent store"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self._disk_ready = False
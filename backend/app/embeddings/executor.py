@@ -0,0 +1,89 @@
+"""
+Embedding Executor - Local inference off the asyncio event loop
+Runs SentenceTransformer or ONNX encodes on a dedicated thread or process pool
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+import asyncio
+import multiprocessing
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Model loaded once per process worker (see _init_process_worker)
+_worker_model = None
+
+
+def _load_model(provider: str):
+    """Load the in-process model for a local provider ("local" or "onnx")"""
+    if provider == "onnx":
+        from app.embeddings.onnx_backend import get_onnx_embedding_model
+        return get_onnx_embedding_model()
+    from app.embeddings.service import get_local_embedding_model
+    return get_local_embedding_model()
+
+
+def _init_process_worker(provider: str):
+    """Process pool initializer - load the model once per worker"""
+    global _worker_model
+    _worker_model = _load_model(provider)
+
+
+def _encode_in_process(texts: List[str]) -> List[List[float]]:
+    """Encode texts inside a process worker"""
+    return _worker_model.encode(texts, convert_to_tensor=False).tolist()
+
+
+def _encode_in_thread(provider: str, texts: List[str]) -> List[List[float]]:
+    """Encode texts with the shared in-process model"""
+    return _load_model(provider).encode(texts, convert_to_tensor=False).tolist()
+
+
+class LocalEncoderExecutor:
+    """Dedicated pool for local embedding inference"""
+
+    def __init__(self, kind: str, workers: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown embedding executor: {kind}")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.provider: Optional[str] = None
+        self._pool: Optional[Executor] = None
+
+    def _get_pool(self, provider: str) -> Executor:
+        """Create the pool on first use"""
+        if self._pool is not None and self.kind == "process" and provider != self.provider:
+            # Process workers hold the model of the provider they were started with
+            self.shutdown()
+        if self._pool is None:
+            self.provider = provider
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_process_worker,
+                    initargs=(provider,)
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="embedding"
+                )
+            logger.info(f"Started embedding {self.kind} pool (workers: {self.workers})")
+        return self._pool
+
+    async def encode(self, provider: str, texts: List[str]) -> List[List[float]]:
+        """Encode texts on the pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool(provider)
+        if self.kind == "process":
+            return await loop.run_in_executor(pool, _encode_in_process, texts)
+        return await loop.run_in_executor(pool, _encode_in_thread, provider, texts)
+
+    def shutdown(self):
+        """Shut down the pool"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            logger.info(f"Embedding {self.kind} pool shut down")
@@ -0,0 +1,96 @@
+"""
+ONNX Embedding Backend - Torch-free all-MiniLM-L6-v2 inference
+Runs an exported (optionally int8-quantized) ONNX model with the Rust `tokenizers` library
+
+Export the model once with: python scripts/export_onnx_model.py
+"""
+
+from pathlib import Path
+from typing import List
+import logging
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_MODEL_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+# Same truncation length as SentenceTransformer("all-MiniLM-L6-v2").max_seq_length
+MAX_SEQ_LENGTH = 256
+
+# Documented agreement with the torch pipeline (1 - min cosine over the benchmark corpus).
+# Checked by scripts/benchmark_embeddings.py; vectors within tolerance can share the 384-dim collection
+COSINE_TOLERANCE = {"fp32": 1e-4, "int8": 2e-2}
+
+
+class OnnxEmbeddingModel:
+    """
+    Sentence embedding model on onnxruntime
+    Mean pooling + L2 normalization, matching the sentence-transformers pipeline
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = False, num_threads: int = 0):
+        import numpy as np
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self._np = np
+        model_path = Path(model_dir) / (ONNX_QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE)
+        tokenizer_path = Path(model_dir) / TOKENIZER_FILE
+        if not model_path.exists() or not tokenizer_path.exists():
+            raise FileNotFoundError(
+                f"ONNX model not found in {model_dir} - run scripts/export_onnx_model.py first"
+            )
+
+        self.tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        logger.info(f"Loaded ONNX embedding model: {model_path}")
+
+    def encode(self, texts: List[str], convert_to_tensor: bool = False):
+        """Encode texts into normalized float32 sentence embeddings (mirrors SentenceTransformer.encode)"""
+        np = self._np
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalize
+        mask = attention_mask[:, :, None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        embeddings = summed / counts
+        norms = np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return (embeddings / norms).astype(np.float32)
+
+
+# ONNX embedding model (lazy load)
+_onnx_embedding_model = None
+
+
+def get_onnx_embedding_model() -> OnnxEmbeddingModel:
+    """Lazy load ONNX embedding model"""
+    global _onnx_embedding_model
+    if _onnx_embedding_model is None:
+        _onnx_embedding_model = OnnxEmbeddingModel(
+            settings.ONNX_MODEL_DIR,
+            quantized=settings.ONNX_QUANTIZED,
+            num_threads=settings.ONNX_NUM_THREADS
+        )
+    return _onnx_embedding_model
@@ -0,0 +1,350 @@
+"""
+Embedding Service - Cached, micro-batched embedding generation
+Gathers concurrent embedding requests into a single encode call
+"""
+
+from openai import AsyncOpenAI
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import time
+import logging
+
+from app.config import settings
+from app.embeddings.cache import EmbeddingCache, normalize_text
+from app.embeddings.executor import LocalEncoderExecutor
+
+logger = logging.getLogger(__name__)
+
+EncodeBatchFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+# Local embedding model (lazy load)
+_local_embedding_model = None
+
+
+def get_local_embedding_model():
+    """Lazy load local embedding model"""
+    global _local_embedding_model
+    if _local_embedding_model is None:
+        from sentence_transformers import SentenceTransformer
+        logger.info(f"Loading local embedding model: {settings.LOCAL_EMBEDDING_MODEL}")
+        _local_embedding_model = SentenceTransformer(settings.LOCAL_EMBEDDING_MODEL)
+    return _local_embedding_model
+
+
+def load_embedding_tokenizer():
+    """
+    `tokenizers.Tokenizer` of the local embedding model, for measuring chunks in model tokens
+    None for OpenAI embeddings or when neither the ONNX export nor the model can be loaded
+    """
+    provider = settings.EMBEDDING_PROVIDER
+    if provider not in ("local", "onnx"):
+        return None
+    try:
+        from tokenizers import Tokenizer
+        from app.embeddings.onnx_backend import TOKENIZER_FILE
+        tokenizer_path = Path(settings.ONNX_MODEL_DIR) / TOKENIZER_FILE
+        if tokenizer_path.exists():
+            tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        else:
+            # Copy, so the model's own truncation settings stay untouched
+            tokenizer = Tokenizer.from_str(get_local_embedding_model().tokenizer.backend_tokenizer.to_str())
+    except Exception as e:
+        logger.warning(f"Embedding tokenizer unavailable ({str(e)}) - chunk sizes are estimated")
+        return None
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
+
+
+class EmbeddingOverloadedError(Exception):
+    """Raised when the embedding queue is full"""
+
+
+class BatchStats:
+    """Running batch-size and queue-wait statistics"""
+
+    def __init__(self):
+        self.batches = 0
+        self.items = 0
+        self.max_batch_size = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.total_encode_ms = 0.0
+        self.rejected = 0
+
+    def record(self, batch_size: int, waits_ms: List[float], encode_ms: float):
+        """Record one completed batch"""
+        self.batches += 1
+        self.items += batch_size
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+        self.total_wait_ms += sum(waits_ms)
+        self.max_wait_ms = max([self.max_wait_ms] + waits_ms)
+        self.total_encode_ms += encode_ms
+
+    def snapshot(self) -> Dict:
+        """Return statistics as a dict"""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "avg_queue_wait_ms": round(self.total_wait_ms / self.items, 3) if self.items else 0.0,
+            "max_queue_wait_ms": round(self.max_wait_ms, 3),
+            "avg_encode_ms": round(self.total_encode_ms / self.batches, 3) if self.batches else 0.0,
+            "rejected": self.rejected
+        }
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batcher for embedding requests
+    Collects requests until max_batch_size is reached or max_wait_ms has passed,
+    then encodes them with one call and hands each caller its own vector.
+    At most max_in_flight batches encode at once; once max_queue_size requests
+    are waiting, new requests fail fast with EmbeddingOverloadedError
+    """
+
+    def __init__(
+        self,
+        encode_batch: EncodeBatchFn,
+        max_batch_size: int,
+        max_wait_ms: float,
+        max_queue_size: int = 0,
+        max_in_flight: int = 1
+    ):
+        self.encode_batch = encode_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.max_queue_size = max(0, max_queue_size)
+        self.max_in_flight = max(1, max_in_flight)
+        self.stats = BatchStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._batch_tasks: set = set()
+        self._worker_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def embed(self, text: str) -> List[float]:
+        """Queue text for the next batch and wait for its vector"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((text, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.stats.rejected += 1
+            raise EmbeddingOverloadedError(
+                f"Embedding queue is full ({self.max_queue_size} requests waiting), try again shortly"
+            )
+        return await future
+
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a batch"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_worker(self):
+        """Start the batching worker on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queues and semaphores are bound to their loop
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+            self._worker_task = None
+        if self._worker_task is None or self._worker_task.done():
+            # Same loop: keep the queue, requests already waiting go into the next batch
+            self._worker_task = loop.create_task(self._worker())
+
+    async def _worker(self):
+        """Collect queued requests into batches"""
+        while True:
+            # Wait for a free in-flight slot; requests keep queueing meanwhile
+            await self._in_flight.acquire()
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = self._loop.time() + self.max_wait_ms / 1000
+
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    remaining = deadline - self._loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Stopped while collecting - the requests already taken never reach a batch
+                self._in_flight.release()
+                self._fail(batch)
+                raise
+
+            task = self._loop.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task: asyncio.Task):
+        """Release the in-flight slot of a finished batch"""
+        self._batch_tasks.discard(task)
+        self._in_flight.release()
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future, float]]):
+        """Encode one batch and resolve its futures"""
+        started = time.perf_counter()
+        waits_ms = [(started - enqueued) * 1000 for _, _, enqueued in batch]
+
+        try:
+            vectors = await self.encode_batch([text for text, _, _ in batch])
+        except asyncio.CancelledError:
+            self._fail(batch)
+            raise
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats.record(len(batch), waits_ms, (time.perf_counter() - started) * 1000)
+
+        for (_, future, _), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[str, asyncio.Future, float]]):
+        """Fail requests that will never be encoded"""
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(EmbeddingOverloadedError("Embedding service is shutting down"))
+
+    async def close(self):
+        """Stop the batching worker, failing every request that is still waiting"""
+        if self._worker_task and not self._worker_task.done():
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except asyncio.CancelledError:
+                pass
+        self._worker_task = None
+        batch_tasks = list(self._batch_tasks)
+        for task in batch_tasks:
+            task.cancel()
+        await asyncio.gather(*batch_tasks, return_exceptions=True)
+        if self._queue is not None:
+            pending = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            self._fail(pending)
+
+
+class EmbeddingService:
+    """Hybrid embedding service (local or OpenAI) with caching and micro-batching"""
+
+    def __init__(self, openai_client: AsyncOpenAI):
+        self.openai_client = openai_client
+        self.cache = EmbeddingCache(
+            max_entries=settings.EMBEDDING_CACHE_SIZE,
+            db_path=settings.EMBEDDING_CACHE_PATH
+        ) if settings.EMBEDDING_CACHE_ENABLED else None
+        self.local_executor = LocalEncoderExecutor(
+            kind=settings.EMBEDDING_EXECUTOR,
+            workers=settings.EMBEDDING_EXECUTOR_WORKERS
+        )
+        self.batcher = EmbeddingBatcher(
+            self.encode_batch,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+            max_queue_size=settings.EMBEDDING_QUEUE_SIZE,
+            max_in_flight=settings.EMBEDDING_MAX_IN_FLIGHT
+        )
+
+    async def embed(self, text: str) -> List[float]:
+        """Embed a single text - cache first, then the shared batcher"""
+        text = normalize_text(text)
+        if self.cache is None:
+            return await self.batcher.embed(text)
+
+        vector = await self.cache.get(text)
+        if vector is None:
+            vector = await self.batcher.embed(text)
+            await self.cache.put(text, vector)
+        return vector
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of texts - cached vectors are reused, only the misses are encoded"""
+        texts = [normalize_text(text) for text in texts]
+        if self.cache is None:
+            return await self.encode_batch(texts)
+
+        vectors = [await self.cache.get(text) for text in texts]
+        misses = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if misses:
+            encoded = dict(zip(misses, await self.encode_batch(misses)))
+            await self.cache.put_many(encoded)
+            vectors = [vector if vector is not None else encoded[text] for text, vector in zip(texts, vectors)]
+        return vectors
+
+    async def encode_batch(self, texts: List[str]) -> List[List[float]]:
+        """Encode a list of texts with the configured provider"""
+        if settings.EMBEDDING_PROVIDER in ("local", "onnx"):
+            # Use local sentence-transformers or torch-free ONNX (FREE & FAST) on the dedicated pool
+            embeddings = await self.local_executor.encode(settings.EMBEDDING_PROVIDER, texts)
+            logger.info(
+                f"Generated {settings.EMBEDDING_PROVIDER.upper()} embeddings "
+                f"(batch: {len(texts)}, dim: {len(embeddings[0])})"
+            )
+            return embeddings
+
+        # Use OpenAI embeddings (CLOUD & COSTS MONEY)
+        response = await self.openai_client.embeddings.create(
+            model=settings.OPENAI_EMBEDDING_MODEL,
+            input=texts
+        )
+        data = sorted(response.data, key=lambda item: item.index)
+        logger.info(f"Generated OPENAI embeddings (batch: {len(texts)}, dim: {len(data[0].embedding)})")
+        return [item.embedding for item in data]
+
+    async def warm_up(self, iterations: int) -> List[float]:
+        """Load the model and run warm-up encodes, returning each duration in ms"""
+        if settings.EMBEDDING_PROVIDER == "openai":
+            logger.info("Skipping embedding warm-up for the OpenAI provider")
+            return []
+
+        # Process workers each hold their own model, so warm all of them per round
+        parallel = self.local_executor.workers if self.local_executor.kind == "process" else 1
+        timings = []
+        for i in range(max(1, iterations)):
+            started = time.perf_counter()
+            await asyncio.gather(*[
+                self.encode_batch([f"Warm-up query {i}.{n}: What is ROS 2?"])
+                for n in range(parallel)
+            ])
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            timings.append(round(elapsed_ms, 2))
+            logger.info(f"Embedding warm-up {i + 1}/{iterations}: {elapsed_ms:.1f} ms")
+        return timings
+
+    def get_stats(self) -> Dict:
+        """Batch-size, queue-wait and cache statistics"""
+        return {
+            "cache": self.cache.get_stats() if self.cache else None,
+            "provider": settings.EMBEDDING_PROVIDER,
+            # Configured limits - max_batch_size in the snapshot below is the largest batch seen
+            "batch_size_limit": self.batcher.max_batch_size,
+            "batch_wait_limit_ms": self.batcher.max_wait_ms,
+            "executor": self.local_executor.kind,
+            "queue_depth": self.batcher.queue_depth(),
+            "max_queue_size": self.batcher.max_queue_size,
+            "max_in_flight": self.batcher.max_in_flight,
+            **self.batcher.stats.snapshot()
+        }
+
+    async def close(self):
+        """Stop background batching and the inference pool"""
+        await self.batcher.close()
+        self.local_executor.shutdown()
+        if self.cache:
+            self.cache.close()
@@ -0,0 +1 @@
+"""Indexing module - incremental, streaming content indexing"""
@@ -0,0 +1,60 @@
+"""
+Ingestion Checkpoint - State of an indexing run that has not finished yet
+Saved periodically next to the manifest; --resume picks the run up where it stopped
+"""
+
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestCheckpoint:
+    """Progress of an interrupted run; the manifest holds which chunks are done"""
+    source: str
+    scope: str
+    rebuild: bool = False
+    batches_done: int = 0
+    chunks_done: int = 0
+    stale_ids: List[str] = field(default_factory=list)
+    started_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    updated_at: str = ""
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IngestCheckpoint"]:
+        """The saved checkpoint, or None if there is no interrupted run"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(**json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable ingestion checkpoint {path}: {str(e)}")
+            return None
+
+    def add_stale(self, ids: List[str]):
+        """Old point ids that still have to be deleted (kept across restarts)"""
+        known = set(self.stale_ids)
+        self.stale_ids.extend(point_id for point_id in ids if point_id not in known)
+
+    def save(self, path: str):
+        """Write the checkpoint atomically"""
+        self.updated_at = datetime.utcnow().isoformat()
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, indent=1)
+        os.replace(tmp, target)
+
+    @staticmethod
+    def clear(path: str):
+        """Remove the checkpoint once a run has completed"""
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,103 @@
+"""
+Index Manifest - What is already in the vector store
+Deterministic content-hash point ids plus a JSON manifest, so re-indexing only
+embeds and upserts new or changed chunks and deletes removed ones
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from pathlib import Path
+import hashlib
+import json
+import os
+import uuid
+import logging
+
+from app.config import settings
+from app.embeddings.cache import current_namespace
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_key(doc: Dict[str, Any]) -> str:
+    """Stable identity of a chunk across runs (its source position, not its content)"""
+    if doc.get("source"):
+        return str(doc["source"])
+    return f"{doc.get('section', '')}::{doc.get('topic', '')}"
+
+
+def content_hash(doc: Dict[str, Any]) -> str:
+    """SHA-256 of the full payload - content or metadata changes both count"""
+    canonical = json.dumps(doc, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def point_id_for(hash_hex: str) -> str:
+    """Deterministic point id (UUID form, accepted by Qdrant) for a content hash"""
+    return str(uuid.UUID(hex=hash_hex[:32]))
+
+
+def document_point_id(doc: Dict[str, Any]) -> str:
+    """Deterministic point id for a document payload"""
+    return point_id_for(content_hash(doc))
+
+
+class IndexManifest:
+    """
+    JSON manifest of indexed chunks: chunk key -> {hash, id}
+    Scoped to the vector backend, collection and embedding model - a different
+    scope starts from an empty manifest, so everything is re-embedded
+    """
+
+    def __init__(self, path: str, scope: str):
+        self.path = path
+        self.scope = scope
+        self.chunks: Dict[str, Dict[str, str]] = {}
+
+    @classmethod
+    def load(cls, path: str, backend: str) -> "IndexManifest":
+        """Load the manifest for the current backend/collection/embedding model"""
+        scope = f"{backend}:{settings.QDRANT_COLLECTION_NAME}:{current_namespace()}"
+        manifest = cls(path, scope)
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("scope") == scope:
+                    manifest.chunks = data.get("chunks", {})
+                else:
+                    logger.info(f"Index manifest scope changed ({data.get('scope')} -> {scope}), starting fresh")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable index manifest {path}: {str(e)}")
+        return manifest
+
+    def status(self, doc: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        """("added" | "changed" | "unchanged", point id to delete) for a single chunk"""
+        entry = self.chunks.get(chunk_key(doc))
+        if entry is None:
+            return "added", None
+        if entry["hash"] != content_hash(doc):
+            return "changed", entry["id"]
+        return "unchanged", None
+
+    def record(self, documents: List[Dict[str, Any]]):
+        """Mark documents as indexed"""
+        for doc in documents:
+            hash_hex = content_hash(doc)
+            self.chunks[chunk_key(doc)] = {"hash": hash_hex, "id": point_id_for(hash_hex)}
+
+    def forget(self, keys: List[str]):
+        """Drop removed chunks"""
+        for key in keys:
+            self.chunks.pop(key, None)
+
+    def clear(self):
+        self.chunks = {}
+
+    def save(self):
+        """Write the manifest atomically"""
+        target = Path(self.path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"scope": self.scope, "chunks": self.chunks}, f, indent=1, sort_keys=True)
+        os.replace(tmp, target)
@@ -0,0 +1,201 @@
+"""
+Markdown Source - Streams book chapters as retrieval chunks
+Reads one file at a time, splits it by headings and packs each section into
+token-bounded chunks with overlap
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Iterable, List, Dict, Any, Tuple
+from pathlib import Path
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+MARKDOWN_SUFFIXES = (".md", ".mdx")
+
+# Words and punctuation - the dependency-free fallback when the embedding model's tokenizer is not available.
+# Identifiers split into many more subword tokens ("sensor_msgs/PointCloud2": 3 here, 8 for MiniLM's
+# WordPiece), so fallback windows are shrunk by REGEX_TOKEN_SAFETY_FACTOR to stay inside the model window
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+REGEX_TOKEN_SAFETY_FACTOR = 2.5
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_WEEK_RE = re.compile(r"\bweeks?[\s_-]*(\d+)(?:\s*[-–_]\s*(\d+))?", re.IGNORECASE)
+
+# (start, end) character offsets of each token of a text
+TokenSpans = Callable[[str], List[Tuple[int, int]]]
+
+
+@dataclass
+class MarkdownSection:
+    """Text under one heading of a markdown file"""
+    path: str
+    title: str
+    heading: str
+    text: str
+    front_matter: Dict[str, str] = field(default_factory=dict)
+    occurrence: int = 1  # Sections of this file under the same heading so far, this one included
+
+    @property
+    def anchor(self) -> str:
+        """Heading unique within the file ("Summary", "Summary (2)", ...)"""
+        return self.heading if self.occurrence == 1 else f"{self.heading} ({self.occurrence})"
+
+
+def iter_markdown_files(root: str) -> Iterator[Path]:
+    """Markdown files under root in a stable order"""
+    base = Path(root)
+    if base.is_file():
+        yield base
+        return
+    for path in sorted(base.rglob("*")):
+        if path.suffix.lower() in MARKDOWN_SUFFIXES and path.is_file():
+            if any(part.startswith((".", "_")) or part == "node_modules" for part in path.relative_to(base).parts):
+                continue
+            yield path
+
+
+def _split_front_matter(text: str) -> Tuple[Dict[str, str], str]:
+    """Simple `key: value` YAML front matter"""
+    if not text.startswith("---"):
+        return {}, text
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}, text
+    front_matter = {}
+    for line in text[3:end].splitlines():
+        key, sep, value = line.partition(":")
+        if sep and key.strip():
+            front_matter[key.strip()] = value.strip().strip("'\"")
+    return front_matter, text[end + 4:].lstrip("\n")
+
+
+def read_sections(root: str) -> Iterator[MarkdownSection]:
+    """Yield heading-delimited sections, holding only one file in memory"""
+    base = Path(root)
+    for path in iter_markdown_files(root):
+        try:
+            raw = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"Skipping unreadable markdown file {path}: {str(e)}")
+            continue
+
+        relative = path.name if base.is_file() else path.relative_to(base).as_posix()
+        front_matter, body = _split_front_matter(raw)
+        title = front_matter.get("title") or front_matter.get("sidebar_label") or path.stem
+        heading = title
+        lines: List[str] = []
+        in_fence = False
+        seen: Dict[str, int] = {}
+
+        def section() -> MarkdownSection:
+            seen[heading] = seen.get(heading, 0) + 1
+            return MarkdownSection(relative, title, heading, "\n".join(lines).strip(), front_matter, seen[heading])
+
+        for line in body.splitlines():
+            if _FENCE_RE.match(line):
+                in_fence = not in_fence
+            match = None if in_fence else _HEADING_RE.match(line)
+            if match:
+                if "".join(lines).strip():
+                    yield section()
+                lines = []
+                heading = match.group(2).strip()
+                if len(match.group(1)) == 1 and "title" not in front_matter:
+                    title = heading
+            else:
+                lines.append(line)
+
+        if "".join(lines).strip():
+            yield section()
+
+
+def regex_token_spans(text: str) -> List[Tuple[int, int]]:
+    return [match.span() for match in _TOKEN_RE.finditer(text)]
+
+
+def tokenizer_token_spans(tokenizer) -> TokenSpans:
+    """Spans of a `tokenizers.Tokenizer` (special tokens excluded)"""
+    def spans(text: str) -> List[Tuple[int, int]]:
+        return list(tokenizer.encode(text, add_special_tokens=False).offsets)
+    return spans
+
+
+def split_tokens(
+    text: str,
+    chunk_tokens: int,
+    overlap_tokens: int,
+    token_spans: TokenSpans = regex_token_spans
+) -> Iterator[str]:
+    """Token windows of at most chunk_tokens, overlapping by overlap_tokens, ending on a paragraph or sentence break where possible"""
+    spans = token_spans(text)
+    if len(spans) <= chunk_tokens:
+        if spans:
+            yield text.strip()
+        return
+
+    overlap_tokens = min(overlap_tokens, chunk_tokens // 2)
+    start = 0
+    while start < len(spans):
+        end = min(start + chunk_tokens, len(spans))
+        if end < len(spans):
+            # Prefer to cut after a blank line, then after a sentence, in the back half of the window
+            window = text[spans[start][0]:spans[end - 1][1]]
+            for boundary in ("\n\n", ". ", "\n"):
+                cut = window.rfind(boundary, len(window) // 2)
+                if cut != -1:
+                    cut_at = spans[start][0] + cut + len(boundary.rstrip(" "))
+                    end = max(start + 1, sum(1 for s in spans[start:end] if s[1] <= cut_at) + start)
+                    break
+        yield text[spans[start][0]:spans[end - 1][1]].strip()
+        if end >= len(spans):
+            return
+        start = max(end - overlap_tokens, start + 1)
+
+
+def _week(section: MarkdownSection) -> str:
+    if section.front_matter.get("week"):
+        return section.front_matter["week"]
+    match = _WEEK_RE.search(f"{section.title} {section.path}")
+    if not match:
+        return ""
+    first, last = match.groups()
+    return f"{int(first)}-{int(last)}" if last else str(int(first))
+
+
+def chunk_sections(
+    sections: Iterable[MarkdownSection],
+    chunk_tokens: int,
+    overlap_tokens: int,
+    tokenizer=None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Turn sections into indexable documents (same payload shape as the Chapter 1 content)
+    Sizes are in tokens of tokenizer (the embedding model's); without one, in regex tokens
+    scaled down by REGEX_TOKEN_SAFETY_FACTOR
+    """
+    if tokenizer is not None:
+        token_spans = tokenizer_token_spans(tokenizer)
+    else:
+        token_spans = regex_token_spans
+        chunk_tokens = max(1, int(chunk_tokens / REGEX_TOKEN_SAFETY_FACTOR))
+        overlap_tokens = int(overlap_tokens / REGEX_TOKEN_SAFETY_FACTOR)
+    for section in sections:
+        week = _week(section)
+        for i, content in enumerate(split_tokens(section.text, chunk_tokens, overlap_tokens, token_spans)):
+            source = f"{section.path}#{section.anchor}:{i}"
+            metadata = {
+                "section": section.title,
+                "week": week,
+                "topic": section.heading,
+                "source": source
+            }
+            yield {
+                "content": content,
+                "section": section.title,
+                "week": week,
+                "topic": section.heading,
+                "source": source,
+                "metadata": metadata
+            }
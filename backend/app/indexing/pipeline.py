@@ -0,0 +1,287 @@
+"""
+Ingestion Pipeline - Streaming documents -> batched embeddings -> vector store
+Documents are pulled lazily in fixed-size batches; embedding the next batch overlaps
+with a bounded number of in-flight upserts, so memory stays flat with corpus size
+"""
+
+from dataclasses import dataclass, field
+from typing import Iterator, Iterable, List, Dict, Any, Optional, Callable, Awaitable, Set, TypeVar
+from itertools import islice
+import asyncio
+import random
+import sys
+import time
+import logging
+
+import openai
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+
+from app.embeddings.service import EmbeddingOverloadedError
+from app.indexing.checkpoint import IngestCheckpoint
+from app.indexing.manifest import IndexManifest, chunk_key, document_point_id
+
+logger = logging.getLogger(__name__)
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Consecutive lists of up to size items"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+T = TypeVar("T")
+
+_TRANSIENT_ERRORS = (
+    asyncio.TimeoutError,
+    ConnectionError,
+    TimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    ResponseHandlingException,
+    EmbeddingOverloadedError,
+)
+
+
+def is_transient(error: BaseException) -> bool:
+    """Errors worth retrying: timeouts, dropped connections, rate limits and 5xx responses"""
+    if isinstance(error, _TRANSIENT_ERRORS):
+        return True
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Server-suggested delay (Retry-After header) if there is one"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or getattr(error, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def with_retries(
+    operation: Callable[[], Awaitable[T]],
+    description: str,
+    max_retries: int,
+    base_delay: float,
+    max_delay: float
+) -> T:
+    """Run operation, retrying transient errors with exponential backoff and jitter"""
+    attempt = 0
+    while True:
+        try:
+            return await operation()
+        except Exception as e:
+            if attempt >= max_retries or not is_transient(e):
+                raise
+            delay = _retry_after(e) or min(max_delay, base_delay * 2 ** attempt)
+            delay = min(max_delay, delay) * random.uniform(0.8, 1.2)
+            attempt += 1
+            logger.warning(f"{description} failed ({type(e).__name__}: {str(e)}), "
+                           f"retry {attempt}/{max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@dataclass
+class IngestionStats:
+    """Counters and timings for one ingestion run"""
+    chunks: int = 0
+    embedded: int = 0
+    added: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    batches: int = 0
+    retries: int = 0
+    embed_ms: List[float] = field(default_factory=list)
+    upsert_ms: List[float] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+    elapsed_s: float = 0.0
+
+    def _rate(self) -> float:
+        elapsed = self.elapsed_s or (time.perf_counter() - self.started)
+        return self.chunks / elapsed if elapsed > 0 else 0.0
+
+    @staticmethod
+    def _avg(values: List[float]) -> float:
+        return sum(values) / len(values) if values else 0.0
+
+    def progress(self) -> str:
+        return (f"{self.chunks} chunks ({self.embedded} embedded, {self.unchanged} unchanged), "
+                f"{self._rate():.1f} chunks/s")
+
+    def diff_summary(self) -> str:
+        return (f"added: {self.added}, changed: {self.changed}, "
+                f"removed: {self.removed}, unchanged: {self.unchanged}")
+
+    def report(self) -> str:
+        lines = [
+            f"Chunks read:        {self.chunks} ({self.embedded} embedded, {self.unchanged} unchanged)",
+            f"Batches:            {self.batches} ({self.retries} retried calls)",
+            f"Wall time:          {self.elapsed_s:.2f}s",
+            f"Throughput:         {self._rate():.1f} chunks/s",
+            f"Embed ms/batch:     avg {self._avg(self.embed_ms):.1f}, max {max(self.embed_ms, default=0.0):.1f}",
+            f"Upsert ms/batch:    avg {self._avg(self.upsert_ms):.1f}, max {max(self.upsert_ms, default=0.0):.1f}",
+        ]
+        peak = _peak_rss_mb()
+        if peak is not None:
+            lines.append(f"Peak RSS:           {peak:.0f} MB")
+        return "\n".join(lines)
+
+
+@dataclass
+class IngestionResult:
+    """What the run changed"""
+    stats: IngestionStats
+    seen_keys: Set[str]
+    stale_ids: List[str]
+    removed_keys: List[str]
+
+
+async def ingest_documents(
+    documents: Iterable[Dict[str, Any]],
+    encode_batch: Callable[[List[str]], Awaitable[List[List[float]]]],
+    vector_store,
+    manifest: IndexManifest,
+    batch_size: int = 64,
+    upsert_concurrency: int = 4,
+    on_progress: Optional[Callable[[IngestionStats], None]] = None,
+    on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    checkpoint: Optional[IngestCheckpoint] = None,
+    checkpoint_path: str = "",
+    checkpoint_interval_s: float = 10.0,
+    max_retries: int = 0,
+    retry_base_delay: float = 1.0,
+    retry_max_delay: float = 30.0
+) -> IngestionResult:
+    """
+    Embed and upsert new or changed documents batch by batch
+    Unchanged chunks (per the manifest) are skipped; the old points of changed and
+    removed chunks (and those of interrupted runs) are returned as stale_ids for the caller to delete.
+    on_batch sees every batch as read, unchanged chunks included (e.g. to build other indexes in the same pass).
+    With a checkpoint, the manifest and checkpoint are saved every checkpoint_interval_s
+    and on interruption, so a rerun skips every batch that was already stored
+    """
+    stats = IngestionStats()
+    seen: Set[str] = set()
+    live_ids: Set[str] = set()
+    stale: List[str] = []
+    in_flight: Set[asyncio.Task] = set()
+    slots = asyncio.Semaphore(max(1, upsert_concurrency))
+
+    async def retrying(operation, description: str):
+        async def attempt():
+            try:
+                return await operation()
+            except Exception as e:
+                if is_transient(e):
+                    stats.retries += 1
+                raise
+        return await with_retries(attempt, description, max_retries, retry_base_delay, retry_max_delay)
+
+    async def upsert(batch_number: int, pending: List[Dict[str, Any]], embeddings: List[List[float]]):
+        try:
+            started = time.perf_counter()
+            await retrying(lambda: vector_store.upsert_documents(pending, embeddings), f"Upsert of batch {batch_number}")
+            stats.upsert_ms.append((time.perf_counter() - started) * 1000)
+            # Only recorded once the points are really stored
+            manifest.record(pending)
+        finally:
+            slots.release()
+
+    last_checkpoint = time.perf_counter()
+
+    async def save_checkpoint():
+        if checkpoint is None:
+            return
+        checkpoint.batches_done = stats.batches
+        checkpoint.chunks_done = stats.chunks
+        checkpoint.add_stale(stale)
+        # Vectors first, so the manifest never lists points that were not persisted
+        await vector_store.flush()
+        manifest.save()
+        checkpoint.save(checkpoint_path)
+
+    try:
+        for batch in batched(documents, batch_size):
+            stats.batches += 1
+            stats.chunks += len(batch)
+            if on_batch:
+                on_batch(batch)
+            pending = []
+            for doc in batch:
+                seen.add(chunk_key(doc))
+                live_ids.add(document_point_id(doc))
+                status, stale_id = manifest.status(doc)
+                if status == "unchanged":
+                    stats.unchanged += 1
+                    continue
+                if status == "added":
+                    stats.added += 1
+                else:
+                    stats.changed += 1
+                pending.append(doc)
+                if stale_id:
+                    stale.append(stale_id)
+
+            if pending:
+                started = time.perf_counter()
+                texts = [doc["content"] for doc in pending]
+                embeddings = await retrying(lambda: encode_batch(texts), f"Embedding of batch {stats.batches}")
+                stats.embed_ms.append((time.perf_counter() - started) * 1000)
+                stats.embedded += len(pending)
+
+                # Backpressure: wait for a free upsert slot before reading further
+                await slots.acquire()
+                in_flight.add(asyncio.create_task(upsert(stats.batches, pending, embeddings)))
+
+                # Surface upsert failures early instead of after the whole corpus
+                for done in [task for task in in_flight if task.done()]:
+                    in_flight.discard(done)
+                    done.result()
+
+            if on_progress:
+                on_progress(stats)
+            if checkpoint is not None and time.perf_counter() - last_checkpoint >= checkpoint_interval_s:
+                await save_checkpoint()
+                last_checkpoint = time.perf_counter()
+
+        if in_flight:
+            await asyncio.gather(*in_flight)
+    except BaseException:
+        for task in in_flight:
+            task.cancel()
+        # Let cancelled upserts settle, then keep whatever was stored
+        await asyncio.gather(*in_flight, return_exceptions=True)
+        await save_checkpoint()
+        raise
+
+    stats.elapsed_s = time.perf_counter() - stats.started
+
+    removed_keys = [key for key in manifest.chunks if key not in seen]
+    stats.removed = len(removed_keys)
+    stale.extend(manifest.chunks[key]["id"] for key in removed_keys)
+    if checkpoint is not None:
+        # Include stale points left by interrupted runs
+        checkpoint.add_stale(stale)
+        stale = checkpoint.stale_ids
+    # Never delete a point a current document still maps to
+    stale_ids = [point_id for point_id in stale if point_id not in live_ids]
+    return IngestionResult(stats=stats, seen_keys=seen, stale_ids=stale_ids, removed_keys=removed_keys)
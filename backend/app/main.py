@@ -5,6 +5,7 @@ Physical AI & Humanoid Robotics - Chapter 1 Testing
 
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
 import logging
@@ -12,6 +13,13 @@ import logging
 from app.config import settings
 from app.auth.routes import router as auth_router
 from app.chat.routes import router as chat_router
+from app.chat.rag_engine import rag_engine
+from app.chat.semantic_cache import semantic_cache
+from app.chat.stages import stage_stats
+from app.chat.conversation_writer import conversation_writer
+from app.chat.llm_gateway import llm_gateway
+from app.openai_client import close_openai_client
+from app.chat.subagents import personalizer, translator, code_explainer
 import app.db_selector as db_selector
 
 # Configure logging
@@ -24,6 +32,8 @@ async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     # Startup
     logger.info("Starting Physical AI RAG Chatbot Backend")
+    app.state.ready = False
+    app.state.warmup_ms = []
 
     # Try Neon Postgres, fallback to local SQLite
     try:
@@ -49,16 +59,43 @@ async def lifespan(app: FastAPI):
         app.state.close_qdrant = close_qdrant
     except Exception as e:
         logger.warning(f"Failed to connect to Qdrant Cloud: {str(e)}")
-        logger.info("RAG retrieval will use fallback mode")
+        logger.info("RAG retrieval will use the local vector store")
+        from app.database.local_vectors import init_local_vectors, close_local_vectors
+        await init_local_vectors()
         db_selector.use_local_qdrant = True
-        app.state.close_qdrant = lambda: None
-
+        app.state.close_qdrant = close_local_vectors
+
+    # Lexical index for hybrid retrieval (written by scripts/index_chapter1.py)
+    from app.database.lexical_index import load_lexical_index
+    load_lexical_index()
+
+    # Load the tokenizer for prompt budgeting (may download its encoding) before the first request
+    from app.chat.token_budget import get_encoder
+    get_encoder()
+
+    # Preload and warm up the embedding model (disabled on Vercel - keeps lazy loading)
+    if settings.EMBEDDING_PRELOAD:
+        try:
+            app.state.warmup_ms = await rag_engine.embedding_service.warm_up(
+                settings.EMBEDDING_WARMUP_ITERATIONS
+            )
+        except Exception as e:
+            logger.warning(f"Embedding warm-up failed, falling back to lazy loading: {str(e)}")
+
+    app.state.ready = True
     logger.info("Backend startup complete!")
 
     yield
 
     # Shutdown
     logger.info("Shutting down backend")
+    # Pending conversation turns and summaries must be written before the database closes
+    await rag_engine.context_manager.summarizer.close()
+    await conversation_writer.close()
+    await rag_engine.embedding_service.close()
+    await close_openai_client()
+    translator.cache.close()
+    personalizer.cache.close()
     if hasattr(app.state, 'close_db'):
         await app.state.close_db()
     if hasattr(app.state, 'close_qdrant'):
@@ -111,5 +148,36 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint - ready once startup and embedding warm-up have finished"""
+    ready = getattr(app.state, "ready", False)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "ready": ready,
+            "embedding_preload": settings.EMBEDDING_PRELOAD,
+            "warmup_ms": getattr(app.state, "warmup_ms", [])
+        }
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """Performance metrics for tuning"""
+    return {
+        "embeddings": rag_engine.embedding_service.get_stats(),
+        "semantic_cache": semantic_cache.get_stats(),
+        "stages": stage_stats.snapshot(),
+        "llm_gateway": llm_gateway.get_stats(),
+        "single_flight": rag_engine.single_flight.get_stats(),
+        "translation_cache": translator.cache.get_stats(),
+        "personalization_cache": personalizer.cache.get_stats(),
+        "code_explain_cache": code_explainer.cache.get_stats(),
+        "conversation_writer": conversation_writer.get_stats(),
+        "conversation_summary": rag_engine.context_manager.summarizer.get_stats()
+    }
+
+
 # Vercel serverless handler
 handler = app
@@ -0,0 +1,78 @@
+"""
+OpenAI Client - One process-wide AsyncOpenAI client on a tuned HTTP connection pool
+Chat, subagents, summaries and embeddings share its keep-alive connections (and TLS
+sessions); the pool is closed in the app lifespan
+"""
+
+from typing import Dict, Optional
+import logging
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[AsyncOpenAI] = None
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    if not settings.OPENAI_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("OPENAI_HTTP2 is set but the h2 package is not installed - using HTTP/1.1")
+        return False
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """httpx client with the configured pool limits, timeouts and protocol"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_S
+        ),
+        timeout=httpx.Timeout(settings.OPENAI_TIMEOUT_S, connect=settings.OPENAI_CONNECT_TIMEOUT_S),
+        http2=_http2_available(),
+        follow_redirects=True
+    )
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """The shared AsyncOpenAI client (created on first use)"""
+    global _client, _http_client
+    if _client is None:
+        _http_client = create_http_client()
+        _client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL or None,
+            http_client=_http_client
+        )
+    return _client
+
+
+async def close_openai_client():
+    """Close the pooled connections (clients derived with with_options() share them)"""
+    global _client, _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        logger.info("OpenAI connection pool closed")
+    _client = None
+    _http_client = None
+
+
+def get_pool_config() -> Dict:
+    """Pool settings in effect"""
+    return {
+        "max_connections": settings.OPENAI_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        "keepalive_expiry_s": settings.OPENAI_KEEPALIVE_EXPIRY_S,
+        "http2": _http2_available(),
+        "timeout_s": settings.OPENAI_TIMEOUT_S,
+        "connect_timeout_s": settings.OPENAI_CONNECT_TIMEOUT_S
+    }
@@ -0,0 +1,204 @@
+"""
+Chat Streaming Benchmark - time-to-first-token of /chat/stream vs /chat/message
+Runs the backend against a fake OpenAI server that streams completions with a
+configurable first-token latency and per-token delay, so the numbers are
+reproducible and cost nothing.
+
+Run: python scripts/benchmark_chat_stream.py [--tokens 200] [--first-token-ms 300] [--token-ms 15]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+FAKE_OPENAI_PORT = 8765
+BACKEND_PORT = 8766
+
+
+def create_fake_openai(tokens: int, first_token_ms: float, token_ms: float) -> FastAPI:
+    """Minimal OpenAI-compatible server: chat completions (plain and streamed) and embeddings"""
+    fake = FastAPI()
+    words = [f"word{i} " for i in range(tokens)]
+
+    @fake.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        created = int(time.time())
+        usage = {"prompt_tokens": 50, "completion_tokens": tokens, "total_tokens": 50 + tokens}
+
+        if not body.get("stream"):
+            await asyncio.sleep((first_token_ms + token_ms * tokens) / 1000)
+            return {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": created, "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(words)}}],
+                "usage": usage
+            }
+
+        async def chunks():
+            def chunk(delta, finish_reason=None, chunk_usage=None):
+                choices = [] if chunk_usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                data = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created,
+                        "model": body["model"], "choices": choices}
+                if chunk_usage:
+                    data["usage"] = chunk_usage
+                return f"data: {json.dumps(data)}\n\n"
+
+            await asyncio.sleep(first_token_ms / 1000)
+            yield chunk({"role": "assistant", "content": ""})
+            for word in words:
+                yield chunk({"content": word})
+                await asyncio.sleep(token_ms / 1000)
+            yield chunk({}, finish_reason="stop")
+            if body.get("stream_options", {}).get("include_usage"):
+                yield chunk({}, chunk_usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    @fake.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        return {
+            "object": "list", "model": body["model"],
+            "data": [{"object": "embedding", "index": i, "embedding": [random.uniform(-1, 1) for _ in range(1536)]}
+                     for i in range(len(inputs))],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0}
+        }
+
+    return fake
+
+
+async def _serve(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return server
+
+
+async def _auth_token() -> str:
+    """JWT for a benchmark user in whichever database the backend connected to"""
+    import app.db_selector as db_selector
+    from app.auth.routes import create_access_token
+    from app.auth.schemas import UserCreate
+
+    db = db_selector.get_db_module()
+    email = "stream-benchmark@example.com"
+    user = await db.get_user_by_email(email)
+    if not user:
+        if db_selector.use_local_db:
+            user = await db.create_user(email=email, name="Stream Benchmark")
+        else:
+            user = await db.create_user(UserCreate(email=email, name="Stream Benchmark"))
+    return create_access_token({"sub": str(user["id"]), "email": email})
+
+
+async def _time_message(client: httpx.AsyncClient, question: str) -> dict:
+    started = time.perf_counter()
+    response = await client.post("/chat/message", json={"message": question})
+    response.raise_for_status()
+    total = (time.perf_counter() - started) * 1000
+    # Nothing is visible until the full body arrives
+    return {"sources_ms": total, "first_token_ms": total, "total_ms": total}
+
+
+async def _time_stream(client: httpx.AsyncClient, question: str) -> dict:
+    started = time.perf_counter()
+    timings = {}
+    async with client.stream("POST", "/chat/stream", json={"message": question}) as response:
+        response.raise_for_status()
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                elapsed = (time.perf_counter() - started) * 1000
+                if event == "sources":
+                    timings.setdefault("sources_ms", elapsed)
+                elif event == "token":
+                    timings.setdefault("first_token_ms", elapsed)
+                elif event == "done":
+                    timings["usage"] = json.loads(line[len("data: "):])
+                elif event == "error":
+                    raise RuntimeError(line)
+    timings["total_ms"] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+async def benchmark(args):
+    fake_server = await _serve(create_fake_openai(args.tokens, args.first_token_ms, args.token_ms), FAKE_OPENAI_PORT)
+
+    from app.main import app
+    backend_server = await _serve(app, BACKEND_PORT)
+
+    try:
+        headers = {"Authorization": f"Bearer {await _auth_token()}"}
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{BACKEND_PORT}", headers=headers, timeout=60) as client:
+            question = "What is ROS 2?"
+            await _time_stream(client, question)  # warm-up
+
+            results = {"message": [], "stream": []}
+            usage = None
+            for _ in range(args.rounds):
+                results["message"].append(await _time_message(client, question))
+                timings = await _time_stream(client, question)
+                usage = timings.pop("usage", None)
+                results["stream"].append(timings)
+
+        print(f"\n{'endpoint':<16}{'sources ms':>12}{'first token ms':>16}{'total ms':>12}")
+        for name, runs in results.items():
+            medians = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            print(f"{'/chat/' + name:<16}{medians['sources_ms']:>12.0f}{medians['first_token_ms']:>16.0f}"
+                  f"{medians['total_ms']:>12.0f}")
+
+        message_ttft = statistics.median(run["first_token_ms"] for run in results["message"])
+        stream_ttft = statistics.median(run["first_token_ms"] for run in results["stream"])
+        print(f"\nTime-to-first-token: {message_ttft / stream_ttft:.1f}x faster when streaming")
+        print(f"Final stream event: {usage}")
+    finally:
+        backend_server.should_exit = True
+        fake_server.should_exit = True
+        await asyncio.sleep(0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming vs blocking chat responses")
+    parser.add_argument("--tokens", type=int, default=200, help="Completion length from the fake server")
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=15)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    # Point the backend's OpenAI clients at the fake server before the app is imported
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{FAKE_OPENAI_PORT}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+    # Every round asks the same question - measure the LLM path, not semantic cache hits
+    os.environ.setdefault("SEMANTIC_CACHE_ENABLED", "false")
+
+    print("=" * 60)
+    print("CHAT STREAMING BENCHMARK")
+    print("=" * 60)
+    print(f"Fake completion: {args.tokens} tokens, first token after {args.first_token_ms:.0f}ms, "
+          f"{args.token_ms:.0f}ms per token")
+
+    asyncio.run(benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Embedding Backend Benchmark - torch (sentence-transformers) vs ONNX fp32 vs ONNX int8
+Reports import/load time, single-query latency, batch throughput, peak RSS and
+cosine agreement with the torch vectors. Each backend runs in its own process so
+memory numbers are not polluted by the others.
+
+Run: python scripts/benchmark_embeddings.py [--backends local,onnx,onnx-int8]
+"""
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+SAMPLE_QUERIES = [
+    "What is ROS 2?",
+    "What is URDF?",
+    "How does Nav2 plan paths around obstacles?",
+    "Which ROS message type carries LiDAR point clouds?",
+    "What does isaac_ros_nvblox do?",
+    "Explain rclpy publishers and subscribers",
+    "How are IMU sensors simulated in Gazebo?",
+    "What is a Vision-Language-Action model?",
+]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_worker(backend: str, runs: int, batch_size: int) -> dict:
+    """Benchmark one backend inside this process"""
+    started = time.perf_counter()
+    if backend == "local":
+        from sentence_transformers import SentenceTransformer  # noqa: F401 - timing the torch import
+    else:
+        import onnxruntime  # noqa: F401
+        import tokenizers  # noqa: F401
+    import_s = time.perf_counter() - started
+
+    from app.config import settings
+    from scripts.index_chapter1 import CHAPTER_1_CONTENT
+
+    started = time.perf_counter()
+    if backend == "local":
+        from app.embeddings.service import get_local_embedding_model
+        model = get_local_embedding_model()
+    else:
+        from app.embeddings.onnx_backend import OnnxEmbeddingModel
+        model = OnnxEmbeddingModel(
+            settings.ONNX_MODEL_DIR,
+            quantized=(backend == "onnx-int8"),
+            num_threads=settings.ONNX_NUM_THREADS
+        )
+    load_s = time.perf_counter() - started
+
+    def encode(texts):
+        return model.encode(texts, convert_to_tensor=False)
+
+    encode(SAMPLE_QUERIES[:1])  # warm-up
+
+    latencies = []
+    for i in range(runs):
+        query = SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]
+        started = time.perf_counter()
+        encode([query])
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    corpus = [" ".join(item["content"].split()) for item in CHAPTER_1_CONTENT]
+    batches = [corpus[i:i + batch_size] for i in range(0, len(corpus), batch_size)]
+    started = time.perf_counter()
+    for _ in range(max(1, runs // 10)):
+        for batch in batches:
+            encode(batch)
+    elapsed = time.perf_counter() - started
+    throughput = len(corpus) * max(1, runs // 10) / elapsed
+
+    vectors = encode(SAMPLE_QUERIES + corpus)
+
+    return {
+        "backend": backend,
+        "import_s": round(import_s, 3),
+        "load_s": round(load_s, 3),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        "throughput_per_s": round(throughput, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "vectors": [list(map(float, v)) for v in vectors],
+    }
+
+
+def cosine_stats(reference: list, candidate: list) -> tuple:
+    """Min and mean cosine similarity between matching rows"""
+    import numpy as np
+    a = np.asarray(reference, dtype=np.float32)
+    b = np.asarray(candidate, dtype=np.float32)
+    a /= np.linalg.norm(a, axis=1, keepdims=True)
+    b /= np.linalg.norm(b, axis=1, keepdims=True)
+    cosine = (a * b).sum(axis=1)
+    return float(cosine.min()), float(cosine.mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("--backends", default="local,onnx,onnx-int8")
+    parser.add_argument("--runs", type=int, default=200, help="Single-query encodes per backend")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.runs, args.batch_size)))
+        return
+
+    from app.embeddings.onnx_backend import COSINE_TOLERANCE
+
+    print("=" * 78)
+    print("EMBEDDING BACKEND BENCHMARK")
+    print("=" * 78)
+
+    results = {}
+    for backend in args.backends.split(","):
+        print(f"\nRunning {backend}...")
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", backend,
+             "--runs", str(args.runs), "--batch-size", str(args.batch_size)],
+            capture_output=True, text=True, cwd=str(Path(__file__).parent.parent)
+        )
+        if proc.returncode != 0:
+            print(f"  FAILED:\n{proc.stderr.strip()[-2000:]}")
+            continue
+        results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    print(f"\n{'backend':<11}{'import s':>10}{'load s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'texts/s':>10}{'RSS MB':>9}{'min cos':>10}")
+    reference = results.get("local")
+    failed = False
+    for backend, r in results.items():
+        agreement = ""
+        if reference and backend != "local":
+            min_cos, _ = cosine_stats(reference["vectors"], r["vectors"])
+            tolerance = COSINE_TOLERANCE["int8" if backend == "onnx-int8" else "fp32"]
+            ok = min_cos >= 1 - tolerance
+            failed = failed or not ok
+            agreement = f"{min_cos:.5f}{'' if ok else ' FAIL'}"
+        print(f"{backend:<11}{r['import_s']:>10.2f}{r['load_s']:>9.2f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+              f"{r['throughput_per_s']:>10.1f}{r['peak_rss_mb']:>9.1f}{agreement:>10}")
+
+    print(f"\nCosine tolerance vs torch: fp32 >= {1 - COSINE_TOLERANCE['fp32']}, "
+          f"int8 >= {1 - COSINE_TOLERANCE['int8']}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+OpenAI Connection Pool Benchmark - shared tuned pool vs separate default clients
+Sends bursts of concurrent chat completions to a local stub server, with idle pauses
+between them like users between questions, and counts the TCP connections the stub sees.
+The old setup (one AsyncOpenAI per module, httpx's 5s keep-alive expiry) reconnects after
+every pause; the shared client from app.openai_client keeps its connections.
+
+The stub speaks plain HTTP/1.1, so this measures connection reuse and TCP setup only -
+against api.openai.com every new connection also pays a TLS handshake (one or more RTTs).
+
+Run: python scripts/benchmark_openai_pool.py [--concurrency 32] [--bursts 5] [--pause-s 6]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+import uvicorn
+from fastapi import Request
+
+from benchmark_chat_stream import create_fake_openai
+
+STUB_PORT = 8767
+
+
+def create_counting_stub(latency_ms: float):
+    """Fake OpenAI server that counts the TCP connections it has seen (GET /connections)"""
+    stub = create_fake_openai(tokens=20, first_token_ms=latency_ms, token_ms=0)
+    connections = set()
+
+    @stub.middleware("http")
+    async def record_connection(request: Request, call_next):
+        connections.add((request.client.host, request.client.port))
+        return await call_next(request)
+
+    @stub.get("/connections")
+    async def connection_count():
+        return {"connections": len(connections)}
+
+    return stub
+
+
+def _run_stub(latency_ms: float):
+    # Own process, so the stub's CPU time doesn't distort client-side latencies. Keeps idle
+    # connections open like a load balancer would (uvicorn's own default closes them after 5s)
+    uvicorn.run(
+        create_counting_stub(latency_ms), host="127.0.0.1", port=STUB_PORT,
+        log_level="warning", timeout_keep_alive=120
+    )
+
+
+async def _connections_seen(control: httpx.AsyncClient) -> int:
+    return (await control.get("/connections")).json()["connections"]
+
+
+async def _run(name: str, clients: list, args, control: httpx.AsyncClient) -> dict:
+    async def call(client) -> float:
+        started = time.perf_counter()
+        await client.chat.completions.create(
+            model="gpt-4o", messages=[{"role": "user", "content": "ping"}], max_tokens=20
+        )
+        return (time.perf_counter() - started) * 1000
+
+    # Warm-up burst opens the pool(s)
+    await asyncio.gather(*[call(clients[i % len(clients)]) for i in range(args.concurrency)])
+    connections_before = await _connections_seen(control)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(args.bursts):
+        latencies += await asyncio.gather(*[call(clients[i % len(clients)]) for i in range(args.concurrency)])
+        # Idle connections past the keep-alive expiry (or beyond the keep-alive limit) are closed
+        await asyncio.sleep(args.pause_s)
+    elapsed = time.perf_counter() - started - args.bursts * args.pause_s
+
+    ordered = sorted(latencies)
+    return {
+        "name": name,
+        "requests": len(latencies),
+        "new_connections": await _connections_seen(control) - connections_before,
+        "p50_ms": statistics.median(ordered),
+        "p95_ms": ordered[int(0.95 * (len(ordered) - 1))],
+        "throughput": len(latencies) / elapsed
+    }
+
+
+async def benchmark(args):
+    from openai import AsyncOpenAI
+    from app.openai_client import get_openai_client, close_openai_client, get_pool_config
+
+    base_url = f"http://127.0.0.1:{STUB_PORT}/v1"
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{STUB_PORT}") as control:
+        for _ in range(100):
+            try:
+                await control.get("/connections")
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+
+        # Before: rag_engine and subagents each built a default AsyncOpenAI client
+        separate = [AsyncOpenAI(api_key="sk-fake", base_url=base_url) for _ in range(2)]
+        before = await _run("separate default clients", separate, args, control)
+        for client in separate:
+            await client.close()
+
+        after = await _run("shared tuned pool", [get_openai_client()], args, control)
+        pool = get_pool_config()
+        await close_openai_client()
+
+    print(f"\nShared pool: {pool}")
+    print(f"\n{'client setup':<28}{'requests':>10}{'new conns':>11}{'p50 ms':>9}{'p95 ms':>9}{'req/s':>9}")
+    for result in (before, after):
+        print(f"{result['name']:<28}{result['requests']:>10}{result['new_connections']:>11}"
+              f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['throughput']:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OpenAI connection pooling against a local stub")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent requests per burst")
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=300, help="Stub response latency")
+    parser.add_argument("--pause-s", type=float, default=6, help="Idle time between bursts")
+    args = parser.parse_args()
+
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{STUB_PORT}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+    print("=" * 60)
+    print("OPENAI CONNECTION POOL BENCHMARK")
+    print("=" * 60)
+    print(f"{args.bursts} bursts of {args.concurrency} concurrent completions, "
+          f"{args.latency_ms:.0f}ms stub latency, {args.pause_s:.0f}s apart")
+
+    stub = multiprocessing.Process(target=_run_stub, args=(args.latency_ms,), daemon=True)
+    stub.start()
+    try:
+        asyncio.run(benchmark(args))
+    finally:
+        stub.terminate()
+        stub.join()
+
+
+if __name__ == "__main__":
+    main()
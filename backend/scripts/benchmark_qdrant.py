@@ -0,0 +1,141 @@
+"""
+Qdrant Concurrency Benchmark - sync client (blocking the loop) vs async client
+Fires N concurrent searches from asyncio tasks, the way concurrent /chat/message
+requests do, and reports wall time, throughput and event-loop stall.
+
+Start a throwaway local Qdrant first:
+    docker run --rm -p 6333:6333 -p 6334:6334 qdrant/qdrant
+Run: python scripts/benchmark_qdrant.py [--url http://localhost:6333] [--grpc] [--concurrency 64]
+(--url :memory: only times the embedded async client - useful as a smoke test, not a comparison)
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+COLLECTION = "benchmark_concurrency"
+DIMENSION = 384
+
+
+def _client_kwargs(args) -> dict:
+    if args.url == ":memory:":
+        return {"location": ":memory:"}
+    return {"url": args.url, "prefer_grpc": args.grpc, "timeout": 30}
+
+
+def _random_vector() -> list:
+    return [random.uniform(-1, 1) for _ in range(DIMENSION)]
+
+
+async def _loop_monitor(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Largest delay (ms) between scheduled heartbeats - how long the loop was blocked"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, (time.perf_counter() - started - interval) * 1000)
+    return worst
+
+
+async def _measure(run_queries, concurrency: int) -> dict:
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_loop_monitor(stop))
+    started = time.perf_counter()
+    await run_queries()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    stall_ms = await monitor
+    return {
+        "wall_s": elapsed,
+        "qps": concurrency / elapsed,
+        "max_loop_stall_ms": stall_ms,
+    }
+
+
+async def benchmark(args):
+    queries = [_random_vector() for _ in range(args.concurrency)]
+
+    # Seed the collection once with the async client
+    async_client = AsyncQdrantClient(**_client_kwargs(args))
+    await async_client.recreate_collection(
+        collection_name=COLLECTION,
+        vectors_config=VectorParams(size=DIMENSION, distance=Distance.COSINE)
+    )
+    for start in range(0, args.points, 256):
+        await async_client.upsert(
+            collection_name=COLLECTION,
+            points=[
+                PointStruct(id=i, vector=_random_vector(), payload={"content": f"doc {i}"})
+                for i in range(start, min(start + 256, args.points))
+            ]
+        )
+
+    if args.url == ":memory:":
+        # The embedded sync client cannot see the async client's in-process data
+        sync_client = None
+    else:
+        sync_client = QdrantClient(**_client_kwargs(args))
+
+    async def sync_searches():
+        async def one(vector):
+            # What the old code did: a blocking call inside an async function
+            sync_client.search(collection_name=COLLECTION, query_vector=vector, limit=5)
+        await asyncio.gather(*[one(v) for v in queries])
+
+    async def async_searches():
+        await asyncio.gather(*[
+            async_client.search(collection_name=COLLECTION, query_vector=v, limit=5)
+            for v in queries
+        ])
+
+    results = {}
+    for _ in range(args.rounds):
+        if sync_client is not None:
+            results.setdefault("sync", []).append(await _measure(sync_searches, args.concurrency))
+        results.setdefault("async", []).append(await _measure(async_searches, args.concurrency))
+
+    print(f"\n{'client':<8}{'wall s':>10}{'queries/s':>12}{'loop stall ms':>16}")
+    for name, runs in results.items():
+        best = min(runs, key=lambda r: r["wall_s"])
+        print(f"{name:<8}{best['wall_s']:>10.3f}{best['qps']:>12.1f}{best['max_loop_stall_ms']:>16.1f}")
+
+    if "sync" in results:
+        sync_best = min(r["wall_s"] for r in results["sync"])
+        async_best = min(r["wall_s"] for r in results["async"])
+        print(f"\nConcurrency gain: {sync_best / async_best:.2f}x")
+
+    await async_client.delete_collection(COLLECTION)
+    await async_client.close()
+    if sync_client is not None:
+        sync_client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async Qdrant search under concurrency")
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--grpc", action="store_true", help="Prefer gRPC transport")
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("QDRANT CONCURRENCY BENCHMARK")
+    print("=" * 60)
+    print(f"Target: {args.url} ({'gRPC' if args.grpc else 'REST'}), {args.points} points, "
+          f"{args.concurrency} concurrent searches")
+
+    asyncio.run(benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
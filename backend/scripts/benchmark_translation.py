@@ -0,0 +1,151 @@
+"""
+Translation Benchmark - one request per passage vs parallel segments
+Translates a long markdown passage against a local stub whose reply time grows with the
+length of the text it is given (output is generated one token at a time), once as a single
+request (the old behaviour) and once split into segments translated concurrently.
+The stub echoes the text back, so placeholders and reassembly are checked too.
+
+Run: python scripts/benchmark_translation.py [--file chapter.md] [--token-ms 10] [--concurrency 4]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+
+STUB_PORT = 8768
+
+SAMPLE_SECTION = """## {n}. Perception pipeline
+
+A humanoid robot fuses camera, IMU and joint encoder data before it plans a step. In ROS 2
+each sensor publishes on its own topic, and `rclpy` nodes subscribe with a QoS profile that
+matches the sensor rate. Simulation in Gazebo or NVIDIA Isaac lets you test the pipeline
+before it runs on hardware.
+
+The controller runs at a fixed rate, so every callback has a time budget. Heavy work such as
+point cloud filtering belongs in its own node, and results are shared over topics rather than
+global state. See https://docs.ros.org for the executor model.
+
+```python
+class BalanceNode(Node):
+    def __init__(self):
+        super().__init__("balance")
+        self.create_subscription(Imu, "/imu", self.on_imu, 10)
+```
+
+Tune the gains in simulation first, then reduce them on the real robot until it stays stable.
+"""
+
+
+def create_echo_stub(first_token_ms: float, token_ms: float) -> FastAPI:
+    """Fake chat completions that 'translate' by echoing the content, at token_ms per output token"""
+    stub = FastAPI()
+
+    @stub.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        content = body["messages"][-1]["content"].split("Content:\n", 1)[-1]
+        tokens = max(1, len(content) // 4)
+        finish_reason = "stop"
+        if tokens > body["max_tokens"]:
+            tokens, content, finish_reason = body["max_tokens"], content[:4 * body["max_tokens"]], "length"
+        await asyncio.sleep((first_token_ms + token_ms * tokens) / 1000)
+        return {
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": finish_reason,
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": tokens + 60, "completion_tokens": tokens, "total_tokens": 2 * tokens + 60}
+        }
+
+    return stub
+
+
+def _run_stub(first_token_ms: float, token_ms: float):
+    uvicorn.run(create_echo_stub(first_token_ms, token_ms), host="127.0.0.1", port=STUB_PORT, log_level="warning")
+
+
+async def benchmark(content: str, args):
+    from app.config import settings
+    from app.chat.subagents import translator
+    from app.chat.llm_gateway import llm_gateway
+    from app.chat.markdown_segments import split_markdown
+    from app.openai_client import close_openai_client
+
+    settings.TRANSLATION_CACHE_ENABLED = False
+    settings.TRANSLATION_SEGMENT_CONCURRENCY = args.concurrency
+
+    async with httpx.AsyncClient() as client:
+        for _ in range(100):
+            try:
+                await client.get(f"http://127.0.0.1:{STUB_PORT}/docs")
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+
+    # Before: the whole passage in one request, capped at 1500 output tokens
+    started = time.perf_counter()
+    response = await llm_gateway.chat(
+        model=settings.OPENAI_MODEL,
+        messages=[{"role": "user", "content": f"Translate the following technical content to Urdu.\n\nContent:\n{content}"}],
+        max_tokens=1500
+    )
+    results = [("single request", 1, (time.perf_counter() - started) * 1000,
+                response.choices[0].message.content == content)]
+
+    settings.TRANSLATION_SEGMENT_TOKENS = args.segment_tokens
+    segments = [s for s in split_markdown(content, args.segment_tokens) if s.translate]
+    started = time.perf_counter()
+    translated = await translator.translate(content)
+    results.append(("parallel segments", len(segments), (time.perf_counter() - started) * 1000, translated == content))
+    await close_openai_client()
+
+    print(f"\n{'mode':<20}{'segments':>10}{'latency ms':>12}{'round-trip':>12}")
+    for name, segments, latency, intact in results:
+        print(f"{name:<20}{segments:>10}{latency:>12.0f}{'ok' if intact else 'TRUNCATED':>12}")
+    print(f"\nSpeed-up: {results[0][2] / results[1][2]:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark segmented translation against a local stub")
+    parser.add_argument("--file", help="Markdown file to translate (default: a generated 6-section passage)")
+    parser.add_argument("--sections", type=int, default=6, help="Sections in the generated passage")
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=10, help="Stub time per output token")
+    parser.add_argument("--segment-tokens", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{STUB_PORT}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+    if args.file:
+        content = Path(args.file).read_text(encoding="utf-8")
+    else:
+        content = "# Chapter 1\n\n" + "\n".join(SAMPLE_SECTION.format(n=n + 1) for n in range(args.sections))
+
+    print("=" * 60)
+    print("TRANSLATION BENCHMARK")
+    print("=" * 60)
+    print(f"{len(content)} characters, stub: {args.first_token_ms:.0f}ms + {args.token_ms:.0f}ms/token, "
+          f"{args.concurrency} segments in flight")
+
+    stub = multiprocessing.Process(target=_run_stub, args=(args.first_token_ms, args.token_ms), daemon=True)
+    stub.start()
+    try:
+        asyncio.run(benchmark(content, args))
+    finally:
+        stub.terminate()
+        stub.join()
+
+
+if __name__ == "__main__":
+    main()
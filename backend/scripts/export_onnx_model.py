@@ -0,0 +1,132 @@
+"""
+ONNX Export Script
+Exports all-MiniLM-L6-v2 to ONNX (plus an int8-quantized copy) for EMBEDDING_PROVIDER=onnx
+Needs torch + sentence-transformers once, at export time only.
+
+Run: python scripts/export_onnx_model.py [--output-dir models/all-MiniLM-L6-v2-onnx]
+"""
+
+import argparse
+import inspect
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.embeddings.onnx_backend import (
+    ONNX_MODEL_FILE,
+    ONNX_QUANTIZED_MODEL_FILE,
+    TOKENIZER_FILE,
+    OnnxEmbeddingModel,
+)
+
+
+def export_model(output_dir: Path):
+    """Export the transformer and tokenizer behind the SentenceTransformer model"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    print(f"Loading {settings.LOCAL_EMBEDDING_MODEL} with sentence-transformers...")
+    st_model = SentenceTransformer(settings.LOCAL_EMBEDDING_MODEL, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    class LastHiddenState(torch.nn.Module):
+        """Expose only last_hidden_state - pooling happens in OnnxEmbeddingModel"""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids
+            )[0]
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer.backend_tokenizer.save(str(output_dir / TOKENIZER_FILE))
+
+    sample = tokenizer(["What is ROS 2?", "URDF describes robot links and joints."], padding=True, return_tensors="pt")
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        export_kwargs["dynamo"] = False  # Keep the TorchScript exporter on newer torch releases
+
+    model_path = output_dir / ONNX_MODEL_FILE
+    torch.onnx.export(
+        LastHiddenState(transformer),
+        (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+        str(model_path),
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "token_type_ids": {0: "batch", 1: "sequence"},
+            "last_hidden_state": {0: "batch", 1: "sequence"},
+        },
+        opset_version=14,
+        **export_kwargs
+    )
+    print(f"  Exported {model_path}")
+    return st_model
+
+
+def quantize_model(output_dir: Path):
+    """Dynamic int8 quantization of the exported model"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized_path = output_dir / ONNX_QUANTIZED_MODEL_FILE
+    quantize_dynamic(
+        str(output_dir / ONNX_MODEL_FILE),
+        str(quantized_path),
+        weight_type=QuantType.QInt8
+    )
+    print(f"  Quantized {quantized_path}")
+
+
+def verify(st_model, output_dir: Path):
+    """Compare ONNX vectors with the torch pipeline"""
+    import numpy as np
+
+    texts = [
+        "What is ROS 2?",
+        "Gazebo integrates with ROS 2 via gazebo_ros packages.",
+        "Isaac ROS provides GPU-accelerated perception packages such as isaac_ros_nvblox.",
+    ]
+    reference = st_model.encode(texts, convert_to_tensor=False, normalize_embeddings=True)
+
+    for quantized in (False, True):
+        onnx_model = OnnxEmbeddingModel(str(output_dir), quantized=quantized)
+        vectors = onnx_model.encode(texts)
+        cosine = (vectors * reference).sum(axis=1)
+        label = "int8" if quantized else "fp32"
+        print(f"  {label}: min cosine vs torch = {float(np.min(cosine)):.6f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export all-MiniLM-L6-v2 to ONNX")
+    parser.add_argument("--output-dir", default=settings.ONNX_MODEL_DIR)
+    parser.add_argument("--skip-quantize", action="store_true", help="Only export the fp32 model")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
+
+    print("=" * 60)
+    print("ONNX Embedding Model Export")
+    print("=" * 60)
+
+    st_model = export_model(output_dir)
+    if not args.skip_quantize:
+        quantize_model(output_dir)
+        print("\nVerifying against sentence-transformers...")
+        verify(st_model, output_dir)
+
+    print(f"\nDone! Set EMBEDDING_PROVIDER=onnx (and ONNX_QUANTIZED=true for int8)")
+
+
+if __name__ == "__main__":
+    main()
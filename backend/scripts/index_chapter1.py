@@ -1,18 +1,32 @@
 """
-Chapter 1 Content Indexing Script
-Indexes Physical AI & Humanoid Robotics content into Qdrant
+Book Content Indexing Script
+Indexes Physical AI & Humanoid Robotics content into Qdrant - a markdown directory
+(streamed, chunked, batch-embedded) or the built-in Chapter 1 sections
+Incremental: only new or changed chunks are embedded, removed ones are deleted
+
+Checkpointed: an interrupted run continues with --resume
+
+Run: python scripts/index_chapter1.py [--docs path/to/docs] [--rebuild] [--resume]
 """
 
+import argparse
 import asyncio
 import sys
 from pathlib import Path
+from typing import Iterator
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.config import settings
-from app.database.qdrant import upsert_documents, init_qdrant
 from app.chat.rag_engine import rag_engine
+from app.database.lexical_index import LexicalIndexBuilder, save_lexical_index
+from app.embeddings.service import load_embedding_tokenizer
+from app.indexing.manifest import IndexManifest, document_point_id
+from app.indexing.markdown import read_sections, chunk_sections
+from app.indexing.checkpoint import IngestCheckpoint
+from app.indexing.pipeline import ingest_documents, with_retries, IngestionStats
+import app.db_selector as db_selector
 
 
 # Chapter 1 Content - Physical AI & Humanoid Robotics
@@ -254,66 +268,170 @@ CHAPTER_1_CONTENT = [
 ]
 
 
-async def generate_embeddings(texts: list[str]) -> list[list[float]]:
-    """Generate embeddings using HYBRID system (Local or OpenAI)"""
-    print(f"  Generating embeddings for {len(texts)} sections...")
-    print(f"  Using: {settings.EMBEDDING_PROVIDER.upper()} embeddings")
+def chapter_documents() -> Iterator[dict]:
+    """Built-in Chapter 1 sections as indexable documents"""
+    for item in CHAPTER_1_CONTENT:
+        yield {
+            "content": item["content"],
+            "section": item["metadata"]["section"],
+            "week": item["metadata"]["week"],
+            "topic": item["metadata"]["topic"],
+            "metadata": item["metadata"]
+        }
+
 
-    embeddings = []
-    for text in texts:
-        embedding = await rag_engine.generate_embedding(text)
-        embeddings.append(embedding)
+def source_documents(docs_path: str) -> Iterator[dict]:
+    """Stream documents from a markdown directory, or the built-in Chapter 1 content"""
+    if docs_path:
+        return chunk_sections(
+            read_sections(docs_path),
+            settings.INGEST_CHUNK_TOKENS,
+            settings.INGEST_CHUNK_OVERLAP,
+            tokenizer=load_embedding_tokenizer()
+        )
+    return chapter_documents()
 
-    return embeddings
 
+def print_progress(stats: IngestionStats):
+    print(f"\r  {stats.progress()}", end="", flush=True)
 
-async def index_chapter_content():
-    """Index all Chapter 1 content into Qdrant"""
+
+async def index_chapter_content(docs_path: str = "", rebuild: bool = False, resume: bool = False):
+    """Index book content (markdown directory or built-in Chapter 1) into Qdrant"""
     print("=" * 60)
-    print("Chapter 1 Content Indexing")
+    print("Book Content Indexing")
     print("=" * 60)
 
-    # Initialize Qdrant
+    if docs_path and not Path(docs_path).exists():
+        raise FileNotFoundError(f"Docs path not found: {docs_path}")
+
+    # Initialize Qdrant, fallback to the local vector store
     print("\nInitializing Qdrant connection...")
-    await init_qdrant()
+    try:
+        from app.database.qdrant import init_qdrant
+        await init_qdrant()
+        db_selector.use_local_qdrant = False
+    except Exception as e:
+        print(f"  Qdrant unavailable ({str(e)})")
+        print(f"  Falling back to local vector store: {settings.LOCAL_VECTOR_STORE_PATH}")
+        from app.database import local_vectors
+        await local_vectors.init_local_vectors()
+        # Persist once at the end instead of after every batch
+        local_vectors.autosave = False
+        db_selector.use_local_qdrant = True
+    vector_store = db_selector.get_vector_store_module()
 
-    # Prepare content
-    documents = []
-    for item in CHAPTER_1_CONTENT:
-        doc = {
-            "content": item["content"],
-            "section": item["metadata"]["section"],
-            "week": item["metadata"]["week"],
-            "topic": item["metadata"]["topic"],
-            "metadata": item["metadata"]
-        }
-        documents.append(doc)
+    backend = "local" if db_selector.use_local_qdrant else "qdrant"
+    manifest = IndexManifest.load(settings.INDEX_MANIFEST_PATH, backend)
+    source = str(Path(docs_path).resolve()) if docs_path else "builtin:chapter1"
+
+    # An interrupted run leaves a checkpoint behind
+    checkpoint = IngestCheckpoint.load(settings.INGEST_CHECKPOINT_PATH)
+    if checkpoint is not None and checkpoint.scope != manifest.scope:
+        print(f"\nIgnoring checkpoint for a different index ({checkpoint.scope})")
+        checkpoint = None
+    if checkpoint is not None and resume:
+        if checkpoint.source != source:
+            print(f"\nWarning: checkpoint was for {checkpoint.source}, resuming with {source}")
+        print(f"\nResuming run from {checkpoint.started_at}: {checkpoint.batches_done} batches "
+              f"({checkpoint.chunks_done} chunks) were processed, stored chunks are skipped")
+        # A resumed rebuild must not wipe what it already rebuilt
+        rebuild = False
+    else:
+        if checkpoint is not None:
+            print(f"\nFound an interrupted run from {checkpoint.started_at} - starting a new run (--resume continues it)")
+        pending_stale = checkpoint.stale_ids if checkpoint is not None and not rebuild else []
+        checkpoint = IngestCheckpoint(source=source, scope=manifest.scope, rebuild=rebuild)
+        checkpoint.add_stale(pending_stale)
 
-    print(f"\nPrepared {len(documents)} content sections")
+    if rebuild:
+        print("\nRebuilding: clearing the collection...")
+        await vector_store.reset_collection()
+        manifest.clear()
+        manifest.save()
+    checkpoint.save(settings.INGEST_CHECKPOINT_PATH)
 
-    # Generate embeddings
-    print("\nGenerating embeddings...")
-    texts = [doc["content"] for doc in documents]
-    embeddings = await generate_embeddings(texts)
+    print(f"\nSource: {docs_path or 'built-in Chapter 1 content'}")
+    print(f"Embeddings: {settings.EMBEDDING_PROVIDER.upper()}, batch size {settings.INGEST_BATCH_SIZE}, "
+          f"{settings.INGEST_UPSERT_CONCURRENCY} concurrent upserts")
 
-    # Upsert to Qdrant
-    print("\nUploading to Qdrant...")
-    upsert_documents(documents, embeddings)
+    # BM25 postings are built from the same stream, batch by batch
+    lexical = LexicalIndexBuilder()
+
+    def add_to_lexical_index(batch):
+        for doc in batch:
+            lexical.add(document_point_id(doc), doc)
+
+    # Stream: read -> chunk -> embed (batched, through the embedding cache) -> upsert (bounded concurrency)
+    result = await ingest_documents(
+        source_documents(docs_path),
+        rag_engine.embedding_service.embed_batch,
+        vector_store,
+        manifest,
+        batch_size=settings.INGEST_BATCH_SIZE,
+        upsert_concurrency=settings.INGEST_UPSERT_CONCURRENCY,
+        on_progress=print_progress,
+        on_batch=add_to_lexical_index,
+        checkpoint=checkpoint,
+        checkpoint_path=settings.INGEST_CHECKPOINT_PATH,
+        checkpoint_interval_s=settings.INGEST_CHECKPOINT_INTERVAL_S,
+        max_retries=settings.INGEST_MAX_RETRIES,
+        retry_base_delay=settings.INGEST_RETRY_BASE_DELAY,
+        retry_max_delay=settings.INGEST_RETRY_MAX_DELAY
+    )
+    print()
+    print(f"\nDiff: {result.stats.diff_summary()}")
+
+    # Delete removed chunks and the old versions of changed ones
+    stale_ids = result.stale_ids
+    if stale_ids:
+        print(f"\nDeleting {len(stale_ids)} stale points...")
+        await with_retries(
+            lambda: vector_store.delete_documents(stale_ids),
+            "Delete of stale points",
+            settings.INGEST_MAX_RETRIES,
+            settings.INGEST_RETRY_BASE_DELAY,
+            settings.INGEST_RETRY_MAX_DELAY
+        )
+    manifest.forget(result.removed_keys)
+
+    await vector_store.flush()
+    manifest.save()
+    IngestCheckpoint.clear(settings.INGEST_CHECKPOINT_PATH)
+
+    stats = result.stats
+    if stats.embedded == 0 and not stale_ids and Path(settings.LEXICAL_INDEX_PATH).exists():
+        print("\nIndex is up to date - nothing to do.")
+        return
+
+    print(f"\nSaving lexical index ({len(lexical)} documents)...")
+    save_lexical_index(lexical.build())
+    print(f"  Saved {settings.LEXICAL_INDEX_PATH}")
 
     print("\n" + "=" * 60)
-    print("SUCCESS: Chapter 1 Content Indexed!")
+    print("SUCCESS: Content Indexed!")
     print("=" * 60)
-    print(f"\nTotal sections indexed: {len(documents)}")
+    print(f"\n{stats.report()}")
+    print(f"Diff:               {stats.diff_summary()}")
     print(f"Collection: {settings.QDRANT_COLLECTION_NAME}")
     print(f"Vector dimension: {settings.VECTOR_DIMENSION}")
     print("\nReady for RAG queries!")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index book content")
+    parser.add_argument("--docs", default=settings.BOOK_DOCS_PATH,
+                        help="Markdown file or directory to index (default: BOOK_DOCS_PATH, else built-in Chapter 1)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Clear the collection and re-embed everything (removes duplicates from older runs)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its checkpoint (INGEST_CHECKPOINT_PATH)")
+    args = parser.parse_args()
+
     try:
-        asyncio.run(index_chapter_content())
+        asyncio.run(index_chapter_content(docs_path=args.docs, rebuild=args.rebuild, resume=args.resume))
     except KeyboardInterrupt:
-        print("\n\nIndexing interrupted by user")
+        print("\n\nIndexing interrupted by user - progress saved, rerun with --resume to continue")
     except Exception as e:
         print(f"\n\nError during indexing: {str(e)}")
         raise
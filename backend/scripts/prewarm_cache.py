@@ -0,0 +1,101 @@
+"""
+Content Cache Pre-warming - shared loop of the prewarm_* scripts
+Scrolls the indexed chunks one batch at a time, skips duplicates and variants already
+cached, generates the rest with at most `concurrency` calls in flight and reports
+progress and the resulting cache size.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.chat.content_cache import ContentCache
+from app.openai_client import close_openai_client
+import app.db_selector as db_selector
+
+
+async def init_vector_store():
+    """Qdrant if reachable, else the local vector store"""
+    try:
+        from app.database.qdrant import init_qdrant
+        await init_qdrant()
+        db_selector.use_local_qdrant = False
+    except Exception as e:
+        print(f"  Qdrant unavailable ({str(e)}) - using local vector store {settings.LOCAL_VECTOR_STORE_PATH}")
+        from app.database import local_vectors
+        await local_vectors.init_local_vectors()
+        db_selector.use_local_qdrant = True
+    return db_selector.get_vector_store_module()
+
+
+async def prewarm_cache(
+    cache: ContentCache,
+    variants: List[str],
+    generate: Callable[[str, str], Awaitable[object]],
+    concurrency: int,
+    batch_size: int,
+    limit: int,
+    cache_path: str,
+    max_entries_setting: str
+) -> Dict[str, int]:
+    """
+    Run generate(content, variant) for every indexed chunk and variant not cached yet
+    generate() is the subagent call that stores its own output in cache
+    """
+    vector_store = await init_vector_store()
+    model = settings.OPENAI_MODEL
+    semaphore = asyncio.Semaphore(concurrency)
+    seen = set()
+    counts = {"chunks": 0, "cached": 0, "generated": 0, "failed": 0}
+    started = time.perf_counter()
+
+    async def run(content: str, variant: str):
+        async with semaphore:
+            await generate(content, variant)
+        # The subagents fall back to the original text on errors - only a cache entry means success
+        if await cache.contains(content, variant, model):
+            counts["generated"] += 1
+        else:
+            counts["failed"] += 1
+
+    try:
+        async for documents in vector_store.scroll_documents(batch_size):
+            pending = []
+            for doc in documents:
+                content = doc["content"].strip()
+                if not content or content in seen:
+                    continue
+                if limit and counts["chunks"] >= limit:
+                    break
+                seen.add(content)
+                counts["chunks"] += 1
+                for variant in variants:
+                    if await cache.contains(content, variant, model):
+                        counts["cached"] += 1
+                    else:
+                        pending.append((content, variant))
+
+            await asyncio.gather(*[run(content, variant) for content, variant in pending])
+            elapsed = time.perf_counter() - started
+            print(f"\r  {counts['chunks']} chunks: {counts['cached']} variants already cached, "
+                  f"{counts['generated']} generated, {counts['failed']} failed ({elapsed:.0f}s)", end="", flush=True)
+            if limit and counts["chunks"] >= limit:
+                break
+    finally:
+        await close_openai_client()
+        cache.close()
+
+    stats = cache.get_stats()
+    print(f"\n\nCache entries: {stats['entries']} / {stats['max_entries']} (evicted {stats['evicted']})")
+    if stats["evicted"]:
+        print(f"Raise {max_entries_setting} to at least {counts['chunks'] * len(variants)} to keep every variant")
+    print(f"Cache file:    {cache_path or '(in-memory - nothing persisted)'}")
+    if counts["failed"]:
+        print(f"{counts['failed']} variants were not cached (LLM errors or truncated output) - rerun to retry them")
+    return counts
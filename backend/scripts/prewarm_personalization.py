@@ -0,0 +1,66 @@
+"""
+Personalization Cache Pre-warming
+Rewrites every indexed chunk for every (software, hardware) background bucket ahead of
+time, so /chat/personalize answers course content from the personalization cache.
+Variants already cached are skipped; at most --concurrency rewrites run at once, one
+batch of the index at a time.
+
+Run: python scripts/prewarm_personalization.py [--concurrency 4] [--limit N]
+"""
+
+import argparse
+import asyncio
+import itertools
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.chat.subagents import personalizer, BACKGROUND_LEVELS
+
+from prewarm_cache import prewarm_cache
+
+# Cache variants are "software/hardware" profile buckets
+BUCKETS = [f"{software}/{hardware}" for software, hardware in itertools.product(BACKGROUND_LEVELS, BACKGROUND_LEVELS)]
+
+
+async def personalize(content: str, bucket: str):
+    software, hardware = bucket.split("/")
+    await personalizer.personalize(content, {"software_background": software, "hardware_background": hardware})
+
+
+async def prewarm(concurrency: int, batch_size: int, limit: int):
+    print("=" * 60)
+    print("Personalization Cache Pre-warming")
+    print("=" * 60)
+
+    if not settings.PERSONALIZATION_CACHE_ENABLED:
+        raise RuntimeError("PERSONALIZATION_CACHE_ENABLED is off - nothing would be kept")
+
+    print(f"\nPersonalizing indexed chunks for {len(BUCKETS)} background buckets with {settings.OPENAI_MODEL} "
+          f"({concurrency} at a time)...")
+    await prewarm_cache(
+        personalizer.cache,
+        BUCKETS,
+        personalize,
+        concurrency,
+        batch_size,
+        limit,
+        settings.PERSONALIZATION_CACHE_PATH,
+        "PERSONALIZATION_CACHE_MAX_ENTRIES"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-warm the personalization cache with every indexed chunk")
+    parser.add_argument("--concurrency", type=int, default=4, help="Rewrites in flight at once")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks read from the index per batch")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many chunks (0 = all)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(prewarm(args.concurrency, args.batch_size, args.limit))
+    except KeyboardInterrupt:
+        print("\n\nInterrupted - variants finished so far are cached, rerun to continue")
@@ -0,0 +1,56 @@
+"""
+Translation Cache Pre-warming
+Translates every indexed chunk ahead of time, so /chat/translate answers chapter
+paragraphs from the translation cache. Chunks already cached are skipped; at most
+--concurrency translations run at once, one batch of the index at a time.
+
+Run: python scripts/prewarm_translations.py [--language Urdu] [--concurrency 4] [--limit N]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.chat.subagents import translator
+
+from prewarm_cache import prewarm_cache
+
+
+async def prewarm(language: str, concurrency: int, batch_size: int, limit: int):
+    print("=" * 60)
+    print("Translation Cache Pre-warming")
+    print("=" * 60)
+
+    if not settings.TRANSLATION_CACHE_ENABLED:
+        raise RuntimeError("TRANSLATION_CACHE_ENABLED is off - nothing would be kept")
+
+    print(f"\nTranslating indexed chunks to {language} with {settings.OPENAI_MODEL} ({concurrency} at a time)...")
+    await prewarm_cache(
+        translator.cache,
+        [language],
+        translator.translate,
+        concurrency,
+        batch_size,
+        limit,
+        settings.TRANSLATION_CACHE_PATH,
+        "TRANSLATION_CACHE_MAX_ENTRIES"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-warm the translation cache with every indexed chunk")
+    parser.add_argument("--language", default="Urdu", help="Target language (default: Urdu)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Translations in flight at once")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks read from the index per batch")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many chunks (0 = all)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(prewarm(args.language, args.concurrency, args.batch_size, args.limit))
+    except KeyboardInterrupt:
+        print("\n\nInterrupted - translations finished so far are cached, rerun to continue")
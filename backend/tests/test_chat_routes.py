@@ -0,0 +1,70 @@
+"""
+Chat endpoints end to end - every route answers against the fake OpenAI server
+"""
+
+SNIPPET = "import rclpy\nrclpy.init()\nnode = rclpy.create_node('talker')"
+
+
+def test_explain_code_endpoint(client):
+    response = client.post("/chat/explain-code", json={"message": "What does this do?", "selected_text": SNIPPET})
+    assert response.status_code == 200, response.text
+    assert response.json()["explanation"].startswith("word0")
+
+
+def test_explain_code_endpoint_requires_code(client):
+    response = client.post("/chat/explain-code", json={"message": "What does this do?"})
+    assert response.status_code == 400, response.text
+
+
+def test_message_explain_code_skips_rag(client):
+    response = client.post("/chat/message", json={
+        "message": "Explain this snippet",
+        "selected_text": SNIPPET + "\n# different comment",
+        "action": "explain_code"
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["plan"]["stages"] == ["code_explain", "persist"]
+    assert "retrieval" not in body["timings_ms"] and "llm" not in body["timings_ms"]
+    assert "code_explain" in body["timings_ms"]
+
+
+def test_translate_endpoint(client):
+    response = client.post("/chat/translate", json={"message": "Robots use sensors to perceive the world."})
+    assert response.status_code == 200, response.text
+    assert response.json()["translated_content"]
+
+
+def test_personalize_endpoint(client):
+    response = client.post("/chat/personalize", json={"message": "A ROS 2 node is a process that computes."})
+    assert response.status_code == 200, response.text
+    assert response.json()["personalized_content"]
+
+
+def test_subagent_routes_shed_load_with_503(client, monkeypatch):
+    from app.chat.llm_gateway import LLMOverloadedError, llm_gateway
+
+    callers = []
+
+    async def overloaded(user_id=None, **kwargs):
+        callers.append(user_id)
+        raise LLMOverloadedError("LLM queue full - try again shortly")
+
+    monkeypatch.setattr(llm_gateway, "chat", overloaded)
+    for path, message in (("/chat/translate", "Gazebo simulates physics."), ("/chat/personalize", "Isaac Sim renders.")):
+        response = client.post(path, json={"message": message})
+        assert response.status_code == 503, response.text
+    user_id = client.get("/chat/profile").json()["id"]
+    assert callers == [user_id, user_id]
+
+
+def test_message_translate_is_fused(client):
+    response = client.post("/chat/message", json={
+        "message": "Summarize this in Urdu",
+        "selected_text": "Gazebo simulates rigid-body physics for robots.",
+        "action": "translate"
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["plan"]["action"] == "translate" and body["plan"]["fused"]
+    assert body["finish_reason"] == "stop"
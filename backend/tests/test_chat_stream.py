@@ -0,0 +1,65 @@
+"""
+Streaming chat - event order, usage, persistence and time to first token
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from .conftest import FAKE_FIRST_TOKEN_MS, FAKE_TOKEN_MS, FAKE_TOKENS, WORK_DIR
+
+
+def _saved_turns(session_id: str):
+    with sqlite3.connect(f"{WORK_DIR}/local_humanoid.db") as conn:
+        return conn.execute(
+            "SELECT role, content FROM conversation_history WHERE session_id = ? ORDER BY id", (session_id,)
+        ).fetchall()
+
+
+def test_stream_events(client):
+    session_id = str(uuid.uuid4())
+    events = []
+    started = time.perf_counter()
+    first_token_ms = None
+    with client.stream("POST", "/chat/stream", json={
+        "message": "What does this node do?",
+        "selected_text": "A ROS 2 node publishes joint states at 50 Hz.",
+        "session_id": session_id
+    }) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        event = None
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                if event == "token" and first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - started) * 1000
+                events.append((event, json.loads(line[len("data: "):])))
+    total_ms = (time.perf_counter() - started) * 1000
+
+    names = [name for name, _ in events]
+    assert names[0] == "sources" and names[-1] == "done"
+    assert "error" not in names
+    assert names.count("token") >= FAKE_TOKENS // 2
+    assert "".join(data["content"] for name, data in events if name == "token").strip().startswith("word0")
+
+    done = events[-1][1]
+    assert done["session_id"] == session_id and done["finish_reason"] == "stop"
+    assert done["usage_estimated"] is False
+    assert done["completion_tokens"] == FAKE_TOKENS and done["tokens_used"] > FAKE_TOKENS
+
+    # Tokens are forwarded as they arrive, not after the whole completion
+    assert total_ms - first_token_ms >= 0.5 * FAKE_TOKENS * FAKE_TOKEN_MS
+    assert first_token_ms < FAKE_FIRST_TOKEN_MS + 0.5 * FAKE_TOKENS * FAKE_TOKEN_MS
+
+    # Turns are written in the background once the stream completes
+    for _ in range(50):
+        turns = _saved_turns(session_id)
+        if len(turns) == 2:
+            break
+        threading.Event().wait(0.1)
+    assert [role for role, _ in turns] == ["user", "assistant"]
+    assert turns[0][1] == "What does this node do?" and turns[1][1].startswith("word0")
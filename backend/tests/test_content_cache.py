@@ -0,0 +1,67 @@
+"""
+ContentCache - LRU eviction and migration of translation caches written before variants
+"""
+
+import asyncio
+import sqlite3
+import time
+
+from app.chat.content_cache import ContentCache, content_key
+
+
+def test_lru_eviction():
+    async def scenario():
+        cache = ContentCache("", 2, "translation_cache")
+        await cache.put("one", "Urdu", "m", "1", 5)
+        await cache.put("two", "Urdu", "m", "2", 5)
+        assert await cache.get("one", "Urdu", "m") == "1"  # Refreshes "one"
+        await cache.put("three", "Urdu", "m", "3", 5)
+        return cache, await cache.get("two", "Urdu", "m"), await cache.get("one", "Urdu", "m")
+
+    cache, evicted, kept = asyncio.run(scenario())
+    assert evicted is None and kept == "1"
+    assert cache.get_stats()["evicted"] == 1
+
+
+def test_migrates_translation_only_layout(tmp_path):
+    path = str(tmp_path / "translation_cache.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE translation_cache (
+            key TEXT PRIMARY KEY, language TEXT NOT NULL, model TEXT NOT NULL, translation TEXT NOT NULL,
+            tokens_used INTEGER NOT NULL, created_at REAL NOT NULL, last_used_at REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX idx_translation_last_used ON translation_cache(last_used_at)")
+    conn.execute(
+        "INSERT INTO translation_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (content_key("Hello", "Urdu", "m"), "Urdu", "m", "ہیلو", 12, time.time(), time.time())
+    )
+    conn.commit()
+    conn.close()
+
+    async def scenario():
+        cache = ContentCache(path, 100, "translation_cache")
+        cached = await cache.get("Hello", "Urdu", "m")
+        await cache.put("Bye", "Urdu", "m", "خدا حافظ", 3)
+        cache.close()
+        return cached
+
+    assert asyncio.run(scenario()) == "ہیلو"
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM translation_cache").fetchone()[0] == 2
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(translation_cache)")}
+    assert "idx_translation_last_used" not in indexes
+
+
+def test_unusable_file_falls_back_to_memory(tmp_path, caplog):
+    async def scenario():
+        cache = ContentCache(str(tmp_path / "missing" / "cache.db"), 10, "translation_cache")
+        await cache.put("one", "Urdu", "m", "1", 5)
+        return cache, await cache.get("one", "Urdu", "m"), await cache.get("two", "Urdu", "m")
+
+    cache, hit, miss = asyncio.run(scenario())
+    assert hit == "1" and miss is None
+    assert cache.get_stats()["persistent"] is False
+    assert len([r for r in caplog.records if "caching in memory only" in r.getMessage()]) == 1
@@ -0,0 +1,36 @@
+"""
+ConversationWriter - turns queued before a worker restart are still written
+"""
+
+import asyncio
+
+from app.chat import conversation_writer as writer_module
+from app.chat.conversation_writer import ConversationWriter
+
+
+class SlowDb:
+    def __init__(self):
+        self.saved = []
+
+    async def save_conversation(self, user_id, session_id, role, content):
+        await asyncio.sleep(0.01)
+        self.saved.append((session_id, role, content))
+
+
+def test_restarted_worker_keeps_queued_turns(monkeypatch):
+    db = SlowDb()
+    monkeypatch.setattr(writer_module, "get_db_module", lambda: db)
+
+    async def scenario():
+        writer = ConversationWriter()
+        await writer.submit(1, "s1", [("user", "q1"), ("assistant", "a1")])
+        writer._worker.cancel()  # Dies before writing anything, the turns stay queued
+        await asyncio.sleep(0)
+        await writer.submit(1, "s1", [("assistant", "a2")])  # Restarts the worker
+        await asyncio.wait_for(writer.wait_for_session("s1"), 1)
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert [content for _, _, content in db.saved] == ["q1", "a1", "a2"]
+    assert writer.queue_depth() == 0
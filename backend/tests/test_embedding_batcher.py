@@ -0,0 +1,45 @@
+"""
+EmbeddingBatcher - no request is left waiting when the worker stops or restarts
+"""
+
+import asyncio
+
+from app.embeddings.service import EmbeddingBatcher, EmbeddingOverloadedError
+
+
+def test_close_fails_waiting_requests():
+    async def scenario():
+        blocked = asyncio.Event()
+
+        async def encode(texts):
+            await blocked.wait()
+            return [[1.0] for _ in texts]
+
+        batcher = EmbeddingBatcher(encode, max_batch_size=1, max_wait_ms=0, max_in_flight=1)
+        requests = [asyncio.create_task(batcher.embed(f"text {n}")) for n in range(3)]
+        await asyncio.sleep(0.05)  # One batch encoding, one request being collected, one queued
+        await batcher.close()
+        return await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 1)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, EmbeddingOverloadedError) for result in results)
+
+
+def test_restarted_worker_keeps_queued_requests():
+    async def scenario():
+        async def encode(texts):
+            await asyncio.sleep(0.05)
+            return [[float(len(text))] for text in texts]
+
+        batcher = EmbeddingBatcher(encode, max_batch_size=2, max_wait_ms=0, max_in_flight=1)
+        first = [asyncio.create_task(batcher.embed("a" * n)) for n in range(1, 4)]
+        await asyncio.sleep(0.01)  # First batch encoding, the third request queued
+        queued = batcher.queue_depth()
+        batcher._worker_task.cancel()
+        await asyncio.sleep(0)
+        later = asyncio.create_task(batcher.embed("bbbb"))
+        return queued, await asyncio.wait_for(asyncio.gather(*first, later, return_exceptions=True), 1)
+
+    queued, results = asyncio.run(scenario())
+    assert queued == 1
+    assert results == [[1.0], [2.0], [3.0], [4.0]]
@@ -0,0 +1,30 @@
+"""
+Ingestion pipeline - incremental runs report what changed
+"""
+
+import asyncio
+
+from app.indexing.manifest import IndexManifest
+from app.indexing.pipeline import ingest_documents
+
+
+class MemoryStore:
+    async def upsert_documents(self, documents, embeddings):
+        pass
+
+
+async def _encode(texts):
+    return [[0.0] for _ in texts]
+
+
+def test_rerun_reports_added_changed_removed_unchanged(tmp_path):
+    manifest = IndexManifest(str(tmp_path / "manifest.json"), "test")
+    docs = [{"content": f"Chunk {n}", "source": f"ch1.md#Nodes:{n}"} for n in range(4)]
+    first = asyncio.run(ingest_documents(docs, _encode, MemoryStore(), manifest, batch_size=2))
+    assert first.stats.diff_summary() == "added: 4, changed: 0, removed: 0, unchanged: 0"
+
+    docs = docs[:2] + [{"content": "Chunk 2, revised", "source": "ch1.md#Nodes:2"},
+                       {"content": "Chunk 5", "source": "ch1.md#Nodes:5"}]
+    second = asyncio.run(ingest_documents(docs, _encode, MemoryStore(), manifest, batch_size=2))
+    assert second.stats.diff_summary() == "added: 1, changed: 1, removed: 1, unchanged: 2"
+    assert second.removed_keys == ["ch1.md#Nodes:3"]
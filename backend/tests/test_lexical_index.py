@@ -0,0 +1,44 @@
+"""
+Lexical index - postings built batch by batch during ingestion
+"""
+
+import asyncio
+
+from app.database.lexical_index import LexicalIndexBuilder, max_scaled_scores
+from app.indexing.manifest import IndexManifest, document_point_id
+from app.indexing.pipeline import ingest_documents
+
+
+class MemoryStore:
+    async def upsert_documents(self, documents, embeddings):
+        pass
+
+
+def test_builds_postings_from_ingestion_batches(tmp_path):
+    docs = [
+        {"content": f"Chunk {n} about {'rclpy' if n % 2 else 'gazebo'} nodes", "section": "ROS 2",
+         "topic": "Nodes", "source": f"ch1.md#Nodes:{n}"}
+        for n in range(5)
+    ]
+    builder = LexicalIndexBuilder()
+
+    async def encode(texts):
+        return [[0.0] for _ in texts]
+
+    def on_batch(batch):
+        for doc in batch:
+            builder.add(document_point_id(doc), doc)
+
+    manifest = IndexManifest(str(tmp_path / "manifest.json"), "test")
+    asyncio.run(ingest_documents(docs, encode, MemoryStore(), manifest, batch_size=2, on_batch=on_batch))
+
+    index = builder.build()
+    assert index.ids == [document_point_id(doc) for doc in docs]
+    assert [doc for doc, _ in index.search("rclpy", 5)] == [1, 3]
+    assert index.has_terms("gazebo nodes") and not index.has_terms("isaac")
+
+
+def test_max_scaled_scores():
+    scaled = max_scaled_scores([{"id": "a", "score": 5.0}, {"id": "b", "score": 4.5}, {"id": "c", "score": 2.5}])
+    assert [doc["score"] for doc in scaled] == [1.0, 0.9, 0.5]
+    assert max_scaled_scores([{"id": "a", "score": 3.2}])[0]["score"] == 1.0
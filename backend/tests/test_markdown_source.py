@@ -0,0 +1,38 @@
+"""
+Markdown source - chunk identities stay unique within a file
+"""
+
+from app.indexing.markdown import MarkdownSection, chunk_sections, read_sections
+
+
+def test_repeated_headings_get_distinct_sources(tmp_path):
+    (tmp_path / "week-1.md").write_text(
+        "# Intro\ntext\n## Example\nfirst\n## Setup\nsteps\n## Example\nsecond\n", encoding="utf-8"
+    )
+    sources = [doc["source"] for doc in chunk_sections(read_sections(str(tmp_path)), 100, 10)]
+    assert sources == ["week-1.md#Intro:0", "week-1.md#Example:0", "week-1.md#Setup:0", "week-1.md#Example (2):0"]
+
+
+def _wordpiece_tokenizer():
+    from tokenizers import Tokenizer, normalizers, pre_tokenizers
+    from tokenizers.models import WordPiece
+
+    vocab = ["[UNK]", "[CLS]", "[SEP]", "sensor", "_", "msgs", "/", "point", "##cloud", "##2", "the", "topic", "."]
+    tokenizer = Tokenizer(WordPiece({token: i for i, token in enumerate(vocab)}, unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    return tokenizer
+
+
+def test_chunks_are_measured_in_embedding_model_tokens():
+    tokenizer = _wordpiece_tokenizer()
+    text = " ".join(["the topic sensor_msgs/PointCloud2."] * 20)
+    sections = [MarkdownSection("a.md", "A", "Topics", text)]
+
+    chunks = [doc["content"] for doc in chunk_sections(sections, 40, 0, tokenizer=tokenizer)]
+    assert len(chunks) > 1
+    assert all(len(tokenizer.encode(chunk, add_special_tokens=False).ids) <= 40 for chunk in chunks)
+
+    # Without the tokenizer, windows are shrunk so identifier-heavy text still fits
+    estimated = [doc["content"] for doc in chunk_sections(sections, 40, 0)]
+    assert all(len(tokenizer.encode(chunk, add_special_tokens=False).ids) <= 40 for chunk in estimated)
@@ -66,6 +66,51 @@ class ChatAPI {
     return this.handleResponse(response);
   }
 
+  /**
+   * Stream chat message (Server-Sent Events)
+   * onEvent(event, data) receives "sources", then "token" deltas, then "done" (usage) or "error"
+   */
+  async streamMessage({ message, session_id = null, selected_text = null }, onEvent) {
+    const response = await fetch(`${this.API_BASE}/chat/stream`, {
+      method: 'POST',
+      headers: this.getHeaders(),
+      body: JSON.stringify({
+        message,
+        session_id,
+        selected_text
+      })
+    });
+
+    if (!response.ok) {
+      return this.handleResponse(response);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      // Events are separated by a blank line
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const raw = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let event = 'message';
+        let data = '';
+        for (const line of raw.split('\n')) {
+          if (line.startsWith('event: ')) event = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        }
+        if (data) onEvent(event, JSON.parse(data));
+      }
+    }
+  }
+
   /**
    * Personalize content
    */